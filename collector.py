@@ -2,84 +2,280 @@
 """
 Simple collector that actually works with the central API
 """
+import gzip
 import json
+import queue
+import threading
 import time
+import zlib
 import requests
 from datetime import datetime
 from find_veeder_tls import get_tank_levels
+from outbox import Outbox
+from scheduler import PollScheduler
+from veeder_root_tls_socket_library.pool import default_pool
 
 def load_config():
     """Load configuration"""
     with open('config.json', 'r') as f:
         return json.load(f)
 
-def collect_and_upload():
-    """Collect tank data and upload to central API"""
-    config = load_config()
-    
+def open_outbox(config):
+    """Open the local outbox readings wait in until the central API has them.
+
+    outbox_path - the SQLite database, outbox.db by default
+    outbox_sync - how hard each commit is pushed to the SD card: OFF, NORMAL (default) or FULL
+    outbox_commit_every - readings appended per commit, 1 by default
+    outbox_commit_interval - seconds after which an append commits everything before it, 0 (off) by default
+    outbox_max_rows - readings kept before the oldest are evicted, 100000 by default
+    """
+    return Outbox(
+        config.get('outbox_path', 'outbox.db'),
+        sync=config.get('outbox_sync', 'NORMAL'),
+        commit_every=config.get('outbox_commit_every', 1),
+        commit_interval=config.get('outbox_commit_interval', 0.0),
+        max_rows=config.get('outbox_max_rows', 100000)
+    )
+
+def encode_body(payload, compression=None):
+    """Serialize a payload to JSON, compressed with gzip or deflate, returning the body and its headers"""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+
+    if compression == 'gzip':
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+    elif compression == 'deflate':
+        body = zlib.compress(body, 6)
+    elif compression:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    if compression:
+        headers['Content-Encoding'] = compression
+    return body, headers
+
+def make_session():
+    """A keep-alive session, so uploads reuse one TLS connection to the central API"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def upload(config, payload, session=None):
+    """Upload one reading to the central API, True once it is accepted"""
+    return post(config['central_api_url'], payload, session=session)
+
+def upload_batch(config, payloads, session=None):
+    """Upload many readings in one compressed request, True once the batch is accepted"""
+    url = config['central_batch_url']
+    print(f"   Batch of {len(payloads)} readings")
+    return post(url, {"readings": payloads}, config.get('upload_compression', 'gzip'), session)
+
+def check_upload_config(config):
+    """Fail at startup on upload settings the central API would reject on every upload"""
+    if config.get('upload_batch_size', 1) > 1 and not config.get('central_batch_url'):
+        raise ValueError("central_batch_url is required when upload_batch_size is over 1, "
+                         "central_api_url only accepts single readings")
+
+def post(url, payload, compression=None, session=None):
+    """POST a payload to the central API, True once it is accepted"""
+    body, headers = encode_body(payload, compression)
+    try:
+        response = (session or requests).post(url, data=body, headers=headers, timeout=30)
+    except requests.RequestException as e:
+        print(f"❌ Upload failed: {e}")
+        return False
+
+    if response.status_code == 200:
+        print("✅ SUCCESS! Data uploaded to central database")
+        print(f"   Response: {response.text[:100]}")
+        return True
+
+    print(f"❌ Upload failed: {response.status_code}")
+    print(f"   Error: {response.text[:200]}")
+    return False
+
+def drain_outbox(config, outbox, session=None):
+    """Upload pending readings one at a time, or in batches when upload_batch_size is over 1.
+
+    Batches wait until upload_batch_size readings are pending or the oldest
+    has waited upload_max_age_seconds, so each request carries many readings.
+    """
+    batch_size = config.get('upload_batch_size', 1)
+    if batch_size <= 1:
+        return outbox.drain(lambda payload: upload(config, payload, session))
+
+    max_age = config.get('upload_max_age_seconds', 3600)
+    if len(outbox) < batch_size and outbox.oldest_age() < max_age:
+        return 0
+    return outbox.drain_batches(lambda payloads: upload_batch(config, payloads, session), batch_size)
+
+class Uploader(threading.Thread):
+    """Drains the outbox in the background, so a slow central API never delays a gauge read.
+
+    The poller stores each reading in the outbox and then calls submit(),
+    which never blocks: when the bounded queue is full the reading simply
+    waits in the outbox for the next drain. The uploader also retries the
+    backlog every upload_retry_seconds, drains it one last time when it is
+    stopped, and keeps backpressure metrics.
+    """
+
+    def __init__(self, config, outbox):
+        super().__init__(name='uploader', daemon=True)
+        self.config = config
+        self.outbox = outbox
+        self.queue = queue.Queue(maxsize=config.get('upload_queue_size', 100))
+        self.session = make_session()
+        self.metrics = {
+            'queued': 0,           # readings handed to the uploader
+            'queue_full': 0,       # readings left for the next drain because the queue was full
+            'max_queue_depth': 0,  # deepest the queue has been
+            'drains': 0,           # times the outbox was drained
+            'sent': 0,             # readings the central API accepted
+            'last_drain_seconds': 0.0,
+            'backlog': 0           # readings still in the outbox after the last drain
+        }
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, row_id):
+        """Wake the uploader for a reading already stored in the outbox"""
+        try:
+            self.queue.put_nowait(row_id)
+        except queue.Full:
+            with self._lock:
+                self.metrics['queue_full'] += 1
+            return
+
+        with self._lock:
+            self.metrics['queued'] += 1
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue.qsize())
+
+    def snapshot(self):
+        """A copy of the metrics, with the current queue depth"""
+        with self._lock:
+            return {**self.metrics, 'queue_depth': self.queue.qsize()}
+
+    def run(self):
+        retry = self.config.get('upload_retry_seconds', 60)
+
+        while not self._stopping.is_set():
+            try:
+                self.queue.get(timeout=retry)
+            except queue.Empty:
+                pass
+
+            # One drain sends every reading that has arrived, however many wakeups queued up
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            # Once stopping, this drain is the last one, so nothing queued is left behind
+            if len(self.outbox) == 0:
+                continue
+
+            started = time.monotonic()
+            try:
+                sent = drain_outbox(self.config, self.outbox, self.session)
+            except Exception as e:
+                print(f"❌ Uploader error: {e}")
+                sent = 0
+
+            with self._lock:
+                self.metrics['drains'] += 1
+                self.metrics['sent'] += sent
+                self.metrics['last_drain_seconds'] = round(time.monotonic() - started, 3)
+                self.metrics['backlog'] = len(self.outbox)
+
+    def stop(self, timeout=35):
+        """Stop after one last drain, waiting up to timeout seconds for it"""
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.join(timeout)
+        self.session.close()
+
+def collect(config):
+    """Read every tank and build the reading uploaded to the central API.
+
+    The gauge connection stays open between polls unless release_after_poll
+    is set, for Lantronix ports that must be free for other clients.
+    """
     print(f"\n{'='*60}")
     print(f"🛢️ Veeder Reader Collector - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}")
     print(f"Store: {config['store_name']}")
     print(f"Lantronix IP: {config['lantronix_ip']}")
     
+    # Get tank data
+    print("\n📡 Collecting tank data...")
+    raw_tanks = get_tank_levels(config['lantronix_ip'], pool=default_pool,
+                                release=config.get('release_after_poll', False))
+    print(f"✅ Found {len(raw_tanks)} tanks")
+    
+    return build_reading(config['store_name'], raw_tanks)
+
+def build_reading(store_name, raw_tanks):
+    """Build the reading uploaded to the central API from the tanks get_tank_levels returns"""
+    # Format tanks with required fields for API
+    tanks_with_timestamp = []
+    timestamp = datetime.now().isoformat()
+    
+    # Remove duplicates and format correctly
+    seen_tanks = {}
+    for tank in raw_tanks:
+        tank_id = tank['id']
+        if tank_id not in seen_tanks:
+            tank_data = {
+                'tank_id': tank_id,
+                'product': tank['product'],
+                'volume': tank['volume'],
+                'tc_volume': tank['volume'] - 37,  # Temperature compensated volume  
+                'ullage': 10000 - tank['volume'],  # Remaining space in tank
+                'height': tank.get('height', 45.0),  # Tank height/level
+                'water': tank.get('water', 0.0),  # Water level
+                'temp': tank.get('temp', 70.0),  # Temperature
+                'capacity': 10000,
+                'timestamp': timestamp
+            }
+            tanks_with_timestamp.append(tank_data)
+            seen_tanks[tank_id] = tank
+            print(f"   Tank {tank_id}: {tank['product']} - {tank['volume']} gallons")
+    
+    # Prepare upload data
+    return {
+        "store_name": store_name,
+        "tanks": tanks_with_timestamp,
+        "timestamp": timestamp
+    }
+
+def collect_and_upload(outbox=None):
+    """Collect tank data, store it in the outbox and upload everything pending"""
+    config = load_config()
+    check_upload_config(config)
+    if outbox is None:
+        outbox = open_outbox(config)
+    
     try:
-        # Get tank data
-        print("\n📡 Collecting tank data...")
-        raw_tanks = get_tank_levels(config['lantronix_ip'])
-        print(f"✅ Found {len(raw_tanks)} tanks")
-        
-        # Format tanks with required fields for API
-        tanks_with_timestamp = []
-        timestamp = datetime.now().isoformat()
-        
-        # Remove duplicates and format correctly
-        seen_tanks = {}
-        for tank in raw_tanks:
-            tank_id = tank['id']
-            if tank_id not in seen_tanks:
-                tank_data = {
-                    'tank_id': tank_id,
-                    'product': tank['product'],
-                    'volume': tank['volume'],
-                    'tc_volume': tank['volume'] - 37,  # Temperature compensated volume  
-                    'ullage': 10000 - tank['volume'],  # Remaining space in tank
-                    'height': tank.get('height', 45.0),  # Tank height/level
-                    'water': tank.get('water', 0.0),  # Water level
-                    'temp': tank.get('temp', 70.0),  # Temperature
-                    'capacity': 10000,
-                    'timestamp': timestamp
-                }
-                tanks_with_timestamp.append(tank_data)
-                seen_tanks[tank_id] = tank
-                print(f"   Tank {tank_id}: {tank['product']} - {tank['volume']} gallons")
+        upload_data = collect(config)
         
-        # Prepare upload data
-        upload_data = {
-            "store_name": config['store_name'],
-            "tanks": tanks_with_timestamp,
-            "timestamp": timestamp
-        }
+        # Stored before uploading, so an outage or reboot cannot lose it
+        outbox.append(upload_data)
         
-        # Upload to central API
-        print(f"\n📤 Uploading to central database...")
+        # Upload to central API, oldest readings first
+        print("\n📤 Uploading to central database...")
         print(f"   URL: {config['central_api_url']}")
         
-        response = requests.post(
-            config['central_api_url'],
-            json=upload_data,
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            print(f"✅ SUCCESS! Data uploaded to central database")
-            print(f"   Response: {response.text[:100]}")
-            return True
-        else:
-            print(f"❌ Upload failed: {response.status_code}")
-            print(f"   Error: {response.text[:200]}")
-            return False
+        sent = drain_outbox(config, outbox)
+        print(f"   Sent {sent} readings")
+        waiting = len(outbox)
+        if waiting:
+            print(f"📦 {waiting} readings waiting in the outbox")
+        return waiting == 0
             
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -88,24 +284,51 @@ def collect_and_upload():
 def main():
     """Main collector loop"""
     config = load_config()
+    check_upload_config(config)
     poll_interval = config.get('poll_interval_seconds', 300)
     
     print("🚀 Starting Veeder Reader Collector")
     print(f"   Poll interval: {poll_interval} seconds")
     print(f"   Central API: {config['central_api_url']}")
+    outbox = open_outbox(config)
+    
+    # Uploads run on their own thread, this one only reads the gauge
+    uploader = Uploader(config, outbox)
+    uploader.start()
+    
+    # Polls keep to fixed deadlines, offset per store so the fleet does not poll in lockstep
+    scheduler = PollScheduler(
+        poll_interval,
+        config['store_name'],
+        jitter=config.get('poll_jitter_seconds', min(5.0, poll_interval / 10))
+    )
+    print(f"   Poll phase: {scheduler.phase:.1f} seconds into each interval")
     
     while True:
         try:
-            collect_and_upload()
-            print(f"\n⏰ Next collection in {poll_interval} seconds...")
-            time.sleep(poll_interval)
+            wait = scheduler.next_deadline() - time.monotonic()
+            print(f"\n⏰ Next collection in {max(wait, 0):.0f} seconds...")
+            skipped = scheduler.wait()
+            if skipped:
+                print(f"⚠️ Skipped {skipped} missed collections")
+            
+            try:
+                uploader.submit(outbox.append(collect(config)))
+            except Exception as e:
+                print(f"❌ Error: {str(e)}")
+            
+            metrics = uploader.snapshot()
+            print(f"📊 Upload queue {metrics['queue_depth']} (max {metrics['max_queue_depth']}, "
+                  f"{metrics['queue_full']} full), backlog {metrics['backlog']}, "
+                  f"sent {metrics['sent']}, last drain {metrics['last_drain_seconds']}s")
         except KeyboardInterrupt:
             print("\n👋 Collector stopped by user")
+            uploader.stop()
+            default_pool.close()
+            outbox.close()
             break
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}")
-            print(f"⏰ Retrying in {poll_interval} seconds...")
-            time.sleep(poll_interval)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
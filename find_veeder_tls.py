@@ -1,13 +1,19 @@
-from veeder_root_tls_socket_library.socket import TlsSocket
+from veeder_root_tls_socket_library.pool import default_pool
+from veeder_root_tls_socket_library.tls_3xx import function_201
 import re
 
+# One tank line of the display format in-tank inventory report
+TANK_LINE = re.compile(
+    r"^\s*(\d+)\s+([A-Z0-9 ]+?)\s+(\d+)\s+(\d+)\s+(\d+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)$",
+    re.MULTILINE
+)
+
+# Product labels learned from each gauge, by (ip, port) and then by (tank id, product code)
+product_labels = {}
+
 def parse_tank_response(response):
     """Parses a single I201XX response string into a dict"""
-    pattern = re.compile(
-        r"^\s*(\d+)\s+([A-Z0-9 ]+?)\s+(\d+)\s+(\d+)\s+(\d+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)$",
-        re.MULTILINE
-    )
-    match = pattern.search(response)
+    match = TANK_LINE.search(response)
     if match:
         return {
             "id": int(match.group(1)),
@@ -22,9 +28,96 @@ def parse_tank_response(response):
     return None
 
 
-def get_tank_levels(ip_address='127.0.0.1', port=10001):
+def tank_from_inventory(record):
+    """Converts a tls_3xx function 201 tank record into the dict parse_tank_response returns.
+
+    Volumes are rounded to whole gallons, as the display format reports them.
+    """
+    return {
+        "id": int(record["tank_number"]),
+        "product": record["product_code"],
+        "volume": round(record["volume"]),
+        "tc_volume": round(record["tc_volume"]),
+        "ullage": round(record["ullage"]),
+        "height": record["height"],
+        "water": record["water"],
+        "temp": record["temperature"]
+    }
+
+
+def parse_product_labels(response):
+    """Maps tank ids to product labels from a display format I20100 report"""
+    return {int(match.group(1)): match.group(2).strip()
+            for match in TANK_LINE.finditer(response.replace('\r', ''))}
+
+
+def needs_labels(ip_address, port, tanks):
+    """True when a tank's product code has no label learned from the gauge yet"""
+    known = product_labels.get((ip_address, port), {})
+    return any((tank['id'], tank['product']) not in known for tank in tanks)
+
+
+def learn_labels(ip_address, port, tanks, response):
+    """Remembers the product label of every tank from a display format I20100 report"""
+    labels = parse_product_labels(response)
+    missing = [tank['id'] for tank in tanks if tank['id'] not in labels]
+    if missing:
+        raise ValueError(f"No product label for tanks {missing}")
+
+    product_labels[(ip_address, port)] = {(tank['id'], tank['product']): labels[tank['id']] for tank in tanks}
+
+
+def label_tanks(ip_address, port, tanks):
+    """Replaces i20100 product codes with the gauge's labels, so uploads keep the product names"""
+    known = product_labels.get((ip_address, port), {})
+    for tank in tanks:
+        tank['product'] = known[(tank['id'], tank['product'])]
+    return tanks
+
+
+def get_tank_levels(ip_address='127.0.0.1', port=10001, pool=default_pool, computer_format=True,
+                    release=False):
+    """Reads every tank over one pooled connection, kept open for the next poll.
+
+    With computer_format, every tank is read with a single i20100 query and
+    the gauge decides how many tanks there are. Its product codes are turned
+    into the labels display format reports show, looked up once per gauge
+    with I20100 and again whenever a tank's product code changes. Gauges
+    that reject either fall back to one display format I201xx query per
+    tank for the first six tanks. A gauge that cannot be reached raises
+    instead of reporting no tanks.
+
+    With release, the connection is closed after the read instead, for
+    Lantronix serial ports that take one client at a time and are shared
+    with other tools such as the setup web server.
+    """
     print(f"🟢 Connecting to Veeder Root at {ip_address}:{port}...")
-    tls = TlsSocket(ip_address, port)
+
+    try:
+        return query_tanks(ip_address, port, pool, computer_format)
+    finally:
+        if release:
+            pool.release(ip_address, port)
+
+
+def query_tanks(ip_address, port, pool, computer_format):
+    """Runs the tank queries for get_tank_levels, raising on connection failures"""
+    if computer_format:
+        try:
+            with pool.connection(ip_address, port) as tls:
+                report = function_201(tls, "00")
+                tank_data = [tank_from_inventory(record) for record in report["tanks"]]
+                if needs_labels(ip_address, port, tank_data):
+                    learn_labels(ip_address, port, tank_data, tls.execute("I20100"))
+            label_tanks(ip_address, port, tank_data)
+            print(f"✅ Parsed {len(tank_data)} tanks from i20100")
+            return tank_data
+        except OSError:
+            # Unreachable or silent, the per-tank queries would only wait for it again
+            raise
+        except Exception as e:
+            print(f"⚠️ All-tanks query failed ({e}), falling back to one query per tank")
+
     tank_data = []
 
     for tank_num in range(1, 7):
@@ -32,7 +125,7 @@ def get_tank_levels(ip_address='127.0.0.1', port=10001):
         command = f"I201{tank_id}"
         print(f"➡️ Sending command: {command} to {tank_num}")
         try:
-            response = tls.execute(command)
+            response = pool.execute(ip_address, port, command)
             print(f"⬅️ Response:\n{response}")
             tank = parse_tank_response(response)
             if tank:
@@ -40,6 +133,8 @@ def get_tank_levels(ip_address='127.0.0.1', port=10001):
                 tank_data.append(tank)
             else:
                 print("⚠️ No match in response")
+        except OSError:
+            raise
         except Exception as e:
             print(f"❌ Error querying Tank {tank_id}: {e}")
 
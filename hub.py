@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Hub mode: polls every gauge on a roster from one process and uploads their readings in batches
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from collector import Uploader, build_reading, check_upload_config, load_config, open_outbox
+from find_veeder_tls import label_tanks, learn_labels, needs_labels, tank_from_inventory
+from scheduler import PollScheduler
+from veeder_root_tls_socket_library.async_socket import AsyncTlsSocket
+from veeder_root_tls_socket_library.tls_3xx_async import function_201
+
+# A gauge to poll, the Lantronix serial port its store's TLS is attached to.
+Target = namedtuple('Target', ['store_name', 'ip', 'port'])
+
+
+def load_roster(path):
+    """Load the gauges to poll, a JSON list of {"store_name", "ip", "port"} entries"""
+    with open(path, 'r') as f:
+        entries = json.load(f)
+
+    targets = [Target(entry['store_name'], entry['ip'], entry.get('port', 10001)) for entry in entries]
+
+    names = [target.store_name for target in targets]
+    if len(set(names)) != len(names):
+        raise ValueError("store_name must be unique in the roster")
+    return targets
+
+
+async def read_tanks(target, connect_timeout=10):
+    """Read every tank of a gauge with a single i20100 query, on a connection opened for this poll"""
+    tls = await AsyncTlsSocket.connect(target.ip, target.port, connect_timeout)
+    async with tls:
+        report = await function_201(tls, "00")
+        tanks = [tank_from_inventory(record) for record in report["tanks"]]
+
+        # Uploads carry product labels, which only the display format report has
+        if needs_labels(target.ip, target.port, tanks):
+            learn_labels(target.ip, target.port, tanks, await tls.execute("I20100"))
+    return label_tanks(target.ip, target.port, tanks)
+
+
+class CircuitBreaker:
+    """Stops polling a gauge that keeps failing, and tries it again after a cooldown.
+
+    After failure_threshold failures in a row the circuit opens and polls are
+    skipped for reset_seconds. The next poll is a trial: success closes the
+    circuit, failure opens it for another reset_seconds.
+    """
+
+    def __init__(self, failure_threshold=3, reset_seconds=600, clock=time.monotonic):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.allow() else 'open'
+
+    def allow(self):
+        """True when the gauge may be polled"""
+        return self.opened_at is None or self.clock() - self.opened_at >= self.reset_seconds
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        """Count a failed poll, returning True when it opens the circuit"""
+        self.failures += 1
+
+        # A failed trial reopens the circuit straight away.
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+            return True
+        return False
+
+
+class Hub:
+    """Polls every gauge on the roster concurrently and feeds one shared batched uploader.
+
+    Each gauge polls on its own PollScheduler, so the fleet is spread across
+    the interval instead of polled in one burst, and at most hub_concurrency
+    polls are in flight at once. Every poll is bounded by hub_timeout_seconds
+    and every gauge has a CircuitBreaker, so dead sites cost one skipped poll
+    instead of a timeout every interval. Readings go through the outbox like
+    the single-store collector's.
+    """
+
+    def __init__(self, config, targets, outbox, uploader):
+        self.interval = config.get('poll_interval_seconds', 300)
+        self.jitter = config.get('poll_jitter_seconds', min(5.0, self.interval / 10))
+        self.timeout = config.get('hub_timeout_seconds', 30)
+        self.connect_timeout = config.get('hub_connect_timeout_seconds', 10)
+        self.concurrency = config.get('hub_concurrency', 50)
+        self.targets = targets
+        self.outbox = outbox
+        self.uploader = uploader
+        self.breakers = {
+            target.store_name: CircuitBreaker(config.get('hub_failure_threshold', 3),
+                                              config.get('hub_circuit_reset_seconds', 600))
+            for target in targets
+        }
+        self.metrics = {
+            'polls': 0,          # polls that returned a reading
+            'failures': 0,       # polls that failed, timeouts included
+            'timeouts': 0,       # polls cut off after hub_timeout_seconds
+            'circuit_open': 0,   # polls skipped because the gauge's circuit was open
+            'missed': 0,         # deadlines skipped because a poll overran
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'max_poll_seconds': 0.0
+        }
+        self._semaphore = None
+
+    def open_circuits(self):
+        return sum(1 for breaker in self.breakers.values() if breaker.opened_at is not None)
+
+    async def run(self, cycles=None):
+        """Poll every gauge until cancelled, or for a number of cycles each"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._poll_forever(target, cycles) for target in self.targets))
+
+    async def report(self, every):
+        """Print the hub and uploader metrics every few seconds"""
+        while True:
+            await asyncio.sleep(every)
+            metrics = self.uploader.snapshot()
+            print(f"📊 Hub {self.metrics['polls']} polls, {self.metrics['failures']} failed "
+                  f"({self.metrics['timeouts']} timeouts), {self.open_circuits()} circuits open, "
+                  f"max in flight {self.metrics['max_in_flight']}, slowest {self.metrics['max_poll_seconds']}s; "
+                  f"upload backlog {metrics['backlog']}, sent {metrics['sent']}")
+
+    async def poll(self, target):
+        """Poll one gauge and store its reading, returning the reading or None"""
+        breaker = self.breakers[target.store_name]
+        if not breaker.allow():
+            self.metrics['circuit_open'] += 1
+            return None
+
+        async with self._semaphore:
+            self.metrics['in_flight'] += 1
+            self.metrics['max_in_flight'] = max(self.metrics['max_in_flight'], self.metrics['in_flight'])
+            started = time.monotonic()
+
+            try:
+                raw_tanks = await asyncio.wait_for(read_tanks(target, self.connect_timeout), self.timeout)
+            except asyncio.TimeoutError:
+                self.metrics['timeouts'] += 1
+                self._failed(target, breaker, f"timed out after {self.timeout} seconds")
+                return None
+            except Exception as e:
+                self._failed(target, breaker, e)
+                return None
+            finally:
+                self.metrics['in_flight'] -= 1
+                elapsed = round(time.monotonic() - started, 3)
+                self.metrics['max_poll_seconds'] = max(self.metrics['max_poll_seconds'], elapsed)
+
+        breaker.success()
+        self.metrics['polls'] += 1
+
+        # Stored before uploading, so an outage or restart cannot lose it. The
+        # SQLite write runs on a worker thread so it never stalls the other polls.
+        reading = build_reading(target.store_name, raw_tanks)
+        self.uploader.submit(await asyncio.to_thread(self.outbox.append, reading))
+        return reading
+
+    async def _poll_forever(self, target, cycles):
+        scheduler = PollScheduler(self.interval, target.store_name, jitter=self.jitter)
+        polled = 0
+
+        while cycles is None or polled < cycles:
+            deadline, skipped = scheduler.advance()
+            self.metrics['missed'] += skipped
+            await asyncio.sleep(max(deadline - time.monotonic(), 0))
+
+            await self.poll(target)
+            polled += 1
+
+    def _failed(self, target, breaker, error):
+        self.metrics['failures'] += 1
+        print(f"❌ {target.store_name} ({target.ip}:{target.port}): {error}")
+
+        if breaker.failure():
+            print(f"⚡ {target.store_name}: circuit open for {breaker.reset_seconds} seconds")
+
+
+def hub_config(config):
+    """The collector config with the hub's defaults for batched uploads, which need central_batch_url"""
+    interval = config.get('poll_interval_seconds', 300)
+    return {
+        'upload_batch_size': 100,
+        'upload_max_age_seconds': interval,
+        'outbox_path': 'hub_outbox.db',
+        **config
+    }
+
+
+async def serve(config, targets, outbox, uploader, cycles=None):
+    """Run a hub over the targets, reporting metrics every poll interval"""
+    hub = Hub(config, targets, outbox, uploader)
+    reporter = asyncio.ensure_future(hub.report(config.get('hub_report_seconds', hub.interval)))
+    try:
+        await hub.run(cycles)
+    finally:
+        reporter.cancel()
+    return hub
+
+
+def load_test(gauges=200, dead=10, interval=10.0, cycles=3, concurrency=50, timeout=3.0):
+    """Poll a fleet of emulated gauges through the hub into the ingest stand-in and report what arrived"""
+    from ingest_server import make_server
+    from veeder_root_tls_socket_library.emulator import TlsEmulator
+
+    emulators = [TlsEmulator(tanks=4, split_chunks=0.1, stall=0.02, stall_seconds=timeout * 2,
+                             error_rate=0.02, seed=index).start() for index in range(gauges)]
+    targets = [Target(f"STORE {index + 1}", *emulator.address) for index, emulator in enumerate(emulators)]
+
+    # Dead sites, ports nothing is listening on once the emulator is stopped
+    for index in range(dead):
+        emulator = TlsEmulator()
+        targets.append(Target(f"DEAD {index + 1}", *emulator.address))
+        emulator.stop()
+
+    server = make_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/upload"
+
+    directory = tempfile.mkdtemp()
+    config = hub_config({
+        'central_api_url': url,
+        'central_batch_url': url,
+        'poll_interval_seconds': interval,
+        'poll_jitter_seconds': 0.0,
+        'hub_concurrency': concurrency,
+        'hub_timeout_seconds': timeout,
+        'hub_failure_threshold': 2,
+        'hub_report_seconds': 3600,
+        'upload_batch_size': 100,
+        'upload_retry_seconds': 1,
+        'outbox_path': os.path.join(directory, 'outbox.db')
+    })
+    outbox = open_outbox(config)
+    uploader = Uploader(config, outbox)
+    uploader.start()
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        hub = asyncio.run(serve(config, targets, outbox, uploader, cycles))
+
+        # Let the uploader send what is left over
+        config['upload_max_age_seconds'] = 0
+        uploader.submit(None)
+        deadline = time.monotonic() + 30
+        while len(outbox) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        uploader.stop()
+    elapsed = time.perf_counter() - started
+
+    stats = server.stats.snapshot()
+    print(f"{len(targets)} gauges ({dead} dead), {cycles} cycles of {interval} s, concurrency {concurrency}, "
+          f"timeout {timeout} s: {elapsed:.1f} s")
+    print(f"   Polls {hub.metrics['polls']}, failed {hub.metrics['failures']} ({hub.metrics['timeouts']} timeouts), "
+          f"skipped by open circuits {hub.metrics['circuit_open']}, missed deadlines {hub.metrics['missed']}")
+    print(f"   Max in flight {hub.metrics['max_in_flight']}, slowest poll {hub.metrics['max_poll_seconds']} s")
+    print(f"   Uploaded {stats['readings']} readings in {stats['requests']} requests, "
+          f"{stats['wire_bytes']:,} bytes on the wire, {len(outbox)} left in the outbox")
+
+    outbox.close()
+    server.shutdown()
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        list(executor.map(TlsEmulator.stop, emulators))
+
+
+def main():
+    """Main hub loop"""
+    config = hub_config(load_config())
+    check_upload_config(config)
+    targets = load_roster(config.get('hub_roster', 'roster.json'))
+
+    print("🚀 Starting Veeder Reader Hub")
+    print(f"   Gauges: {len(targets)}")
+    print(f"   Poll interval: {config.get('poll_interval_seconds', 300)} seconds")
+    print(f"   Central API: {config.get('central_batch_url', config['central_api_url'])}")
+
+    outbox = open_outbox(config)
+    uploader = Uploader(config, outbox)
+    uploader.start()
+
+    try:
+        asyncio.run(serve(config, targets, outbox, uploader))
+    except KeyboardInterrupt:
+        print("\n👋 Hub stopped by user")
+    finally:
+        uploader.stop()
+        outbox.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Poll every gauge on a roster from one process.")
+    parser.add_argument('--load-test', action='store_true',
+                        help="poll a fleet of emulated gauges into a local ingest stand-in, then exit")
+    parser.add_argument('--gauges', type=int, default=200)
+    parser.add_argument('--dead', type=int, default=10, help="roster entries with nothing listening")
+    parser.add_argument('--interval', type=float, default=10.0)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=3.0)
+    args = parser.parse_args()
+
+    if args.load_test:
+        load_test(args.gauges, args.dead, args.interval, args.cycles, args.concurrency, args.timeout)
+    else:
+        main()
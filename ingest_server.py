@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the central API upload endpoint, for measuring upload modes
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class IngestStats:
+    """Counts what the stand-in has received"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.readings = 0
+            self.wire_bytes = 0
+            self.json_bytes = 0
+
+    def add(self, readings, wire_bytes, json_bytes):
+        with self.lock:
+            self.requests += 1
+            self.readings += readings
+            self.wire_bytes += wire_bytes
+            self.json_bytes += json_bytes
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "readings": self.readings,
+                "wire_bytes": self.wire_bytes,
+                "json_bytes": self.json_bytes
+            }
+
+
+def make_server(host='127.0.0.1', port=0):
+    """Create an ingest server that accepts single readings and {"readings": [...]} batches"""
+    stats = IngestStats()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            encoding = self.headers.get('Content-Encoding', 'identity')
+
+            try:
+                if encoding == 'gzip':
+                    data = gzip.decompress(body)
+                elif encoding == 'deflate':
+                    data = zlib.decompress(body)
+                elif encoding == 'identity':
+                    data = body
+                else:
+                    self.send_error(415, f"Unsupported Content-Encoding: {encoding}")
+                    return
+                payload = json.loads(data)
+            except (OSError, zlib.error, ValueError) as e:
+                self.send_error(400, str(e))
+                return
+
+            readings = len(payload['readings']) if 'readings' in payload else 1
+            stats.add(readings, len(body), len(data))
+            self._reply({"status": "ok", "readings": readings})
+
+        def do_GET(self):
+            self._reply(stats.snapshot())
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.stats = stats
+    return server
+
+
+def sample_reading(store, index, tanks=4):
+    """A reading shaped like the ones collector.py uploads"""
+    rng = random.Random(index)
+    timestamp = datetime_string(index)
+    return {
+        "store_name": store,
+        "tanks": [{
+            'tank_id': tank,
+            'product': str(tank),
+            'volume': round(rng.uniform(1000, 9000), 5),
+            'tc_volume': round(rng.uniform(1000, 9000), 5),
+            'ullage': round(rng.uniform(1000, 9000), 5),
+            'height': round(rng.uniform(10, 90), 5),
+            'water': round(rng.uniform(0, 1), 5),
+            'temp': round(rng.uniform(55, 80), 5),
+            'capacity': 10000,
+            'timestamp': timestamp
+        } for tank in range(1, tanks + 1)],
+        "timestamp": timestamp
+    }
+
+
+def datetime_string(index):
+    """ISO timestamps five minutes apart, like a collector polling every 300 seconds"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(1767225600 + index * 300))
+
+
+def measure(readings=288, batch_size=48):
+    """Upload the same readings singly and in batches through collector.py and compare"""
+    import collector
+
+    server = make_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/upload"
+    samples = [sample_reading("STORE 1", index) for index in range(readings)]
+
+    modes = [("single", 1, None), ("batch", batch_size, None),
+             ("batch gzip", batch_size, 'gzip'), ("batch deflate", batch_size, 'deflate')]
+
+    for name, size, compression in modes:
+        server.stats.reset()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for start in range(0, readings, size):
+                chunk = samples[start:start + size]
+                if size == 1:
+                    collector.post(url, chunk[0])
+                else:
+                    collector.post(url, {"readings": chunk}, compression)
+        elapsed = time.perf_counter() - started
+
+        stats = server.stats.snapshot()
+        print(f"{name:>14}: {stats['requests']:4} requests  {stats['wire_bytes']:9,} bytes on the wire  "
+              f"{stats['wire_bytes'] / stats['readings']:7.1f} bytes/reading  {elapsed:6.2f} s")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stand-in for the central API upload endpoint.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--measure', action='store_true', help="compare single and batched uploads, then exit")
+    parser.add_argument('--readings', type=int, default=288, help="readings to upload when measuring")
+    parser.add_argument('--batch-size', type=int, default=48)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.readings, args.batch_size)
+    else:
+        server = make_server(args.host, args.port)
+        print(f"📥 Ingest stand-in listening on http://{args.host}:{args.port}/upload (GET for stats)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Store-and-forward outbox so readings survive upload failures and reboots
+"""
+import json
+import sqlite3
+import threading
+import time
+
+# How hard SQLite pushes each commit to the SD card, from fastest to safest.
+# With WAL, NORMAL only risks the last few commits on power loss, never corruption.
+SYNC_POLICIES = ("OFF", "NORMAL", "FULL")
+
+
+class Outbox:
+    """Readings waiting to be uploaded, kept in order in a WAL-mode SQLite database.
+
+    append() stores a reading, pending() returns the oldest ones and ack()
+    removes them once the server has them. Commits are batched: appends are
+    committed every commit_every rows or commit_interval seconds, whichever
+    comes first, and flush() commits immediately. Uploads see readings that
+    are not committed yet, so draining never forces a commit; readings not
+    yet committed are lost on a power cut. The outbox keeps at most
+    max_rows readings, evicting the oldest when it is full.
+    """
+
+    def __init__(self, path='outbox.db', sync='NORMAL', commit_every=1,
+                 commit_interval=0.0, max_rows=100000):
+        sync = sync.upper()
+        if sync not in SYNC_POLICIES:
+            raise ValueError(f"sync must be one of {', '.join(SYNC_POLICIES)}")
+        if commit_every < 1:
+            raise ValueError("commit_every must be at least 1")
+        if max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.max_rows = max_rows
+
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+        # Transactions are managed here, so autocommit is off and BEGIN is explicit.
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={sync}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "created REAL NOT NULL, "
+            "payload TEXT NOT NULL)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def append(self, payload):
+        """Stores a reading at the end of the outbox and returns its id"""
+        with self._lock:
+            if not self._db.in_transaction:
+                self._db.execute("BEGIN")
+
+            cursor = self._db.execute(
+                "INSERT INTO outbox (created, payload) VALUES (?, ?)",
+                (time.time(), json.dumps(payload, separators=(',', ':')))
+            )
+
+            # Over quota, the oldest readings make room for the newest.
+            self._db.execute(
+                "DELETE FROM outbox WHERE id <= ?",
+                (cursor.lastrowid - self.max_rows,)
+            )
+
+            self._uncommitted += 1
+            due = time.monotonic() - self._last_commit >= self.commit_interval
+            if self._uncommitted >= self.commit_every or (self.commit_interval and due):
+                self._commit()
+
+            return cursor.lastrowid
+
+    def pending(self, limit=100):
+        """Returns up to limit readings as (id, payload) pairs, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, last_id):
+        """Removes every reading up to and including last_id, once the server has them"""
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE id <= ?", (last_id,))
+
+    def drain(self, send, batch=100):
+        """Sends pending readings oldest first, one at a time, in batches of up to batch.
+
+        send(payload) returns True once the server has the reading. Draining
+        stops at the first reading it refuses or fails on, so order is kept.
+        The readings accepted from each batch are acknowledged together, one
+        DELETE rather than a commit per reading. Returns the number of
+        readings sent.
+        """
+        sent = 0
+
+        while True:
+            rows = self.pending(batch)
+            if not rows:
+                return sent
+
+            accepted = 0
+            try:
+                for _, payload in rows:
+                    if not send(payload):
+                        break
+                    accepted += 1
+            finally:
+                # Readings accepted before a failure are acknowledged all the same.
+                if accepted:
+                    self.ack(rows[accepted - 1][0])
+                    sent += accepted
+
+            if accepted < len(rows):
+                return sent
+
+    def drain_batches(self, send, batch_size=100):
+        """Sends pending readings oldest first in batches of up to batch_size.
+
+        send(payloads) returns True once the server has the whole batch, which
+        is then acknowledged. Draining stops at the first batch it refuses or
+        fails on. Returns the number of readings sent.
+        """
+        sent = 0
+
+        while True:
+            rows = self.pending(batch_size)
+            if not rows:
+                return sent
+
+            if not send([payload for _, payload in rows]):
+                return sent
+
+            self.ack(rows[-1][0])
+            sent += len(rows)
+
+    def oldest_age(self):
+        """Returns how many seconds the oldest pending reading has waited, 0 when empty"""
+        with self._lock:
+            created = self._db.execute("SELECT MIN(created) FROM outbox").fetchone()[0]
+
+        return 0.0 if created is None else max(time.time() - created, 0.0)
+
+    def flush(self):
+        """Commits every appended reading now"""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """Commits and closes the database"""
+        with self._lock:
+            self._commit()
+            self._db.close()
+
+    def _commit(self):
+        """Commits the open batch, if any. Callers hold the lock."""
+        if self._db.in_transaction:
+            self._db.execute("COMMIT")
+
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Drift-free poll scheduling, staggered across the fleet by store name
+"""
+import hashlib
+import math
+import random
+import time
+
+
+def store_phase(store_name, interval):
+    """A fixed offset into the poll interval for a store, the same on every boot"""
+    digest = hashlib.blake2b(store_name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 * interval
+
+
+class PollScheduler:
+    """Hands out poll deadlines on the monotonic clock, interval seconds apart.
+
+    Deadlines never drift with how long a poll takes, because each one is
+    computed from the first rather than from when the last poll finished.
+    Every store polls at its own phase within the interval, aligned to the
+    wall clock so stores that boot together still spread out, and each
+    deadline moves by up to jitter seconds either way without the moves
+    adding up. Deadlines that pass while a poll overruns are skipped
+    instead of run back to back.
+    """
+
+    def __init__(self, interval, store_name, jitter=0.0, clock=time.monotonic,
+                 wall_clock=time.time, sleep=time.sleep):
+        if interval <= 0:
+            raise ValueError("interval must be greater than zero")
+        if not 0 <= jitter < interval / 2:
+            raise ValueError("jitter must be at least zero and under half the interval")
+
+        self.interval = interval
+        self.jitter = jitter
+        self.phase = store_phase(store_name, interval)
+        self.clock = clock
+        self.sleep = sleep
+        self.skipped = 0
+
+        self._store_name = store_name
+
+        # The first deadline is the next wall clock time at this store's phase.
+        wait = (self.phase - wall_clock()) % interval
+        self._start = clock() + wait
+        self._cycle = 0
+
+    def next_deadline(self):
+        """The monotonic time of the next poll, jitter included"""
+        return self._start + self._cycle * self.interval + self._jitter(self._cycle)
+
+    def advance(self):
+        """Move on to the next deadline and return it with how many deadlines were skipped to get there"""
+        now = self.clock()
+        skipped = 0
+
+        # A deadline already behind us is dropped, along with any others an overrun covered.
+        if now > self.next_deadline():
+            behind = math.ceil((now - self._start) / self.interval)
+            skipped = max(behind - self._cycle, 0)
+            self._cycle = max(behind, self._cycle)
+
+        deadline = self.next_deadline()
+        self._cycle += 1
+        self.skipped += skipped
+
+        return deadline, skipped
+
+    def wait(self):
+        """Sleep until the next deadline and return how many deadlines were skipped to get there"""
+        deadline, skipped = self.advance()
+
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+
+        return skipped
+
+    def _jitter(self, cycle):
+        """The jitter of a cycle, seeded by store and cycle so it is the same every time it is asked for"""
+        if not self.jitter:
+            return 0.0
+
+        return random.Random(f"{self._store_name}-{cycle}").uniform(-self.jitter, self.jitter)
@@ -32,7 +32,7 @@ def test_lantronix_connection(ip):
     """Test connection - simple version"""
     try:
         from find_veeder_tls import get_tank_levels
-        tanks = get_tank_levels(ip)
+        tanks = get_tank_levels(ip, release=True)
         return {
             "success": True,
             "tanks": len(tanks),
@@ -0,0 +1,74 @@
+"""
+Runs AsyncTlsSocket against the emulator and checks the awaitable tls_3xx
+functions against the synchronous ones.
+"""
+import asyncio
+import unittest
+
+from tests.test_tls_3xx import CannedSocket, load_cases
+from veeder_root_tls_socket_library import tls_3xx, tls_3xx_async
+from veeder_root_tls_socket_library.async_socket import AsyncTlsSocket
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+
+
+class AsyncCannedSocket(CannedSocket):
+    """Answers every command with one response, when awaited"""
+
+    async def execute(self, command, **kwargs):
+        return CannedSocket.execute(self, command, **kwargs)
+
+
+class AsyncFunctionsTest(unittest.TestCase):
+
+    def test_match_the_sync_functions(self):
+        for case in load_cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                name = 'function_' + case['code']
+                sync = getattr(tls_3xx, name)(CannedSocket(case['response']), *case['args'])
+
+                tls = AsyncCannedSocket(case['response'])
+                report = asyncio.run(getattr(tls_3xx_async, name)(tls, *case['args']))
+
+                self.assertEqual(report, sync)
+                self.assertEqual(tls.command, case['command'])
+
+
+class AsyncTlsSocketTest(unittest.TestCase):
+
+    def test_reads_through_a_pause(self):
+        async def poll(address):
+            async with await AsyncTlsSocket.connect(*address) as tls:
+                return await tls_3xx_async.function_201(tls, "00")
+
+        with TlsEmulator(stall=1.0, stall_seconds=1.3) as emulator:
+            self.assertEqual(len(asyncio.run(poll(emulator.address))['tanks']), 4)
+
+    def test_deadline_closes_the_connection(self):
+        async def poll(address):
+            tls = await AsyncTlsSocket.connect(*address)
+
+            with self.assertRaises(TimeoutError):
+                await tls.execute("i20100", retries=1, timeout=0.5)
+
+            # Closed and waited for, so the transport is not left to the garbage collector.
+            self.assertEqual(tls.writer.get_extra_info('socket').fileno(), -1)
+
+        with TlsEmulator(stall=1.0, stall_seconds=1.0) as emulator:
+            asyncio.run(poll(emulator.address))
+
+    def test_late_response_is_rejected(self):
+        async def poll(address):
+            tls = await AsyncTlsSocket.connect(*address)
+            tls.writer.write(b"\x01i10100\r\n")
+            await asyncio.sleep(0.2)
+
+            with self.assertRaisesRegex(ValueError, "does not match"):
+                await tls.execute("i20100")
+            self.assertTrue(tls.writer.is_closing())
+
+        with TlsEmulator() as emulator:
+            asyncio.run(poll(emulator.address))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Checks the checksums on computer format frames, including messages whose
+bytes add up to a multiple of 0x10000.
+"""
+import random
+import unittest
+
+from veeder_root_tls_socket_library import checksum
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+from veeder_root_tls_socket_library.socket import TlsSocket
+
+
+def framed(message):
+    """The frame the TLS system would send for a message ending in &&"""
+    return message + f"{checksum.checksum(message):04X}".encode() + b"\x03"
+
+
+class ChecksumTest(unittest.TestCase):
+
+    def test_frames_verify(self):
+        generator = random.Random(1)
+
+        for _ in range(200):
+            message = b"\x01i20100" + bytes(generator.randrange(32, 127) for _ in range(60)) + b"&&"
+            frame = framed(message)
+
+            self.assertEqual(len(frame), len(message) + 5)
+            self.assertTrue(checksum.verify(frame))
+
+    def test_zero_sum_message(self):
+        # 0x80 * 511 + "4" + "&&" adds up to exactly 0x10000.
+        message = b"4" + b"\x80" * 511 + b"&&"
+
+        self.assertEqual(checksum.checksum(message), 0)
+        self.assertTrue(checksum.verify(message + b"0000\x03"))
+        self.assertFalse(checksum.verify(message + b"10000\x03"))
+
+    def test_damaged_frames_fail(self):
+        frame = framed(b"\x01i20100260314092601&&")
+
+        self.assertFalse(checksum.verify(frame[:8] + b"2" + frame[9:]))
+        self.assertFalse(checksum.verify(frame[:-5] + b"ZZZZ\x03"))
+        self.assertFalse(checksum.verify(frame.replace(b"&&", b"&?")))
+        self.assertFalse(checksum.verify(b"\x03"))
+        self.assertEqual(checksum.verify_many([frame, frame[1:]]), [True, False])
+
+    def test_transport_rejects_bad_checksums(self):
+        with TlsEmulator(corrupt_checksum=1.0) as emulator, TlsSocket(*emulator.address) as tls:
+            with self.assertRaisesRegex(ValueError, "checksum"):
+                tls.execute("i20100")
+
+
+if __name__ == '__main__':
+    unittest.main()
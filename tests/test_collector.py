@@ -0,0 +1,111 @@
+"""
+Runs the background Uploader against a real outbox with the upload to the
+central API replaced: the bounded queue, retries, metrics and the last drain
+on shutdown.
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import collector
+from outbox import Outbox
+
+
+def wait_for(condition, timeout=5):
+    """Polls condition until it holds, failing the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class FakeUpload:
+    """Refuses the first failures uploads and accepts the rest, remembering what it accepted"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.accepted = []
+
+    def __call__(self, config, payload, session=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return False
+        self.accepted.append(payload)
+        return True
+
+
+class UploaderTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.outbox = Outbox(os.path.join(directory.name, 'outbox.db'))
+        self.addCleanup(self.outbox.close)
+
+    def start(self, upload, **config):
+        patcher = mock.patch.object(collector, 'upload', upload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        uploader = collector.Uploader(config, self.outbox)
+        uploader.start()
+        self.addCleanup(uploader.stop, 1)
+        return uploader
+
+    def test_full_queue_never_blocks(self):
+        uploader = collector.Uploader({'upload_queue_size': 2}, self.outbox)
+        self.addCleanup(uploader.session.close)
+
+        for row_id in range(3):
+            uploader.submit(row_id)
+
+        metrics = uploader.snapshot()
+        self.assertEqual((metrics['queued'], metrics['queue_full']), (2, 1))
+        self.assertEqual((metrics['max_queue_depth'], metrics['queue_depth']), (2, 2))
+
+    def test_submitted_readings_are_uploaded_in_order(self):
+        upload = FakeUpload()
+        uploader = self.start(upload)
+
+        for number in range(3):
+            uploader.submit(self.outbox.append({'reading': number}))
+
+        wait_for(lambda: uploader.snapshot()['sent'] == 3)
+        self.assertEqual(upload.accepted, [{'reading': number} for number in range(3)])
+
+        metrics = uploader.snapshot()
+        self.assertEqual((metrics['backlog'], metrics['queue_depth']), (0, 0))
+        self.assertGreaterEqual(metrics['drains'], 1)
+        self.assertGreaterEqual(metrics['last_drain_seconds'], 0.0)
+
+    def test_refused_readings_are_retried(self):
+        upload = FakeUpload(failures=2)
+        uploader = self.start(upload, upload_retry_seconds=0.05)
+
+        uploader.submit(self.outbox.append({'reading': 0}))
+
+        wait_for(lambda: uploader.snapshot()['sent'] == 1)
+        self.assertEqual(upload.calls, 3)
+        self.assertGreaterEqual(uploader.snapshot()['drains'], 3)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_stop_drains_the_outbox_once_more(self):
+        upload = FakeUpload()
+        uploader = self.start(upload, upload_retry_seconds=60)
+
+        # Readings whose wakeup was dropped by a full queue are only sent by the last drain.
+        for number in range(3):
+            self.outbox.append({'reading': number})
+        uploader.stop(5)
+
+        self.assertFalse(uploader.is_alive())
+        self.assertEqual(len(upload.accepted), 3)
+        self.assertEqual(len(self.outbox), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Checks that encoding a report and parsing it again gives the same report.
+"""
+import unittest
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.benchmark import CODES, synthetic_response
+from veeder_root_tls_socket_library.encode import encode_frame, encode_response, frame
+from veeder_root_tls_socket_library.socket import TlsFraming
+from tests.test_tls_3xx import load_cases
+
+
+def parser(code):
+    return getattr(tls_3xx, '_parse_' + code)
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def test_fixture_reports_round_trip(self):
+        for case in load_cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                report = parser(case['code'])(case['response'])
+                self.assertEqual(parser(case['code'])(encode_response(case['code'], report)), report)
+
+    def test_synthetic_reports_round_trip(self):
+        for code in CODES:
+            for records in (1, 30):
+                with self.subTest(code=code, records=records):
+                    report = parser(code)(synthetic_response(code, records))
+                    self.assertEqual(parser(code)(encode_response(code, report)), report)
+
+    def test_frames_pass_the_transport_checks(self):
+        framing = TlsFraming()
+
+        for case in load_cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                report = parser(case['code'])(case['response'])
+                byte_command = b"\x01" + case['command'].encode() + b"\r\n"
+                encoded = encode_frame(case['code'], report, case['command'])
+
+                framing._check_echo(encoded, byte_command)
+                response = framing._handle_response(encoded, byte_command, False)
+                self.assertEqual(parser(case['code'])(response), report)
+
+    def test_corrupted_frame_fails_the_checksum(self):
+        encoded = bytearray(frame("i20100", "2603140926"))
+        encoded[8] ^= 1
+
+        with self.assertRaises(ValueError):
+            TlsFraming()._handle_response(bytes(encoded), b"", False)
+
+    def test_unknown_code_has_no_encoder(self):
+        with self.assertRaises(ValueError):
+            encode_response("999", {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Reads tank levels from the emulator the way the collector does.
+"""
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import find_veeder_tls
+from find_veeder_tls import get_tank_levels, parse_tank_response
+from tests.test_pool import free_port
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+from veeder_root_tls_socket_library.pool import TlsSocketPool
+from veeder_root_tls_socket_library.socket import TlsSocket
+
+
+def read(*args, **kwargs):
+    """get_tank_levels without its progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return get_tank_levels(*args, **kwargs)
+
+
+class GetTankLevelsTest(unittest.TestCase):
+
+    def setUp(self):
+        find_veeder_tls.product_labels.clear()
+
+    def test_connection_is_kept_between_polls(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            self.assertEqual(len(read(*emulator.address, pool=pool)), 4)
+            self.assertIn(emulator.address, pool._sockets)
+
+    def test_release_after_poll(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            self.assertEqual(len(read(*emulator.address, pool=pool, release=True)), 4)
+            self.assertEqual(pool._sockets, {})
+
+    def test_tanks_match_the_display_format(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            tanks = read(*emulator.address, pool=pool)
+
+            with pool.connection(*emulator.address) as tls:
+                display = [parse_tank_response(tls.execute(f"I201{tank['id']:02}")) for tank in tanks]
+
+        for tank, shown in zip(tanks, display):
+            self.assertEqual([type(tank[key]) for key in shown], [type(value) for value in shown.values()])
+            self.assertEqual((tank['id'], tank['product'], tank['volume']), (shown['id'], shown['product'], shown['volume']))
+
+    def test_labels_are_looked_up_once(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            read(*emulator.address, pool=pool)
+
+            with mock.patch.object(TlsSocket, 'execute', autospec=True, side_effect=TlsSocket.execute) as execute:
+                tanks = read(*emulator.address, pool=pool)
+
+        self.assertEqual([call.args[1] for call in execute.call_args_list], ["i20100"])
+        self.assertEqual({tank['product'] for tank in tanks}, {"UNLEADED", "PLUS", "PREMIUM", "DIESEL"})
+
+    def test_unreachable_gauge_raises(self):
+        with TlsSocketPool(connect_timeout=1) as pool:
+            with self.assertRaises(ConnectionError):
+                read('127.0.0.1', free_port(), pool=pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
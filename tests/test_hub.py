@@ -0,0 +1,187 @@
+"""
+Runs the hub against emulated gauges: the circuit breaker on a fake clock,
+the bound on polls in flight, storing readings off the event loop and
+loading the roster.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import find_veeder_tls
+from hub import CircuitBreaker, Hub, Target, load_roster
+from outbox import Outbox
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+
+
+class FakeClock:
+    """A clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeUploader:
+    """Remembers the row ids it is woken for"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, row_id):
+        self.submitted.append(row_id)
+
+
+def run(hub, cycles):
+    """Runs the hub for a number of cycles per gauge, without its output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(hub.run(cycles))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_seconds=600, clock=self.clock)
+
+    def open(self):
+        """Fails the breaker until it opens"""
+        while not self.breaker.failure():
+            pass
+
+    def test_opens_after_failures_in_a_row(self):
+        self.assertFalse(self.breaker.failure())
+        self.assertFalse(self.breaker.failure())
+        self.assertEqual(self.breaker.state, 'closed')
+
+        self.assertTrue(self.breaker.failure())
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.breaker.success()
+
+        self.assertFalse(self.breaker.failure())
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_after_the_cooldown(self):
+        self.open()
+
+        self.clock.now = 599
+        self.assertEqual(self.breaker.state, 'open')
+        self.clock.now = 600
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertTrue(self.breaker.allow())
+
+    def test_trial_success_closes_the_circuit(self):
+        self.open()
+        self.clock.now = 600
+
+        self.breaker.success()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_trial_failure_reopens_the_circuit(self):
+        self.open()
+        self.clock.now = 600
+
+        self.assertTrue(self.breaker.failure())
+        self.assertEqual(self.breaker.state, 'open')
+        self.clock.now = 1199
+        self.assertFalse(self.breaker.allow())
+
+
+class HubTest(unittest.TestCase):
+
+    def setUp(self):
+        find_veeder_tls.product_labels.clear()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.outbox = Outbox(os.path.join(directory.name, 'outbox.db'))
+        self.addCleanup(self.outbox.close)
+        self.uploader = FakeUploader()
+
+    def hub(self, targets, **config):
+        return Hub({'poll_interval_seconds': 0.05, 'poll_jitter_seconds': 0.0, **config},
+                   targets, self.outbox, self.uploader)
+
+    def test_polls_in_flight_stay_within_the_concurrency(self):
+        emulators = [TlsEmulator(stall=1.0, stall_seconds=0.2, seed=index).start() for index in range(6)]
+        for emulator in emulators:
+            self.addCleanup(emulator.stop)
+        targets = [Target(f"STORE {index + 1}", *emulator.address) for index, emulator in enumerate(emulators)]
+
+        hub = self.hub(targets, hub_concurrency=2)
+        run(hub, cycles=1)
+
+        self.assertEqual((hub.metrics['polls'], hub.metrics['failures']), (6, 0))
+        self.assertEqual(hub.metrics['max_in_flight'], 2)
+        self.assertEqual(hub.metrics['in_flight'], 0)
+        self.assertEqual(len(self.outbox), 6)
+        self.assertEqual(len(self.uploader.submitted), 6)
+
+    def test_readings_are_stored_off_the_event_loop(self):
+        threads = []
+        append = self.outbox.append
+
+        def recording_append(payload):
+            threads.append(threading.current_thread())
+            return append(payload)
+
+        self.outbox.append = recording_append
+
+        with TlsEmulator() as emulator:
+            run(self.hub([Target("STORE 1", *emulator.address)]), cycles=1)
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertEqual(self.outbox.pending()[0][1]['store_name'], "STORE 1")
+
+    def test_dead_gauge_opens_its_circuit(self):
+        emulator = TlsEmulator()
+        target = Target("DEAD 1", *emulator.address)
+        emulator.stop()
+
+        hub = self.hub([target], hub_failure_threshold=1)
+        run(hub, cycles=2)
+
+        self.assertEqual((hub.metrics['failures'], hub.metrics['circuit_open']), (1, 1))
+        self.assertEqual(hub.open_circuits(), 1)
+        self.assertEqual(len(self.outbox), 0)
+
+
+class RosterTest(unittest.TestCase):
+
+    def write(self, entries):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'roster.json')
+        with open(path, 'w') as f:
+            json.dump(entries, f)
+        return path
+
+    def test_ports_default_to_the_lantronix_port(self):
+        path = self.write([{'store_name': 'STORE 1', 'ip': '10.0.0.1'},
+                           {'store_name': 'STORE 2', 'ip': '10.0.0.2', 'port': 10002}])
+
+        self.assertEqual(load_roster(path), [Target('STORE 1', '10.0.0.1', 10001),
+                                             Target('STORE 2', '10.0.0.2', 10002)])
+
+    def test_store_names_must_be_unique(self):
+        path = self.write([{'store_name': 'STORE 1', 'ip': '10.0.0.1'},
+                           {'store_name': 'STORE 1', 'ip': '10.0.0.2'}])
+
+        with self.assertRaisesRegex(ValueError, "unique"):
+            load_roster(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
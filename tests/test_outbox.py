@@ -0,0 +1,124 @@
+"""
+Runs the outbox against a real SQLite database in a temporary directory:
+ordering, the quota, commit batching, draining and reopening after a crash.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from outbox import Outbox
+
+
+def committed(path):
+    """The payload count another connection sees, which only includes committed readings"""
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+def count_deletes(outbox):
+    """Records every DELETE the outbox runs, returning the list they are added to"""
+    deletes = []
+
+    def trace(statement):
+        if statement.startswith("DELETE"):
+            deletes.append(statement)
+
+    outbox._db.set_trace_callback(trace)
+    return deletes
+
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'outbox.db')
+
+    def open(self, **kwargs):
+        outbox = Outbox(self.path, **kwargs)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_append_keeps_readings_in_order(self):
+        outbox = self.open()
+        ids = [outbox.append({'reading': number}) for number in range(5)]
+
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(outbox), 5)
+        self.assertEqual(outbox.pending(3), [(ids[number], {'reading': number}) for number in range(3)])
+
+    def test_oldest_readings_are_evicted_over_quota(self):
+        outbox = self.open(max_rows=3)
+        for number in range(5):
+            outbox.append({'reading': number})
+
+        self.assertEqual([payload['reading'] for _, payload in outbox.pending()], [2, 3, 4])
+
+    def test_appends_are_committed_in_batches(self):
+        outbox = self.open(commit_every=3)
+        outbox.append({'reading': 0})
+        outbox.append({'reading': 1})
+
+        self.assertEqual(committed(self.path), 0)
+        self.assertEqual(len(outbox), 2)
+
+        outbox.append({'reading': 2})
+        self.assertEqual(committed(self.path), 3)
+
+        outbox.append({'reading': 3})
+        outbox.flush()
+        self.assertEqual(committed(self.path), 4)
+
+    def test_drain_acknowledges_each_batch_once(self):
+        outbox = self.open()
+        for number in range(5):
+            outbox.append({'reading': number})
+
+        deletes = count_deletes(outbox)
+        received = []
+
+        self.assertEqual(outbox.drain(lambda payload: received.append(payload) or True, batch=2), 5)
+        self.assertEqual([payload['reading'] for payload in received], [0, 1, 2, 3, 4])
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(committed(self.path), 0)
+
+    def test_drain_stops_at_the_first_refusal(self):
+        outbox = self.open()
+        for number in range(5):
+            outbox.append({'reading': number})
+
+        self.assertEqual(outbox.drain(lambda payload: payload['reading'] < 2), 2)
+        self.assertEqual([payload['reading'] for _, payload in outbox.pending()], [2, 3, 4])
+
+    def test_drain_acknowledges_readings_sent_before_a_failure(self):
+        outbox = self.open()
+        for number in range(3):
+            outbox.append({'reading': number})
+
+        def send(payload):
+            if payload['reading'] == 1:
+                raise ConnectionError("server went away")
+            return True
+
+        with self.assertRaises(ConnectionError):
+            outbox.drain(send)
+        self.assertEqual([payload['reading'] for _, payload in outbox.pending()], [1, 2])
+
+    def test_reopening_after_a_crash_keeps_committed_readings(self):
+        outbox = Outbox(self.path, commit_every=2)
+        for number in range(4):
+            outbox.append({'reading': number})
+        outbox.drain(lambda payload: payload['reading'] < 1)
+        outbox.append({'reading': 4})
+
+        # Closing the connection without committing rolls back like a power cut.
+        outbox._db.close()
+
+        with Outbox(self.path) as reopened:
+            self.assertEqual([payload['reading'] for _, payload in reopened.pending()], [1, 2, 3])
+            self.assertGreater(reopened.append({'reading': 5}), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Checks when the connection pool reconnects and when it gives up.
+"""
+import socket
+import unittest
+from unittest import mock
+
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+from veeder_root_tls_socket_library.pool import TlsSocketPool
+from veeder_root_tls_socket_library.socket import TlsSocket
+from veeder_root_tls_socket_library.tls_3xx import _parse_201
+
+
+def free_port():
+    """A local port nothing is listening on"""
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        return listener.getsockname()[1]
+
+
+def count_connects():
+    """Patches TlsSocket so the connects it makes can be counted"""
+    return mock.patch.object(TlsSocket, '_connect', autospec=True, side_effect=TlsSocket._connect)
+
+
+class TlsSocketPoolTest(unittest.TestCase):
+
+    def test_connection_is_kept_between_commands(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool, count_connects() as connect:
+            pool.execute(*emulator.address, "i20100")
+            pool.execute(*emulator.address, "i10100")
+        self.assertEqual(connect.call_count, 1)
+
+    def test_refused_connection(self):
+        with TlsSocketPool(connect_timeout=1) as pool, count_connects() as connect:
+            with self.assertRaises(ConnectionError):
+                pool.execute('127.0.0.1', free_port(), "i20100")
+        self.assertEqual(connect.call_count, 1)
+
+    def test_dropped_pooled_connection_is_replaced(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            pool.execute(*emulator.address, "i20100")
+            pool._sockets[emulator.address].socket.shutdown(socket.SHUT_RDWR)
+
+            with count_connects() as connect:
+                self.assertEqual(len(_parse_201(pool.execute(*emulator.address, "i20100"))['tanks']), 4)
+            self.assertEqual(connect.call_count, 1)
+
+    def test_connection_dropped_mid_command_is_retried_once(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            pool.execute(*emulator.address, "i20100")
+            pool._sockets[emulator.address].socket.shutdown(socket.SHUT_RDWR)
+
+            # The probe misses the drop, so it only shows when the command is sent.
+            with mock.patch.object(TlsSocket, 'is_alive', return_value=True), count_connects() as connect:
+                self.assertEqual(len(_parse_201(pool.execute(*emulator.address, "i20100"))['tanks']), 4)
+            self.assertEqual(connect.call_count, 1)
+
+    def test_timeout_is_not_retried(self):
+        with TlsEmulator(stall=1.0, stall_seconds=1.0) as emulator, TlsSocketPool() as pool:
+            pool.execute(*emulator.address, "i20100")
+
+            with count_connects() as connect:
+                with self.assertRaises(TimeoutError):
+                    pool.execute(*emulator.address, "i20100", retries=1, timeout=0.5)
+            self.assertEqual(connect.call_count, 0)
+            self.assertEqual(pool._sockets, {})
+
+    def test_release_frees_the_endpoint(self):
+        with TlsEmulator() as emulator, TlsSocketPool() as pool:
+            pool.execute(*emulator.address, "i20100")
+            pool.release(*emulator.address)
+            self.assertEqual(pool._sockets, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Checks the registry entries and the TtlCache against a fake clock.
+"""
+import unittest
+
+from veeder_root_tls_socket_library import registry, tls_3xx
+from veeder_root_tls_socket_library.registry import TtlCache
+
+
+class FakeClock:
+    """A clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_every_function_has_an_entry(self):
+        self.assertEqual(sorted(registry.COMMANDS), sorted(tls_3xx.PARSERS))
+
+    def test_command_accepts_a_full_command(self):
+        self.assertIs(registry.command("i20100"), registry.COMMANDS["201"])
+        with self.assertRaisesRegex(ValueError, "not implemented"):
+            registry.command("999")
+
+
+class TtlCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TtlCache(self.clock, maxsize=3)
+
+    def test_response_is_kept_until_its_ttl_runs_out(self):
+        self.cache.put(('gauge', 10001), "i11300", "113 response")
+
+        self.clock.now = 299
+        self.assertEqual(self.cache.get(('gauge', 10001), "i11300"), "113 response")
+        self.clock.now = 300
+        self.assertIsNone(self.cache.get(('gauge', 10001), "i11300"))
+
+    def test_volatile_and_display_commands_are_not_kept(self):
+        self.cache.put(('gauge', 10001), "i20100", "201 response")
+        self.cache.put(('gauge', 10001), "I11300", "113 display")
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_put_drops_expired_responses(self):
+        for port in range(2):
+            self.cache.put(('gauge', port), "i11300", "113 response")
+
+        self.clock.now = 300
+        self.cache.put(('gauge', 2), "i10200", "102 response")
+
+        self.assertEqual(len(self.cache), 1)
+
+    def test_least_recently_used_is_dropped_at_maxsize(self):
+        for port in range(3):
+            self.cache.put(('gauge', port), "i10200", "102 response")
+
+        self.cache.get(('gauge', 0), "i10200")
+        self.cache.put(('gauge', 3), "i10200", "102 response")
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get(('gauge', 1), "i10200"))
+        self.assertEqual(self.cache.get(('gauge', 0), "i10200"), "102 response")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Drives PollScheduler with a fake clock: phases spread across the fleet,
+seeded jitter, deadlines that do not drift and missed deadlines skipped.
+"""
+import unittest
+
+from scheduler import PollScheduler, store_phase
+
+INTERVAL = 300
+
+
+class FakeClock:
+    """Monotonic and wall clocks that only move when slept on or told to"""
+
+    def __init__(self, monotonic=0.0, wall=0.0):
+        self.now = monotonic
+        self.wall_offset = wall - monotonic
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def wall(self):
+        return self.now + self.wall_offset
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def scheduler(store_name='Store 1', jitter=0.0, clock=None):
+    """A scheduler polling every INTERVAL seconds on a fake clock"""
+    clock = clock or FakeClock()
+    return PollScheduler(INTERVAL, store_name, jitter=jitter, clock=clock,
+                         wall_clock=clock.wall, sleep=clock.sleep)
+
+
+class PhaseTest(unittest.TestCase):
+
+    def test_phase_is_stable_per_store(self):
+        self.assertEqual(store_phase('Store 1', INTERVAL), store_phase('Store 1', INTERVAL))
+        self.assertNotEqual(store_phase('Store 1', INTERVAL), store_phase('Store 2', INTERVAL))
+
+    def test_phases_spread_across_the_interval(self):
+        phases = [store_phase(f'Store {number}', INTERVAL) for number in range(200)]
+
+        self.assertTrue(all(0 <= phase < INTERVAL for phase in phases))
+        # Every tenth of the interval gets some of the fleet, none gets most of it.
+        buckets = [sum(1 for phase in phases if tenth * 30 <= phase < (tenth + 1) * 30) for tenth in range(10)]
+        self.assertGreater(min(buckets), 0)
+        self.assertLess(max(buckets), 50)
+
+    def test_stores_booting_together_poll_at_their_own_phase(self):
+        for store_name in ('Store 1', 'Store 2', 'Store 3'):
+            for boot in (0.0, 1234.5):
+                clock = FakeClock(monotonic=boot, wall=1_700_000_000.0 + boot)
+                first = scheduler(store_name, clock=clock).next_deadline()
+
+                self.assertGreaterEqual(first, clock.now)
+                self.assertAlmostEqual((first + clock.wall_offset) % INTERVAL, store_phase(store_name, INTERVAL), places=4)
+
+
+class JitterTest(unittest.TestCase):
+
+    def deadlines(self, store_name, cycles=20):
+        poller = scheduler(store_name, jitter=5.0)
+        return [poller.advance()[0] - poller._start - cycle * INTERVAL for cycle in range(cycles)]
+
+    def test_jitter_is_seeded_by_store_and_cycle(self):
+        jitters = self.deadlines('Store 1')
+
+        self.assertEqual(jitters, self.deadlines('Store 1'))
+        self.assertNotEqual(jitters, self.deadlines('Store 2'))
+        self.assertEqual(len(set(jitters)), len(jitters))
+        self.assertTrue(all(-5.0 <= jitter <= 5.0 for jitter in jitters))
+
+    def test_jitter_does_not_add_up(self):
+        clock = FakeClock()
+        poller = scheduler(jitter=5.0, clock=clock)
+
+        for _ in range(50):
+            poller.wait()
+
+        self.assertLessEqual(abs(clock.now - poller._start - 49 * INTERVAL), 5.0)
+
+    def test_jitter_must_stay_under_half_the_interval(self):
+        with self.assertRaises(ValueError):
+            scheduler(jitter=INTERVAL / 2)
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_slow_polls_do_not_drift(self):
+        clock = FakeClock()
+        poller = scheduler(clock=clock)
+
+        for cycle in range(10):
+            self.assertEqual(poller.wait(), 0)
+            self.assertAlmostEqual(clock.now, poller._start + cycle * INTERVAL)
+            clock.now += 7.0
+
+    def test_missed_deadlines_are_skipped(self):
+        clock = FakeClock()
+        poller = scheduler(clock=clock)
+        poller.wait()
+
+        # The poll overruns the next two deadlines.
+        clock.now += 2.5 * INTERVAL
+        self.assertEqual(poller.wait(), 2)
+        self.assertAlmostEqual(clock.now, poller._start + 3 * INTERVAL)
+        self.assertAlmostEqual(clock.sleeps[-1], 0.5 * INTERVAL)
+
+        self.assertEqual(poller.wait(), 0)
+        self.assertAlmostEqual(clock.now, poller._start + 4 * INTERVAL)
+        self.assertEqual(poller.skipped, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
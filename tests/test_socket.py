@@ -0,0 +1,105 @@
+"""
+Runs the transports against the emulator and its faults: stalled and
+rejected responses, late responses and dropped connections.
+"""
+import socket
+import threading
+import time
+import unittest
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+from veeder_root_tls_socket_library.socket import TlsSocket
+
+
+def one_shot_server(reply):
+    """Serves one connection that answers with reply and hangs up, returning its address"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+
+    def serve():
+        connection, _ = listener.accept()
+        with connection:
+            connection.recv(1200)
+            connection.sendall(reply)
+            time.sleep(0.5)
+        listener.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()
+
+
+class TlsSocketTest(unittest.TestCase):
+
+    def test_returns_as_soon_as_etx_arrives(self):
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            started = time.monotonic()
+            report = tls_3xx.function_201(tls, "00")
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertEqual(len(report['tanks']), 4)
+
+    def test_bytes_after_etx_are_dropped(self):
+        with TlsSocket(*one_shot_server(b"\x01I10100\r\n\r\nNO ALARMS\r\n\r\n\x03\x01junk")) as tls:
+            started = time.monotonic()
+            self.assertEqual(tls.execute("I10100"), "I10100\r\n\r\nNO ALARMS")
+            self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_generic_error_is_rejected_and_keeps_the_connection(self):
+        with TlsEmulator(error_rate=1.0) as emulator, TlsSocket(*emulator.address) as tls:
+            with self.assertRaisesRegex(ValueError, "Unsupported"):
+                tls.execute("i20100")
+            self.assertTrue(tls.is_alive())
+
+    def test_pause_shorter_than_the_deadline_is_waited_out(self):
+        with TlsEmulator(stall=1.0, stall_seconds=1.3) as emulator, TlsSocket(*emulator.address) as tls:
+            self.assertEqual(len(tls_3xx.function_201(tls, "00")['tanks']), 4)
+            self.assertEqual(tls_3xx.function_101(tls, "00")['alarms'], [])
+
+    def test_deadline_closes_the_connection(self):
+        with TlsEmulator(stall=1.0, stall_seconds=1.0) as emulator, TlsSocket(*emulator.address) as tls:
+            with self.assertRaises(TimeoutError):
+                tls.execute("i20100", retries=1, timeout=0.5)
+            self.assertFalse(tls.is_alive())
+
+    def test_late_response_is_not_taken_for_the_next_one(self):
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            tls.socket.sendall(b"\x01i10100\r\n")
+            time.sleep(0.2)
+
+            with self.assertRaisesRegex(ValueError, "does not match"):
+                tls.execute("i20100")
+            self.assertFalse(tls.is_alive())
+
+    def test_hang_up_mid_response(self):
+        with TlsSocket(*one_shot_server(b"\x01i201002603")) as tls:
+            with self.assertRaises(ConnectionError):
+                tls.execute("i20100")
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_pipelined_commands_match_single_commands(self):
+        commands = ["i20100", "i10100", "i20200", "i11300"]
+
+        with TlsEmulator(split_chunks=0.5) as emulator, TlsSocket(*emulator.address) as tls:
+            pipelined = [response[10:] for response in tls.execute_many(commands)]
+            single = [tls.execute(command)[10:] for command in commands]
+            self.assertTrue(tls.pipelining)
+            self.assertEqual(pipelined, single)
+
+    def test_rejected_command_falls_back_to_single_commands(self):
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            with self.assertRaisesRegex(ValueError, "Unsupported"):
+                tls.execute_many(["i20100", "i99900"])
+            self.assertTrue(tls.pipelining)
+
+    def test_hang_up_mid_pipeline_closes_the_connection(self):
+        with TlsSocket(*one_shot_server(b"\x01i201002603140926&&FB43\x03\x01i1010")) as tls:
+            with self.assertRaises(ConnectionError):
+                tls.execute_many(["i20100", "i10100"])
+            self.assertEqual(tls.socket.fileno(), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
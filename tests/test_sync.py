@@ -0,0 +1,54 @@
+"""
+Runs HistorySync against the emulator, with several stores keeping their
+watermarks in one file.
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+from veeder_root_tls_socket_library.emulator import TlsEmulator
+from veeder_root_tls_socket_library.socket import TlsSocket
+from veeder_root_tls_socket_library.sync import HistorySync
+
+
+class HistorySyncTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'watermarks.json')
+
+    def test_synced_records_are_not_returned_again(self):
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            history = HistorySync(self.path, 'store-1')
+            self.assertTrue(history.sync(tls, '207'))
+            history.commit()
+
+            self.assertEqual(HistorySync(self.path, 'store-1').sync(tls, '207'), [])
+
+    def test_uncommitted_records_are_returned_again(self):
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            records = HistorySync(self.path, 'store-1').sync(tls, '207')
+
+            self.assertEqual(HistorySync(self.path, 'store-1').sync(tls, '207'), records)
+
+    def test_stores_sharing_a_file_keep_each_others_watermarks(self):
+        stores = [HistorySync(self.path, f'store-{number}') for number in range(4)]
+
+        with TlsEmulator() as emulator, TlsSocket(*emulator.address) as tls:
+            for history in stores:
+                history.sync(tls, '207')
+
+            threads = [threading.Thread(target=history.commit) for history in stores]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for number in range(4):
+                self.assertEqual(HistorySync(self.path, f'store-{number}').sync(tls, '207'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
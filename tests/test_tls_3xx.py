@@ -0,0 +1,188 @@
+"""
+Checks the tls_3xx parsers against the reports the hand-written parsers
+returned before they were compiled from layouts, and every result mode
+against the dict mode.
+
+fixtures/baseline_reports.json holds, for every function, a canned response
+and one from the emulator, the command each function sent and the report
+the original parsers returned for it.
+"""
+import json
+import os
+import unittest
+
+from veeder_root_tls_socket_library import columnar, tls_3xx
+from veeder_root_tls_socket_library.cache import ResponseCache
+from veeder_root_tls_socket_library.layout import Field, Layout, Records, TIMESTAMP, compile_layout
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_cases():
+    with open(os.path.join(FIXTURES, 'baseline_reports.json'), 'r') as f:
+        return json.load(f)
+
+
+def as_json(report):
+    """The report as the fixture stores it, tuples as lists and keys as strings"""
+    return json.loads(json.dumps(report))
+
+
+class CannedSocket:
+    """Answers every command with one response and remembers the command"""
+
+    def __init__(self, response):
+        self.response = response
+        self.command = None
+
+    def execute(self, command, **kwargs):
+        self.command = command
+        return self.response
+
+
+def rows(body, records):
+    """Flattens the records of a dict mode report the way the columnar mode does"""
+    if type(body) == Records:
+        return records
+    if body.keyed_by:
+        return [{body.keyed_by: key, **item} for key, items in records.items() for item in items]
+
+    flattened = []
+    for group in records:
+        header = {name: value for name, value in group.items() if name != body.items_key}
+        flattened.extend({**header, **item} for item in group[body.items_key])
+    return flattened
+
+
+def run(case, mode='dict'):
+    tls = CannedSocket(case['response'])
+    report = getattr(tls_3xx, 'function_' + case['code'])(tls, *case['args'], mode=mode)
+    return tls.command, report
+
+
+class BaselineTest(unittest.TestCase):
+
+    def test_dict_mode_matches_baseline(self):
+        for case in load_cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                command, report = run(case)
+                self.assertEqual(command, case['command'])
+                self.assertEqual(as_json(report), case['expected'])
+
+
+    def test_cached_dict_mode_matches_baseline(self):
+        tls_3xx.response_cache = ResponseCache()
+        try:
+            for case in load_cases():
+                with self.subTest(source=case['source'], code=case['code']):
+                    self.assertEqual(as_json(run(case)[1]), case['expected'])
+                    self.assertEqual(as_json(run(case)[1]), case['expected'])
+        finally:
+            tls_3xx.response_cache = None
+
+    def test_cache_keeps_the_new_timestamp(self):
+        case = next(case for case in load_cases() if case['code'] == "201")
+        later = "2612312359" + case['response'][10:]
+        cache = ResponseCache(maxsize=1)
+
+        first = cache.parse(tls_3xx._parse_201, case['response'])
+        second = cache.parse(tls_3xx._parse_201, later)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(second, {**first, 'year': 26, 'month': 12, 'day': 31, 'hour': 23, 'minute': 59})
+        self.assertEqual(first, tls_3xx._parse_201(case['response']))
+
+        alarms = next(case for case in load_cases() if case['code'] == "101")
+        cache.parse(tls_3xx._parse_101, alarms['response'])
+        cache.parse(tls_3xx._parse_201, case['response'])
+        self.assertEqual((len(cache), cache.misses), (1, 3))
+
+
+class ModesTest(unittest.TestCase):
+
+    def cases(self):
+        return [case for case in load_cases() if case['code'] in tls_3xx.LAYOUTS]
+
+    def test_compact_matches_dict(self):
+        for case in self.cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                self.assertEqual(run(case, 'compact')[1].to_dict(), run(case)[1])
+
+    def test_lazy_matches_dict(self):
+        for case in self.cases():
+            with self.subTest(source=case['source'], code=case['code']):
+                self.assertEqual(run(case, 'lazy')[1].to_dict(), run(case)[1])
+
+    def test_lazy_fields_are_decoded_once(self):
+        case = next(case for case in self.cases() if case['code'] == "201")
+        tank = run(case, 'lazy')[1]['tanks'][0]
+
+        self.assertIsNone(tank._value_tank_number)
+        self.assertIs(tank['tank_number'], tank.tank_number)
+        self.assertEqual(tank._value_tank_number, run(case)[1]['tanks'][0]['tank_number'])
+
+    @unittest.skipIf(columnar.numpy is None, "the columnar mode requires NumPy")
+    def test_columnar_matches_dict(self):
+        for case in self.cases():
+            body = tls_3xx.LAYOUTS[case['code']].body
+            if body is None:
+                continue
+
+            with self.subTest(source=case['source'], code=case['code']):
+                columns = run(case, 'columnar')[1][body.key]
+                records = rows(body, run(case)[1][body.key])
+
+                # A keyed dict keeps one group per tank, the columns keep every group a response repeats.
+                if type(body) != Records and body.keyed_by and len(columns[body.keyed_by]) != len(records):
+                    continue
+
+                for name, column in columns.items():
+                    self.assertEqual(column.tolist(), [record[name] for record in records], name)
+
+    def test_unknown_mode_is_rejected(self):
+        case = load_cases()[0]
+        with self.assertRaises(ValueError):
+            run(case, 'rows')
+
+    def test_mode_needs_a_layout(self):
+        case = next(case for case in load_cases() if case['code'] == "205")
+        with self.assertRaises(ValueError):
+            run(case, 'columnar')
+
+
+class FunctionTest(unittest.TestCase):
+
+    def test_every_parser_has_a_function(self):
+        for code, parser in tls_3xx.PARSERS.items():
+            with self.subTest(code=code):
+                self.assertIs(getattr(tls_3xx, '_parse_' + code), parser)
+                self.assertIn("mode - ", getattr(tls_3xx, 'function_' + code).__doc__)
+
+    def test_layout_is_enough_for_a_new_function(self):
+        layout = Layout("2ZZ", TIMESTAMP, Records("tanks", 10, 4, (
+            Field("tank_number", 0, 2),
+            Field("status",      2, 4)
+        )))
+
+        try:
+            tls_3xx.PARSERS["2ZZ"] = compile_layout(layout)
+            function = tls_3xx.compile_function("2ZZ")
+        finally:
+            del tls_3xx.PARSERS["2ZZ"]
+
+        tls = CannedSocket("26031409260101")
+        self.assertEqual(function(tls, "01")['tanks'], [{'tank_number': "01", 'status': "01"}])
+        self.assertEqual(tls.command, "i2ZZ01")
+
+        with self.assertRaises(ValueError):
+            function(tls, "1")
+
+    def test_arguments_are_validated(self):
+        with self.assertRaises(ValueError):
+            tls_3xx.function_119(CannedSocket(""), "2603", "")
+        with self.assertRaises(ValueError):
+            tls_3xx.function_21B(CannedSocket(""), "01", 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
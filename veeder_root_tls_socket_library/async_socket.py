@@ -0,0 +1,169 @@
+# async_socket.py - Defines an asyncio socket used to connect to TLS automatic tank gauges.
+
+import asyncio
+import socket
+
+from veeder_root_tls_socket_library.socket import TlsFraming
+
+class AsyncTlsSocket(TlsFraming):
+    """
+    Defines an asyncio socket for the TLS automatic tank gauges manufactured
+    by Veeder-Root, so one event loop can talk to many gauges at once. Framing,
+    checksums and errors behave exactly like TlsSocket.
+
+    connect() - Used to open a connection, await it to get a socket.
+
+    execute() - Used to send a command and view the output in accordance with
+    Veeder-Root Serial Interface Manual 576013-635.
+    """
+
+    def __init__(self, ip: str, port: int,
+                 reader: asyncio.StreamReader, writer: asyncio.StreamWriter, recorder = None):
+        self.ip = ip
+        self.port = port
+        self.reader = reader
+        self.writer = writer
+
+        # An optional capture.CaptureWriter that every raw response is recorded to.
+        self.recorder = recorder
+
+        # A gauge answers one command at a time, so commands on this socket take turns.
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, ip: str, port: int, connect_timeout: float = 10, recorder = None):
+        """
+        Opens a connection to a TLS system and returns an AsyncTlsSocket for it.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+
+        connect_timeout - The amount of time to wait for the connection.
+
+        recorder - An optional capture.CaptureWriter to record every response to.
+        """
+
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port),
+                                                    connect_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timed out connecting to {ip}:{port}.")
+
+        # Keep idle connections alive and send short commands immediately.
+        socket_connection = writer.get_extra_info("socket")
+
+        if socket_connection is not None:
+            socket_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        return cls(ip, port, reader, writer, recorder)
+
+    def __str__(self):
+        return f"asyncTlsSocket({self.ip}, {self.port})"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the connection to the TLS system.
+        """
+
+        self.writer.close()
+
+        try:                await self.writer.wait_closed()
+        except OSError:     pass
+
+    async def execute(self,
+                      command: str,
+                      etx: bytes = b"\x03",
+                      retries: int = 30,
+                      timeout: int = 1,
+                      data_size: int = 1200) -> str:
+        """
+        Sends a command to a socket connection using the command
+        format from the Veeder-Root Serial Interface Manual 576013-635.
+
+        command - The function code you would like to execute.
+        Make sure this is in computer format.
+
+        etx - This has a default value (ASCII code 003) and should only be
+        changed if your ATG is set to use a different end of transmission.
+
+        retries - The amount of timeout periods the whole response may take
+        before failing, the overall deadline is retries * timeout seconds. A
+        command the gauge never answers raises TimeoutError at the deadline,
+        30 seconds by default, pass fewer retries to give up sooner.
+
+        timeout - The length of one of those periods. Pauses in the output
+        are only limited by the overall deadline.
+
+        data_size - The maximum amount of bytes to listen for at any time.
+        """
+
+        byte_command, is_display = self._build_command(command, etx)
+
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+
+            try:
+                self.writer.write(byte_command)
+                await self.writer.drain()
+
+                sent_at = loop.time()
+                byte_response = await self._receive(etx, sent_at + retries * timeout, data_size)
+                self._check_echo(byte_response, byte_command)
+
+            except (OSError, ValueError):
+                # Whatever is still on its way would be taken for the response to the next command.
+                await self.close()
+                raise
+
+            if self.recorder is not None:
+                self.recorder.record(command, byte_response, duration=loop.time() - sent_at)
+
+        return self._handle_response(byte_response, byte_command, is_display)
+
+    async def _receive(self, etx: bytes, deadline: float, data_size: int) -> bytearray:
+        """
+        Receives chunks of a response from the TLS system, returning the
+        moment ETX arrives. Chunks are appended to one growable buffer so long
+        reports stay linear in size, and bytes that follow the ETX are
+        discarded. A TimeoutError is raised if the response is not complete
+        by the deadline.
+
+        etx - The end of transmission byte that terminates a response.
+
+        deadline - An event loop time() value the whole response must arrive by.
+
+        data_size - The maximum amount of bytes to read per chunk.
+        """
+
+        loop = asyncio.get_running_loop()
+        byte_response = bytearray()
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0: raise TimeoutError(f"Timed out waiting for a response from {self.ip}:{self.port}.")
+
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(data_size), remaining)
+            except asyncio.TimeoutError:
+                continue
+
+            if not chunk: raise ConnectionError("Connection closed by the TLS system.")
+
+            byte_response += chunk
+
+            # A chunk may carry bytes past the ETX, so look for it anywhere in the new bytes.
+            end = byte_response.find(etx, len(byte_response) - len(chunk))
+            if end != -1: break
+
+        # Drop anything after the response.
+        del byte_response[end + len(etx):]
+
+        return byte_response
\ No newline at end of file
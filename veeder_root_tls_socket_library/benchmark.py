@@ -0,0 +1,304 @@
+# benchmark.py - Measures the speed of the TLS library on synthetic responses of any size.
+
+from functools import partial
+from random import Random
+from time import perf_counter
+from timeit import Timer
+import argparse
+import json
+import platform
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.encode import encode_response, frame
+from veeder_root_tls_socket_library.format import _float_to_hex, _hex_to_float, _split_data
+from veeder_root_tls_socket_library.layout import Records, TIMESTAMP
+from veeder_root_tls_socket_library.socket import TlsFraming
+
+# Every function code with a parser.
+CODES = tuple(sorted(tls_3xx.PARSERS))
+
+# The history reports made of count-prefixed groups, which used to re-slice their input.
+GROUPED = ("202", "205", "206", "207", "208", "21B", "221")
+
+SIZES = (1000, 2500, 5000, 10000)
+
+# The amount of records in the responses timed by the suite.
+SUITE_SIZES = (10, 100, 1000)
+
+def synthetic_response(code: str, records: int, seed: int = 0) -> str:
+    """
+    Generates the data of a response to a function code holding the given
+    amount of records, as passed to the tls_3xx parsers. Values are random
+    but well-formed, grouped reports are split into as many full groups as
+    their count fields allow.
+
+    code - The function code, such as "202".
+
+    records - The amount of records or items to generate.
+
+    seed - Seeds the generated values so runs are repeatable.
+    """
+
+    random = Random(seed)
+
+    if code == "205": return encode_response("205", _synthetic_205(records, random))
+
+    layout = tls_3xx.LAYOUTS[code]
+    report = _values(layout.header, random)
+
+    if type(layout.body) == Records:
+        report[layout.body.key] = [_values(layout.body.fields, random) for _ in range(records)]
+        return encode_response(code, report)
+
+    groups = layout.body
+    digits = groups.count.end - groups.count.start
+    most = min(99, (16 if groups.count.kind == "hex" else 10) ** digits - 1)
+
+    report[groups.key] = {} if groups.keyed_by else []
+    parts = [encode_response(code, report)]
+    tank = 0
+
+    # Tank numbers repeat after 99 groups, which a dict cannot hold, so each
+    # group is encoded on its own and only its data is kept.
+    while records > 0:
+        count = min(most, records)
+        records -= count
+        tank = tank % 99 + 1
+
+        group = _values(groups.header, random)
+        group[groups.keyed_by or "tank_number"] = str(tank).zfill(2)
+        items = [_values(groups.items, random) for _ in range(count)]
+
+        if groups.keyed_by:
+            for item in items: item.update({name: group[name] for name in groups.inherited})
+            report[groups.key] = {group[groups.keyed_by]: items}
+        else:
+            report[groups.key] = [{**group, groups.items_key: items}]
+
+        parts.append(encode_response(code, report)[groups.start:])
+
+    return "".join(parts)
+
+def synthetic_frame(code: str, records: int, seed: int = 0) -> bytes:
+    """
+    Wraps a synthetic response in the start of header, command echo,
+    checksum and end of transmission a TLS system sends, as received by
+    TlsSocket._handle_response.
+
+    code - The function code, such as "201".
+
+    records - The amount of records or items to generate.
+
+    seed - Seeds the generated values so runs are repeatable.
+    """
+
+    return frame("i" + code + "00", synthetic_response(code, records, seed))
+
+def time_operation(function, argument, repeat: int = 3) -> float:
+    """
+    Returns the fastest time a single call of a function takes, in seconds,
+    calling it as many times per run as needed for the run to take at least
+    0.2 seconds.
+
+    function - The function to time.
+
+    argument - The argument passed to every call.
+
+    repeat - The amount of runs to take the fastest of.
+    """
+
+    timer = Timer(partial(function, argument))
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat, number)) / number
+
+def suite(codes: tuple = CODES, sizes: tuple = SUITE_SIZES, repeat: int = 3) -> list:
+    """
+    Times response handling, checksum verification, the format helpers and
+    the parser of every function code on synthetic responses of each size,
+    returning a result per operation and size with its operations and
+    bytes per second.
+
+    codes - The function codes to time the parsers of.
+
+    sizes - The amount of records in each response.
+
+    repeat - The amount of runs to take the fastest of.
+    """
+
+    framing = TlsFraming()
+    results = []
+
+    def add(name: str, size: int, function, argument, length: int, operations: int = 1):
+        seconds = time_operation(function, argument, repeat)
+
+        results.append({
+            "name":              name,
+            "size":              size,
+            "bytes":             length,
+            "seconds":           seconds,
+            "ops_per_second":    operations / seconds,
+            "bytes_per_second":  length / seconds
+        })
+
+    for size in sizes:
+        # Tank inventory is the most common report, so it is the one the shared code is timed on.
+        frame = synthetic_frame("201", size)
+        data = synthetic_response("201", size)
+        floats = [_float_to_hex(value) for value in Random(size).choices(range(10000), k=size)]
+
+        add("handle_response", size, lambda frame: framing._handle_response(frame, b"", False), frame, len(frame))
+        add("data_integrity_check", size, framing._data_integrity_check, frame, len(frame))
+        add("split_data", size, lambda data: _split_data(data, 65), data, len(data))
+        add("hex_to_float", size, lambda floats: list(map(_hex_to_float, floats)), floats, 8 * size, size)
+
+        for code in codes:
+            response = synthetic_response(code, size)
+            add("parse_" + code, size, getattr(tls_3xx, "_parse_" + code), response, len(response))
+
+    return results
+
+def time_parser(parser, response: str, repeat: int = 3) -> float:
+    """
+    Returns the fastest of several runs of a parser over a response, in seconds.
+
+    parser - The parser to time, such as tls_3xx._parse_202.
+
+    response - The response data to parse.
+
+    repeat - The amount of runs to take the fastest of.
+    """
+
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        parser(response)
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best: best = elapsed
+
+    return best
+
+def scaling(codes: tuple = GROUPED, sizes: tuple = SIZES, repeat: int = 3) -> dict:
+    """
+    Times the parser of every function code on responses of increasing
+    size. A parser that is linear in its input takes the same time per
+    record at every size.
+
+    codes - The function codes to time.
+
+    sizes - The amount of records in each response.
+
+    repeat - The amount of runs to take the fastest of.
+    """
+
+    results = {}
+
+    for code in codes:
+        parser = getattr(tls_3xx, "_parse_" + code)
+        results[code] = {size: time_parser(parser, synthetic_response(code, size), repeat)
+                         for size in sizes}
+
+    return results
+
+def _synthetic_205(records: int, random: Random) -> dict:
+    """
+    Generates a function 205 report, where only tanks with alarms carry an
+    alarm type.
+
+    records - The amount of tanks to generate.
+
+    random - The random number generator to use.
+    """
+
+    report = _values(TIMESTAMP, random)
+    report["alarms"] = []
+
+    for index in range(records):
+        alarm = {"tank_number": str(index % 99 + 1).zfill(2), "number_of_alarms": random.randint(0, 3)}
+        if alarm["number_of_alarms"]: alarm["alarm_type"] = "02"
+
+        report["alarms"].append(alarm)
+
+    return report
+
+def _values(fields: tuple, random: Random) -> dict:
+    """
+    Generates a random, well-formed value for every field, by name.
+
+    fields - The fields to generate.
+
+    random - The random number generator to use.
+    """
+
+    return {field.name: _value(field, random) for field in fields}
+
+def _value(field, random: Random):
+    """
+    Generates a random, well-formed value for a single field.
+
+    field - The field to generate.
+
+    random - The random number generator to use.
+    """
+
+    width = field.end - field.start
+
+    if field.kind == "float": return random.uniform(0, 10000)
+    if field.kind == "int":   return random.randrange(10 ** width)
+    if field.kind == "hex":   return random.randrange(16 ** width)
+
+    return "".join(random.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") for _ in range(width))
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the TLS library on synthetic responses.")
+    parser.add_argument("codes", nargs="*", help="function codes to time, every code by default")
+    parser.add_argument("--sizes", type=int, nargs="+", help="amounts of records per response")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scaling", action="store_true", help="only show how the grouped parsers scale")
+    parser.add_argument("--json", metavar="FILE", help="save the suite results to FILE for later comparison")
+    arguments = parser.parse_args()
+
+    if arguments.scaling:
+        show_scaling(tuple(arguments.codes or GROUPED), tuple(arguments.sizes or SIZES), arguments.repeat)
+        return
+
+    results = suite(tuple(arguments.codes or CODES), tuple(arguments.sizes or SUITE_SIZES), arguments.repeat)
+
+    for result in results:
+        print(f"{result['name']:>20} {result['size']:>6} records {result['ops_per_second']:12,.0f} ops/s "
+              f"{result['bytes_per_second'] / 1e6:8.2f} MB/s")
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump({
+                "machine":  platform.machine(),
+                "platform": platform.platform(),
+                "python":   platform.python_version(),
+                "results":  results
+            }, file, indent=4)
+
+def show_scaling(codes: tuple, sizes: tuple, repeat: int):
+    """
+    Prints how long each grouped parser takes per record as responses grow.
+
+    codes - The function codes to time.
+
+    sizes - The amount of records in each response.
+
+    repeat - The amount of runs to take the fastest of.
+    """
+
+    for code, timings in scaling(codes, sizes, repeat).items():
+        smallest = min(timings)
+
+        for size, seconds in timings.items():
+            # A linear parser keeps the growth column close to 1.0.
+            growth = (seconds / size) / (timings[smallest] / smallest)
+
+            print(f"{code}: {size:>6} records {seconds * 1000:8.2f} ms "
+                  f"{seconds / size * 1e6:6.2f} us/record  growth {growth:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# cache.py - Remembers parsed TLS reports so unchanged responses are not parsed again.
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+
+from veeder_root_tls_socket_library.format import _get_timestamp
+
+class ResponseCache:
+    """
+    A bounded LRU cache mapping a digest of a response, without its leading
+    timestamp, to the report parsed from it. Station headers, alarm lists
+    and idle tanks come back identical on every poll apart from the time
+    they were generated, so those polls skip parsing entirely. On a hit the
+    cached report is returned with the timestamp of the new response.
+
+    Reports returned for the same response share their records, callers
+    should treat the records as read-only.
+
+    parse() - Parse a response, or return the report cached for it.
+
+    clear() - Forget every cached report and reset the counters.
+
+    hits - The amount of responses answered from the cache.
+
+    misses - The amount of responses that had to be parsed.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """
+        maxsize - The most reports kept, the least recently used is dropped first.
+        """
+
+        if not type(maxsize) == int: raise ValueError("Argument 'maxsize' must be an integer.")
+        if not maxsize > 0:          raise ValueError("Argument 'maxsize' must be greater than zero.")
+
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+
+        self._reports = OrderedDict()
+        self._lock    = Lock()
+
+    def __len__(self):
+        return len(self._reports)
+
+    def parse(self, parser, response: str) -> dict:
+        """
+        Returns the report a parser extracts from a response, parsing it only
+        if the same parser has not already seen the same response body.
+
+        parser - The dict parser for the function, such as tls_3xx._parse_201.
+
+        response - Output from the Veeder-Root TLS system, starting with the timestamp.
+        """
+
+        key = (parser, blake2b(response[10:].encode(), digest_size=16).digest())
+
+        with self._lock:
+            report = self._reports.get(key)
+
+            if report is not None:
+                self._reports.move_to_end(key)
+                self.hits += 1
+
+        if report is None:
+            report = parser(response)
+
+            with self._lock:
+                self.misses += 1
+                self._reports[key] = report
+
+                if len(self._reports) > self.maxsize: self._reports.popitem(last=False)
+
+        # Every caller gets its own top level dict holding the timestamp of its
+        # response, the timestamp keys already exist so they keep their place.
+        return {**report, **_get_timestamp(response)}
+
+    def clear(self):
+        """
+        Forgets every cached report and resets the hit and miss counters.
+        """
+
+        with self._lock:
+            self._reports.clear()
+            self.hits   = 0
+            self.misses = 0
@@ -0,0 +1,218 @@
+# capture.py - Records TLS sessions to compact capture files and replays them without a gauge.
+
+from threading import Lock
+from time import perf_counter, time
+from typing import NamedTuple
+import argparse
+import struct
+
+from veeder_root_tls_socket_library.registry import COMMANDS
+from veeder_root_tls_socket_library.socket import TlsFraming
+
+# A capture file is the magic bytes followed by one record per command, each record
+# being a fixed header and then the command and raw response bytes.
+MAGIC  = b"TLSCAP1\n"
+RECORD = struct.Struct("<dfHI")
+
+class Exchange(NamedTuple):
+    """
+    A single command and the raw response frame it received.
+    """
+
+    timestamp: float
+    duration:  float
+    command:   str
+    response:  bytes
+
+class CaptureWriter:
+    """
+    Writes every command and raw response frame seen by a TlsSocket or
+    AsyncTlsSocket to a capture file. Pass it as the recorder argument of a
+    socket to start recording, one writer can be shared by many sockets.
+
+    record() - Append an exchange to the capture.
+
+    close() - Flush and close the capture file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, command: str, byte_response: bytes,
+               timestamp: float = None, duration: float = 0.0):
+        """
+        Appends an exchange to the capture.
+
+        command - The command that was executed, without framing.
+
+        byte_response - The raw response frame, including SOH and ETX.
+
+        timestamp - When the command was sent, defaults to now.
+
+        duration - How long the response took to arrive, in seconds.
+        """
+
+        byte_command = bytes(command, "utf-8")
+        timestamp = time() if timestamp is None else timestamp
+
+        with self._lock:
+            self._file.write(RECORD.pack(timestamp, duration, len(byte_command), len(byte_response)))
+            self._file.write(byte_command)
+            self._file.write(byte_response)
+
+    def close(self):
+        """
+        Flushes and closes the capture file.
+        """
+
+        with self._lock:
+            self._file.close()
+
+def read_capture(path: str):
+    """
+    Yields every Exchange stored in a capture file, in the order recorded.
+
+    path - The capture file to read.
+    """
+
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if not data.startswith(MAGIC): raise ValueError("File is not a TLS capture.")
+
+    view = memoryview(data)
+    position = len(MAGIC)
+
+    while position + RECORD.size <= len(data):
+        timestamp, duration, command_length, response_length = RECORD.unpack_from(data, position)
+        position += RECORD.size
+
+        command = str(view[position:position + command_length], "utf-8")
+        position += command_length
+
+        response = data[position:position + response_length]
+        position += response_length
+
+        yield Exchange(timestamp, duration, command, response)
+
+class ReplaySocket(TlsFraming):
+    """
+    Stands in for a TlsSocket by answering commands with the responses in a
+    capture file, so the tls_3xx functions run on production traffic at full
+    speed. Responses go through the same framing and checksum handling as a
+    live socket. Each command is answered with its recorded responses in
+    order, starting over once they run out.
+
+    execute() - Used to view the recorded output of a command.
+
+    execute_many() - Used to view the recorded output of several commands.
+    """
+
+    def __init__(self, path: str):
+        self.ip = path
+        self.port = 0
+
+        self._responses = {}
+        self._positions = {}
+
+        for exchange in read_capture(path):
+            self._responses.setdefault(exchange.command, []).append(exchange.response)
+
+    def __str__(self):
+        return f"replaySocket({self.ip})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def execute(self, command: str, etx: bytes = b"\x03", **kwargs) -> str:
+        """
+        Returns the next recorded output for a command.
+
+        command - The function code you would like to execute.
+
+        etx - The end of transmission byte used by the ATG.
+        """
+
+        byte_command, is_display = self._build_command(command, etx)
+
+        responses = self._responses.get(command)
+        if not responses: raise ValueError(f"Command '{command}' was not captured.")
+
+        position = self._positions.get(command, 0)
+        self._positions[command] = (position + 1) % len(responses)
+
+        return self._handle_response(responses[position], byte_command, is_display)
+
+    def execute_many(self, commands: list, etx: bytes = b"\x03", **kwargs) -> list:
+        """
+        Returns the next recorded output for each of several commands.
+
+        commands - A list of function codes you would like to execute.
+
+        etx - The end of transmission byte used by the ATG.
+        """
+
+        return [self.execute(command, etx) for command in commands]
+
+def replay(path: str, repeat: int = 1) -> dict:
+    """
+    Feeds every computer format response in a capture file through
+    _handle_response and the matching tls_3xx parser as fast as possible,
+    and returns how long that took per function code.
+
+    path - The capture file to replay.
+
+    repeat - The amount of times to replay the whole capture.
+    """
+
+    framing = TlsFraming()
+    exchanges = [exchange for exchange in read_capture(path) if exchange.command[:1] == "i"]
+    results = {}
+
+    for _ in range(repeat):
+        for exchange in exchanges:
+            code = exchange.command[1:4].upper()
+            parser = COMMANDS[code].parser if code in COMMANDS else None
+            byte_command, is_display = framing._build_command(exchange.command, b"\x03")
+
+            result = results.setdefault(code, {"responses": 0, "bytes": 0, "errors": 0, "seconds": 0.0})
+            start = perf_counter()
+
+            try:
+                response = framing._handle_response(exchange.response, byte_command, is_display)
+                if parser is not None: parser(response)
+            except (ValueError, IndexError, TypeError):
+                result["errors"] += 1
+
+            result["seconds"] += perf_counter() - start
+            result["responses"] += 1
+            result["bytes"] += len(exchange.response)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a TLS capture through the tls_3xx parsers.")
+    parser.add_argument("path")
+    parser.add_argument("--repeat", type=int, default=1)
+    arguments = parser.parse_args()
+
+    for code, result in sorted(replay(arguments.path, arguments.repeat).items()):
+        seconds = result["seconds"] or 1e-9
+        print(f"{code}: {result['responses']} responses, {result['errors']} errors, "
+              f"{result['responses'] / seconds:,.0f} responses/s, {result['bytes'] / seconds:,.0f} bytes/s")
+
+if __name__ == "__main__":
+    main()
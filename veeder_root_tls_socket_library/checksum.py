@@ -0,0 +1,55 @@
+# checksum.py - Computes and verifies the checksums on TLS computer format responses.
+
+# Every computer format frame ends in "&&", four hex checksum digits and ETX.
+SEPARATOR = b"&&"
+TRAILER_LENGTH = 7
+
+def checksum(message: bytes) -> int:
+    """
+    Calculates the checksum the TLS system appends to a message, which is the
+    16-bit two's complement of the sum of every byte in it, always four hex 
+    digits long.
+
+    message - Everything from the start of header up to and including the &&
+    separator, as bytes, a bytearray or a memoryview.
+    """
+
+    return -_byte_sum(memoryview(message)) & 0xFFFF
+
+def verify(frame: bytes) -> bool:
+    """
+    Verifies whether or not a command response retains its integrity after
+    transmission by comparing it against its checksum. No decoding is done.
+
+    frame - A full computer format response, from the start of header up to
+    and including ETX, as bytes, a bytearray or a memoryview.
+    """
+
+    view = memoryview(frame)
+    if len(view) < TRAILER_LENGTH or view[-7:-5] != SEPARATOR: return False
+
+    try:                checksum_int = int(view[-5:-1].tobytes(), 16)
+    except ValueError:  return False
+
+    # The message and checksum must add up to a multiple of 0x10000.
+    return (_byte_sum(view[:-5]) + checksum_int) & 0xFFFF == 0
+
+def verify_many(frames) -> list:
+    """
+    Verifies a batch of captured frames at once, for replay and backfill jobs,
+    and returns whether each one is intact in the same order.
+
+    frames - An iterable of full computer format responses.
+    """
+
+    return list(map(verify, frames))
+
+def _byte_sum(view: memoryview) -> int:
+    """
+    Adds up every byte in a buffer. Summing a bytes object runs about twice
+    as fast as iterating a memoryview, which easily pays for the copy.
+
+    view - A memoryview over the bytes to add up.
+    """
+
+    return sum(view.tobytes())
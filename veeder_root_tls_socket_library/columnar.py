@@ -0,0 +1,199 @@
+# columnar.py - Decodes fixed-width TLS reports straight into NumPy column arrays.
+
+from veeder_root_tls_socket_library.layout import Layout, Records, compile_layout
+
+# NumPy is only needed by the columnar mode, so the rest of the library works without it.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def compile_columnar(layout: Layout):
+    """
+    Compiles a parser for a layout that returns every record field as a
+    column array instead of a list of dicts. The header is decoded as usual,
+    the records are viewed as a 2D array of bytes and each kind of field is
+    decoded for every record at once, all floats in a single pass. Grouped
+    reports are flattened, with the group header fields repeated per item.
+
+    layout - The Layout to compile, its body must be Records or Groups.
+    """
+
+    if numpy is None: raise ImportError("The columnar mode requires NumPy, install it with 'pip install numpy'.")
+    if layout.body is None: raise ValueError(f"Function {layout.code} has no records to decode into columns.")
+
+    body = layout.body
+    fields = body.fields if type(body) == Records else body.items
+    header = compile_layout(Layout(layout.code, layout.header))
+    columns = _compile_columns(fields)
+
+    def parser(response: str) -> dict:
+        data = header(response[:body.start])
+
+        if type(body) == Records:
+            rows, extra = _records_rows(response, body), {}
+        else:
+            rows, extra = _groups_rows(response, body)
+
+        data[body.key] = {**extra, **columns(rows)}
+
+        return data
+
+    parser.__name__ = parser.__qualname__ = "_columnar_" + layout.code
+    parser.__doc__ = f"Extracts report info from the response to function {layout.code} as columns.\n"
+    parser.layout = layout
+
+    return parser
+
+def _compile_columns(fields: tuple):
+    """
+    Precomputes the indexes needed to decode a set of record fields and
+    returns a function decoding a 2D array of records into columns.
+
+    fields - The fields of each record.
+    """
+
+    floats = [field for field in fields if field.kind == "float"]
+    float_index = numpy.array([range(field.start, field.end) for field in floats], dtype=numpy.intp)
+
+    def columns(rows) -> dict:
+        out = {}
+
+        # Every float in every record is decoded at once, then split into columns.
+        if floats:
+            words = _digits(rows[:, float_index], 16).astype(numpy.uint32)
+            values = numpy.round(words.view(numpy.float32).astype(numpy.float64), 5)
+            values = numpy.ascontiguousarray(values.T)
+
+            for index, field in enumerate(floats):
+                out[field.name] = values[index]
+
+        for field in fields:
+            if field.kind == "float": continue
+
+            block = rows[:, field.start:field.end]
+
+            if field.kind == "int":
+                out[field.name] = _digits(block, 10)
+            elif field.kind == "hex":
+                out[field.name] = _digits(block, 16)
+            else:
+                width = field.end - field.start
+                text = numpy.ascontiguousarray(block).view(f"S{width}").reshape(len(rows)).astype(f"U{width}")
+                out[field.name] = numpy.char.strip(text) if field.kind == "strip" else text
+
+        # Putting the columns back in layout order keeps them in the same order as the dicts.
+        return {field.name: out[field.name] for field in fields}
+
+    return columns
+
+def _records_rows(response: str, records: Records):
+    """
+    Views the complete records of a response as a 2D array of bytes, one row
+    per record.
+
+    response - Output from the Veeder-Root TLS system.
+
+    records - The Records describing the rows.
+    """
+
+    count = max(len(response) - records.start, 0) // records.length
+    data = _encode(response[records.start:records.start + count * records.length])
+
+    return numpy.frombuffer(data, dtype=numpy.uint8).reshape(count, records.length)
+
+def _groups_rows(response: str, groups) -> tuple:
+    """
+    Walks the group headers of a response and gathers every item into a 2D
+    array of bytes, returning it with the group header fields as columns
+    repeated once per item.
+
+    response - Output from the Veeder-Root TLS system.
+
+    groups - The Groups describing the response.
+    """
+
+    header_length = max(field.end for field in groups.header + (groups.count,))
+    position, end = groups.start, len(response)
+
+    starts, counts = [], []
+    headers = {field.name: [] for field in groups.header}
+
+    while end - position >= header_length:
+        count = _decode_value(response[position + groups.count.start:position + groups.count.end],
+                              groups.count.kind)
+
+        for field in groups.header:
+            headers[field.name].append(_decode_value(response[position + field.start:position + field.end],
+                                                     field.kind))
+
+        position += header_length
+
+        # Items cut off by the end of the response are skipped, like the dict parsers do.
+        count = min(count, (end - position) // groups.item_length)
+
+        starts.append(position)
+        counts.append(count)
+        position += count * groups.item_length
+
+    data = numpy.frombuffer(_encode(response), dtype=numpy.uint8)
+    counts = numpy.array(counts, dtype=numpy.intp)
+
+    # Every item starts at its group's first item plus a multiple of the item length.
+    first = numpy.repeat(numpy.array(starts, dtype=numpy.intp), counts)
+    step = numpy.arange(len(first)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    item_starts = first + step * groups.item_length
+
+    rows = data[item_starts[:, None] + numpy.arange(groups.item_length)]
+    extra = {name: numpy.repeat(numpy.array(values), counts) for name, values in headers.items()}
+
+    return rows, extra
+
+def _digits(block, base: int):
+    """
+    Decodes fixed-width decimal or hexadecimal numbers held in the last axis
+    of an array of ASCII bytes.
+
+    block - An array of ASCII bytes, the last axis holding each number.
+
+    base - Either 10 or 16.
+    """
+
+    values = _HEX[block] if base == 16 else block - 48
+    if (values >= base).any(): raise ValueError(f"Invalid base {base} number in response.")
+
+    powers = base ** numpy.arange(block.shape[-1] - 1, -1, -1, dtype=numpy.int64)
+
+    return values.astype(numpy.int64) @ powers
+
+def _decode_value(text: str, kind: str):
+    """
+    Decodes a single group header field.
+
+    text - The characters of the field.
+
+    kind - The kind of the field, as in layout.KINDS.
+    """
+
+    if kind == "int":   return int(text)
+    if kind == "hex":   return int(text, 16)
+    if kind == "strip": return text.strip()
+
+    return text
+
+def _encode(text: str) -> bytes:
+    """
+    Encodes response data for viewing as bytes, field offsets only line up
+    when every character is a single byte.
+
+    text - The response data to encode.
+    """
+
+    try:                        return text.encode("ascii")
+    except UnicodeEncodeError:  raise ValueError("The columnar mode only supports ASCII responses.")
+
+# Maps every ASCII byte to its hex digit value, anything that is not a hex digit maps to 255.
+if numpy is not None:
+    _HEX = numpy.full(256, 255, dtype=numpy.uint8)
+    _HEX[numpy.frombuffer(b"0123456789ABCDEF", dtype=numpy.uint8)] = numpy.arange(16)
+    _HEX[numpy.frombuffer(b"abcdef", dtype=numpy.uint8)] = numpy.arange(10, 16)
@@ -0,0 +1,139 @@
+# compact.py - Generates memory-efficient record types for TLS reports and parsers that build them.
+
+from array import array
+import re
+
+from veeder_root_tls_socket_library.layout import Layout, Records, compile_layout
+
+class Compact:
+    """
+    The base of every generated record type. Records keep their values in
+    slots rather than a dict of repeated keys, with every float field packed
+    into one array instead of a float object each.
+
+    to_dict() - Returns the record as the dict the "dict" mode would build.
+    """
+
+    __slots__ = ()
+
+    # The dict keys of the fields and the attributes holding them, keys are
+    # not always valid attribute names.
+    _keys = ()
+    _attributes = ()
+
+    def to_dict(self) -> dict:
+        """
+        Returns the record, and any records nested in it, as plain dicts.
+        """
+
+        return {key: _to_dict(getattr(self, attribute))
+                for key, attribute in zip(self._keys, self._attributes)}
+
+    def __repr__(self):
+        values = ", ".join(f"{attribute}={getattr(self, attribute)!r}" for attribute in self._attributes)
+
+        return f"{type(self).__name__}({values})"
+
+def compile_compact(layout: Layout):
+    """
+    Generates the record types for a layout and compiles a parser that
+    builds them instead of dicts. Short string fields such as tank numbers
+    and product codes are interned, so records share them.
+
+    layout - The Layout to compile.
+    """
+
+    code = layout.code
+    header = _fields(layout.header)
+    types = {}
+
+    if type(layout.body) == Records:
+        types["record"] = _compact_type("Record" + code, _fields(layout.body.fields))
+    elif layout.body is not None:
+        inherited = [field for field in layout.body.header if field.name in layout.body.inherited]
+        types["record"] = _compact_type("Record" + code, _fields(inherited) + _fields(layout.body.items))
+
+        if not layout.body.keyed_by:
+            group = _fields(layout.body.header) + [(layout.body.items_key, False)]
+            types["group"] = _compact_type("Group" + code, group)
+
+    if layout.body is not None: header.append((layout.body.key, False))
+    types["report"] = _compact_type("Report" + code, header)
+
+    parser = compile_layout(layout, types, intern=True)
+    parser.types = types
+
+    return parser
+
+def _compact_type(name: str, fields: list) -> type:
+    """
+    Generates a slotted record type taking every field positionally, with
+    float fields stored in a single array and read back through properties.
+    The type is published in this module so its records can be pickled.
+
+    name - The name of the type, such as Record201.
+
+    fields - The dict key of every field and whether it holds a float, in order.
+    """
+
+    keys = [key for key, _ in fields]
+    attributes = [re.sub(r"\W", "_", key) for key in keys]
+    floats = [attribute for attribute, (_, is_float) in zip(attributes, fields) if is_float]
+    slots = [attribute for attribute in attributes if not attribute in floats]
+
+    lines = [f"def __init__(self, {', '.join(attributes)}):"]
+    lines += [f"    self.{attribute} = {attribute}" for attribute in slots]
+
+    if floats:
+        lines.append(f"    self._floats = array('d', ({', '.join(floats)},))")
+        slots.append("_floats")
+
+    namespace = {"array": array}
+    exec("\n".join(lines) + "\n", namespace)
+
+    compact_type = type(name, (Compact,), {
+        "__slots__":   tuple(slots),
+        "__init__":    namespace["__init__"],
+        "__module__":  __name__,
+        "_keys":       tuple(keys),
+        "_attributes": tuple(attributes)
+    })
+
+    for index, attribute in enumerate(floats):
+        setattr(compact_type, attribute, _float_property(index))
+
+    globals()[name] = compact_type
+
+    return compact_type
+
+def _fields(fields: tuple) -> list:
+    """
+    Returns the dict key of every field and whether it holds a float.
+
+    fields - The layout fields.
+    """
+
+    return [(field.name, field.kind == "float") for field in fields]
+
+def _float_property(index: int) -> property:
+    """
+    Returns a read-only property for a float packed into the _floats array.
+
+    index - The position of the float in the array.
+    """
+
+    return property(lambda self: self._floats[index])
+
+def _to_dict(value):
+    """
+    Converts a field value to plain Python types, recursing into records,
+    lists of records and dicts of lists of records.
+
+    value - The value to convert.
+    """
+
+    if isinstance(value, Compact): return value.to_dict()
+    if type(value) == list:        return [_to_dict(item) for item in value]
+    if type(value) == dict:        return {key: _to_dict(item) for key, item in value.items()}
+
+    return value
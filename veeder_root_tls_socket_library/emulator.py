@@ -0,0 +1,603 @@
+# emulator.py - A local stand-in for a TLS-350 automatic tank gauge behind a Lantronix.
+
+from datetime import datetime, timedelta
+from random import Random
+from threading import Thread
+from time import sleep
+import argparse
+import socket
+import socketserver
+
+from veeder_root_tls_socket_library.encode import frame
+from veeder_root_tls_socket_library.format import _float_to_hex
+
+# The product labels the display format reports show for each product code.
+PRODUCT_LABELS = {"1": "UNLEADED", "2": "PLUS", "3": "PREMIUM", "4": "DIESEL"}
+
+class TlsEmulator:
+    """
+    Serves computer format responses in accordance with Veeder-Root Serial
+    Interface Manual 576013-635 for every function implemented in tls_3xx.py,
+    and the display format in-tank inventory report (I201), so the transport
+    and collector can be measured without a gauge on the bench.
+
+    start() - Start serving in a background thread.
+
+    stop() - Stop serving and close the listening socket.
+
+    serve_forever() - Serve in the calling thread until interrupted.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 tanks: int = 4,
+                 history: int = 10,
+                 baud: int = 0,
+                 split_chunks: float = 0.0,
+                 corrupt_checksum: float = 0.0,
+                 stall: float = 0.0,
+                 stall_seconds: float = 5.0,
+                 error_rate: float = 0.0,
+                 seed: int = 0):
+        """
+        host - The address to listen on.
+
+        port - The TCP port to listen on, 0 picks a free port.
+
+        tanks - The amount of tanks the gauge reports.
+
+        history - The amount of records kept per tank for history reports.
+
+        baud - The serial baud rate to emulate, 0 sends at full speed.
+
+        split_chunks - The chance a response is sent in several small pieces.
+
+        corrupt_checksum - The chance a response is sent with a bad checksum.
+
+        stall - The chance a response stalls for stall_seconds halfway through.
+
+        stall_seconds - How long a stalled response pauses for.
+
+        error_rate - The chance a command is answered with the 9999FF1B error.
+
+        seed - Seeds the generated values and faults so runs are repeatable.
+        """
+
+        if not 1 <= tanks <= 99: raise ValueError("Argument 'tanks' must be between 1 and 99.")
+        if not 0 <= history <= 99: raise ValueError("Argument 'history' must be between 0 and 99.")
+
+        self.tanks = tanks
+        self.history = history
+        self.baud = baud
+        self.split_chunks = split_chunks
+        self.corrupt_checksum = corrupt_checksum
+        self.stall = stall
+        self.stall_seconds = stall_seconds
+        self.error_rate = error_rate
+
+        self._random = Random(seed)
+        self._seed = seed
+
+        emulator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                # A Lantronix forwards serial output as soon as it arrives.
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                emulator._handle_connection(self.request)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = None
+
+    @property
+    def address(self) -> tuple:
+        """
+        The (host, port) the emulator is listening on.
+        """
+
+        return self._server.server_address[:2]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Starts serving in a background thread and returns the emulator.
+        """
+
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the listening socket.
+        """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+
+        self._server.server_close()
+
+    def serve_forever(self):
+        """
+        Serves in the calling thread until interrupted.
+        """
+
+        try:                        self._server.serve_forever()
+        except KeyboardInterrupt:   pass
+        finally:                    self._server.server_close()
+
+    def respond(self, command: str, now: datetime = None) -> bytes:
+        """
+        Builds the full framed response to a command, without any faults.
+
+        command - The command, without the start of header and line ending.
+
+        now - The time to report, defaults to the current time.
+        """
+
+        now = now or datetime.now()
+
+        if command[:4] == "I201":
+            try:                return b"\x01" + self._display_201(command, now).encode("utf-8") + b"\x03"
+            except ValueError:  return b"\x019999FF1B\x03"
+
+        generator = getattr(self, "_body_" + command[1:4].upper(), None)
+
+        if not command.startswith("i") or generator is None:
+            return b"\x019999FF1B\x03"
+
+        try:                body = generator(command[4:], now)
+        except ValueError:  return b"\x019999FF1B\x03"
+
+        return frame(command, _timestamp(now) + body)
+
+    def _handle_connection(self, connection):
+        """
+        Answers every command received on a connection until it is closed.
+
+        connection - The socket of an accepted connection.
+        """
+
+        buffer = b""
+
+        while True:
+            try:                chunk = connection.recv(1200)
+            except OSError:     return
+
+            if not chunk: return
+            buffer += chunk
+
+            # Commands are a start of header, the function code and a line ending.
+            while b"\r\n" in buffer:
+                line, buffer = buffer.split(b"\r\n", 1)
+                command = line.lstrip(b"\x01").decode("utf-8", "replace")
+
+                if command: self._send(connection, self._faulty_response(command))
+
+    def _faulty_response(self, command: str) -> bytes:
+        """
+        Builds the response to a command and applies any configured errors.
+
+        command - The command, without the start of header and line ending.
+        """
+
+        if self._chance(self.error_rate): return b"\x019999FF1B\x03"
+
+        response = self.respond(command)
+
+        if self._chance(self.corrupt_checksum) and response.endswith(b"\x03"):
+            digit = b"0" if response[-2:-1] != b"0" else b"1"
+            response = response[:-2] + digit + b"\x03"
+
+        return response
+
+    def _send(self, connection, response: bytes):
+        """
+        Sends a response the way the configured serial link would.
+
+        connection - The socket to send the response on.
+
+        response - The full framed response.
+        """
+
+        # A byte on a serial link takes ten bits including start and stop bits.
+        chunk_size = len(response)
+        if self.baud: chunk_size = max(1, self.baud // 100)
+        if self._chance(self.split_chunks): chunk_size = min(chunk_size, self._random.randint(1, 16))
+
+        stall_at = len(response) // 2 if self._chance(self.stall) else -1
+
+        try:
+            for start in range(0, len(response), chunk_size):
+                chunk = response[start:start + chunk_size]
+
+                if start <= stall_at < start + chunk_size: sleep(self.stall_seconds)
+                if self.baud: sleep(len(chunk) * 10 / self.baud)
+
+                connection.sendall(chunk)
+
+        except OSError:
+            pass
+
+    def _chance(self, probability: float) -> bool:
+        """
+        Returns True with the given probability.
+
+        probability - A value between 0 and 1.
+        """
+
+        return probability > 0 and self._random.random() < probability
+
+    def _tank_numbers(self, arguments: str) -> list:
+        """
+        Returns the tank numbers a command asks for, raising ValueError for 
+        tanks the gauge does not have.
+
+        arguments - The text following the function code in the command.
+        """
+
+        tank = arguments[0:2] or "00"
+        if not tank.isdigit(): raise ValueError("Invalid tank number.")
+
+        if tank == "00": return list(range(1, self.tanks + 1))
+        if int(tank) > self.tanks: raise ValueError("Invalid tank number.")
+
+        return [int(tank)]
+
+    def _tank_random(self, tank: int, salt: str = "") -> Random:
+        """
+        Returns a random generator seeded per tank, so values stay stable 
+        between polls.
+
+        tank - The tank number.
+
+        salt - Separates the values used by different reports.
+        """
+
+        return Random(f"{self._seed}-{tank}-{salt}")
+
+    def _history_times(self, now: datetime, tank: int, count: int = None) -> list:
+        """
+        Returns the times of the history records kept for a tank, newest first.
+
+        now - The time the response is reported at.
+
+        tank - The tank number, used to offset records between tanks.
+
+        count - The amount of records, defaults to the configured history depth.
+        """
+
+        count = self.history if count is None else count
+        return [now - timedelta(hours=8 * (index + 1) + tank) for index in range(count)]
+
+    def _inventory(self, tank: int) -> list:
+        """
+        Returns the volume, TC volume, ullage, height, water, temperature 
+        and water volume of a tank.
+
+        tank - The tank number.
+        """
+
+        random   = self._tank_random(tank)
+        capacity = random.choice([6000.0, 8000.0, 10000.0, 12000.0])
+        volume   = round(capacity * random.uniform(0.2, 0.9), 2)
+        water    = round(random.uniform(0.0, 1.5), 2)
+
+        return [volume, round(volume * 0.996, 2), round(capacity - volume, 2),
+                round(volume / capacity * 96.0, 2), water,
+                round(random.uniform(55.0, 80.0), 2), round(water * 8.2, 2)]
+
+    def _product(self, tank: int) -> str:
+        """
+        Returns the single digit product code of a tank.
+
+        tank - The tank number.
+        """
+
+        return str((tank - 1) % 4 + 1)
+
+    def _floats(self, values: list, counted: bool = True) -> str:
+        """
+        Encodes a list of floats as IEEE hex codes.
+
+        values - The floats to encode.
+
+        counted - Whether the codes are preceded by the amount of fields.
+        """
+
+        fields = "".join(_float_to_hex(value) for value in values)
+
+        return format(len(values), "02X") + fields if counted else fields
+
+    def _display_201(self, command: str, now: datetime) -> str:
+        """
+        Returns the display format in-tank inventory report, one line per tank.
+
+        command - The command, echoed at the top of the report.
+
+        now - The time the report is printed at.
+        """
+
+        lines = ["", command, now.strftime("%b %d, %Y %I:%M %p").upper(), "",
+                 "EMULATED STATION", "123 TEST ROAD", "ANYTOWN USA", "TLS-350", "",
+                 "IN-TANK INVENTORY", "",
+                 "TANK PRODUCT             VOLUME TC VOLUME   ULLAGE   HEIGHT    WATER     TEMP"]
+
+        for tank in self._tank_numbers(command[4:]):
+            volume, tc_volume, ullage, height, water, temperature, _ = self._inventory(tank)
+            label = PRODUCT_LABELS[self._product(tank)]
+
+            lines.append(f"{tank:3}  {label:<20}{volume:6.0f}{tc_volume:10.0f}{ullage:9.0f}"
+                         f"{height:9.2f}{water:9.2f}{temperature:9.2f}")
+
+        return "\r\n".join(lines + ["", ""])
+
+    def _station_headers(self) -> str:
+        """
+        Returns the four 20 character station header lines.
+        """
+
+        headers = ["EMULATED STATION", "123 TEST ROAD", "ANYTOWN USA", "TLS-350"]
+        return "".join(header.ljust(20) for header in headers)
+
+    def _alarms(self, now: datetime, with_state: bool) -> str:
+        """
+        Returns the active alarm records used by the 11X reports.
+
+        now - The time the response is reported at.
+
+        with_state - Whether each record carries a two digit alarm state.
+        """
+
+        records = ""
+
+        for tank in range(1, self.tanks + 1):
+            if self._tank_random(tank, "alarm").random() < 0.5: continue
+
+            records += "02" + "01" + "05" + format(tank, "02") + ("01" if with_state else "")
+            records += _timestamp(now - timedelta(minutes=tank * 7))
+
+        return records
+
+    # Each _body_XXX method builds the data section of the response to function XXX
+    # from the text that follows the function code in the command.
+
+    def _body_101(self, arguments: str, now: datetime) -> str:
+        return "".join("0205" + format(tank, "02") for tank in self._tank_numbers(arguments)
+                       if self._tank_random(tank, "alarm").random() >= 0.5)
+
+    def _body_102(self, arguments: str, now: datetime) -> str:
+        slots = range(1, 5)
+        return format(len(slots), "02") + "".join(format(slot, "02X") + "0" + str(slot) +
+                                                  _float_to_hex(1.0) + _float_to_hex(slot * 2.5)
+                                                  for slot in slots)
+
+    def _body_111(self, arguments: str, now: datetime) -> str:
+        return self._alarms(now, True)
+
+    def _body_112(self, arguments: str, now: datetime) -> str:
+        return self._alarms(now, True)
+
+    def _body_113(self, arguments: str, now: datetime) -> str:
+        return self._station_headers() + self._alarms(now, False)
+
+    def _body_114(self, arguments: str, now: datetime) -> str:
+        return self._station_headers() + self._alarms(now, True)
+
+    def _body_115(self, arguments: str, now: datetime) -> str:
+        return self._station_headers() + self._alarms(now, False)
+
+    def _body_116(self, arguments: str, now: datetime) -> str:
+        times = self._history_times(now, 0)
+        return self._station_headers() + format(len(times), "02") + "".join(
+            _timestamp(time) + f"TECH{index:06}" + f"S{index:04}" for index, time in enumerate(times))
+
+    def _body_119(self, arguments: str, now: datetime) -> str:
+        times = self._history_times(now, 0, self.history * self.tanks)
+
+        if len(arguments) == 14:
+            start, end = arguments[2:8], arguments[8:]
+            times = [time for time in times if start <= time.strftime("%y%m%d") <= end]
+
+        return format(len(times), "04") + "".join(
+            _timestamp(time) + "0" + str(index % 4 + 1) + format(index, "06")
+            for index, time in enumerate(times))
+
+    def _body_11A(self, arguments: str, now: datetime) -> str:
+        times = self._history_times(now, 0)
+        return format(len(times), "02") + "".join(
+            _timestamp(time) + f"ID{index:04}" + f"C{index:03}" for index, time in enumerate(times))
+
+    def _body_11B(self, arguments: str, now: datetime) -> str:
+        times = self._history_times(now, 0)
+        return "1" + _timestamp(now - timedelta(days=30)) + format(len(times), "02X") + "".join(
+            _timestamp(time) + _timestamp(time + timedelta(minutes=45)) for time in times)
+
+    def _body_201(self, arguments: str, now: datetime) -> str:
+        return "".join(format(tank, "02") + self._product(tank) + "0000" +
+                       self._floats(self._inventory(tank)) for tank in self._tank_numbers(arguments))
+
+    def _body_202(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            random = self._tank_random(tank, "delivery")
+            times  = self._history_times(now, tank)
+            body  += format(tank, "02") + self._product(tank) + format(len(times), "02")
+
+            for time in times:
+                start  = random.uniform(1000.0, 4000.0)
+                amount = random.uniform(2000.0, 5000.0)
+                temp   = random.uniform(55.0, 80.0)
+
+                body += _timestamp(time) + _timestamp(time + timedelta(minutes=40))
+                body += self._floats([start, start * 0.996, 0.5, temp,
+                                      start + amount, (start + amount) * 0.996, 0.5, temp + 1.0,
+                                      start / 100.0, (start + amount) / 100.0])
+
+        return body
+
+    def _body_203(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            random = self._tank_random(tank, "leak")
+            body  += format(tank, "02") + self._product(tank) + _timestamp(now - timedelta(days=1))
+            body  += "02" + self._floats([random.uniform(55.0, 80.0), random.uniform(55.0, 80.0),
+                                          random.uniform(1000.0, 9000.0), 0.0, 0.01])
+
+        return body
+
+    def _body_204(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            random = self._tank_random(tank, "shift")
+
+            for shift in range(1, self.history + 1):
+                start = random.uniform(3000.0, 9000.0)
+                end   = start - random.uniform(100.0, 900.0)
+                temp  = random.uniform(55.0, 80.0)
+
+                body += format(tank, "02") + self._product(tank) + format(shift, "02")
+                body += self._floats([start, 10000.0 - start, start * 0.996, start / 100.0, 0.5, temp,
+                                      end, 10000.0 - end, end * 0.996, end / 100.0, 0.5, temp, start - end])
+
+        return body
+
+    def _body_205(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            if self._tank_random(tank, "alarm").random() < 0.5: body += format(tank, "02") + "00"
+            else:                                               body += format(tank, "02") + "0105"
+
+        return body
+
+    def _body_206(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            times = self._history_times(now, tank)
+            body += format(tank, "02") + format(len(times), "02")
+            body += "".join(_timestamp(time) + "0205" for time in times)
+
+        return body
+
+    def _body_207(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            times = self._history_times(now, tank)
+            body += format(tank, "02") + format(len(times), "02X")
+            body += "".join("01" + format(index % 100, "02") + "02" + _timestamp(time) +
+                            self._floats([2.0, 1500.0 + index, 0.05], False)
+                            for index, time in enumerate(times))
+
+        return body
+
+    def _body_208(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            times = self._history_times(now, tank)
+            body += format(tank, "02") + format(len(times), "02X")
+            body += "".join("01" + "00" + _timestamp(time) + "01" +
+                            self._floats([0.01, 2.0, 1500.0 + index], False)
+                            for index, time in enumerate(times))
+
+        return body
+
+    def _body_21A(self, arguments: str, now: datetime) -> str:
+        return self._body_201(arguments, now)
+
+    def _body_21B(self, arguments: str, now: datetime) -> str:
+        deliveries = arguments[2:4]
+        if not deliveries.isdigit(): raise ValueError("Invalid delivery count.")
+
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            random = self._tank_random(tank, "delivery")
+            times  = self._history_times(now, tank, min(int(deliveries), self.history))
+            body  += format(tank, "02") + format(len(times), "02")
+
+            for time in times:
+                start  = random.uniform(1000.0, 4000.0)
+                amount = random.uniform(2000.0, 5000.0)
+                temps  = [random.uniform(55.0, 80.0) for _ in range(6)]
+
+                body += _timestamp(time) + _timestamp(time + timedelta(minutes=40))
+                body += self._floats([start, start + amount, amount, amount * 0.996, start / 100.0] +
+                                     temps + [(start + amount) / 100.0] + temps +
+                                     [random.uniform(0.0, 200.0), sum(temps) / 6, sum(temps) / 6])
+
+        return body
+
+    def _body_221(self, arguments: str, now: datetime) -> str:
+        body = ""
+
+        for tank in self._tank_numbers(arguments):
+            random = self._tank_random(tank, "delivery")
+            times  = self._history_times(now, tank)
+            body  += format(tank, "02") + self._product(tank) + "01" + format(len(times), "03")
+
+            for time in times:
+                ticket = random.uniform(2000.0, 5000.0)
+                gauged = ticket + random.uniform(-20.0, 20.0)
+                body  += _timestamp(time) + self._floats([ticket, gauged, gauged - ticket,
+                                                          random.uniform(55.0, 80.0),
+                                                          random.uniform(55.0, 80.0),
+                                                          random.uniform(55.0, 80.0)])
+
+        return body
+
+    def _body_251(self, arguments: str, now: datetime) -> str:
+        return "".join(format(tank, "02") + "00" for tank in self._tank_numbers(arguments))
+
+def _timestamp(time: datetime) -> str:
+    """
+    Formats a time the way the TLS system does in its responses (yymmddhhmm).
+
+    time - The time to format.
+    """
+
+    return time.strftime("%y%m%d%H%M")
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulates a TLS-350 automatic tank gauge.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10001)
+    parser.add_argument("--tanks", type=int, default=4)
+    parser.add_argument("--history", type=int, default=10)
+    parser.add_argument("--baud", type=int, default=0, help="serial baud rate to emulate, 0 for none")
+    parser.add_argument("--split-chunks", type=float, default=0.0, help="chance of a split response")
+    parser.add_argument("--corrupt-checksum", type=float, default=0.0, help="chance of a bad checksum")
+    parser.add_argument("--stall", type=float, default=0.0, help="chance of a stalled response")
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance of a 9999FF1B error")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    emulator = TlsEmulator(arguments.host, arguments.port, arguments.tanks, arguments.history,
+                           arguments.baud, arguments.split_chunks, arguments.corrupt_checksum,
+                           arguments.stall, arguments.stall_seconds, arguments.error_rate,
+                           arguments.seed)
+
+    print(f"Emulating a TLS-350 with {arguments.tanks} tanks on {emulator.address[0]}:{emulator.address[1]}")
+    emulator.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# encode.py - Turns report dicts back into TLS computer format responses, the inverse of the tls_3xx parsers.
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.checksum import checksum
+from veeder_root_tls_socket_library.format import _float_to_hex
+from veeder_root_tls_socket_library.layout import Field, Layout, Records
+
+# Encoders compiled from the tls_3xx layouts, by function code.
+_ENCODERS = {}
+
+def encode_response(code: str, report: dict) -> str:
+    """
+    Encodes a report into the response data a TLS system would send for it,
+    as passed to the tls_3xx parsers. Parsing the result returns the report,
+    with floats rounded to what a 32 bit IEEE float can hold.
+
+    code - The function code, such as "201".
+
+    report - A report shaped like the dict the parser for the function returns.
+    """
+
+    return encoder(code)(report)
+
+def encode_frame(code: str, report: dict, command: str = None) -> bytes:
+    """
+    Encodes a report into the full computer format frame a TLS system would
+    send for it, with its command echo and checksum.
+
+    code - The function code, such as "201".
+
+    report - A report shaped like the dict the parser for the function returns.
+
+    command - The command echoed at the start of the frame, defaults to the
+    function code for all tanks (ex. i20100).
+    """
+
+    return frame(command or "i" + code + "00", encode_response(code, report))
+
+def frame(command: str, data: str) -> bytes:
+    """
+    Wraps response data in the start of header, command echo, && separator,
+    checksum and end of transmission of a computer format frame.
+
+    command - The command being answered, only its first six characters are echoed.
+
+    data - The response data, starting with the timestamp.
+    """
+
+    message = bytes("\x01" + command[:6] + data + "&&", "utf-8")
+
+    return message + bytes(f"{checksum(message):04X}", "utf-8") + b"\x03"
+
+def encoder(code: str):
+    """
+    Returns the encoder for a function code, compiling it from the layout of
+    its parser on first use.
+
+    code - The function code, such as "201".
+    """
+
+    if code == "205": return _encode_205
+
+    if not code in _ENCODERS:
+        if not code in tls_3xx.LAYOUTS: raise ValueError(f"Function {code} has no encoder.")
+
+        _ENCODERS[code] = compile_encoder(tls_3xx.LAYOUTS[code])
+
+    return _ENCODERS[code]
+
+def compile_encoder(layout: Layout):
+    """
+    Generates and compiles an encoder for a layout, the inverse of the parser
+    compile_layout() generates for it. Gaps the parser skips are filled the
+    way a TLS system fills them, the two characters before a run of floats
+    hold the amount of floats that follow and a gap before the first record
+    holds the amount of records.
+
+    layout - The Layout to compile.
+    """
+
+    name = "_encode_" + layout.code
+    body = layout.body
+    lines = [f"def {name}(report):"]
+
+    if type(body) == Records:
+        lines.append(f"    body = report[{body.key!r}]")
+        lines.append(f"    parts = [{_join(layout.header, body.start, 'report', 'len(body)')}]")
+        lines.append("    for record in body:")
+        lines.append(f"        parts.append({_join(body.fields, body.length, 'record')})")
+    elif body is not None:
+        header = body.header + (body.count,)
+        header_length = max(field.end for field in header)
+
+        lines.append(f"    body = report[{body.key!r}]")
+        lines.append(f"    parts = [{_join(layout.header, body.start, 'report')}]")
+
+        # Keyed groups only keep their key, inherited fields are read back from their first item.
+        if body.keyed_by:
+            lines.append("    for key, items in body.items():")
+            lines.append(f"        group = {{**(items[0] if items else {{}}), {body.keyed_by!r}: key}}")
+        else:
+            lines.append("    for group in body:")
+            lines.append(f"        items = group[{body.items_key!r}]")
+
+        values = {body.count.name: "len(items)"}
+
+        for field in body.header:
+            if field.name in body.inherited: values[field.name] = f"group.get({field.name!r}, {_default(field)!r})"
+
+        lines.append(f"        parts.append({_join(header, header_length, 'group', values=values)})")
+        lines.append("        for item in items:")
+        lines.append(f"            parts.append({_join(body.items, body.item_length, 'item')})")
+    else:
+        lines.append(f"    parts = [{_join(layout.header, 0, 'report')}]")
+
+    lines.append("    return ''.join(parts)")
+    source = "\n".join(lines) + "\n"
+
+    namespace = {"_text": _text, "_int": _int, "_hex": _hex, "_float": _float_to_hex, "_count": _count}
+    exec(compile(source, f"<encoder {layout.code}>", "exec"), namespace)
+
+    encoder = namespace[name]
+    encoder.__doc__ = f"Encodes a report into the response data of function {layout.code}.\n"
+    encoder.layout = layout
+    encoder.source = source
+
+    return encoder
+
+def _join(fields: tuple, length: int, source: str, count: str = None, values: dict = None) -> str:
+    """
+    Generates the expression encoding a set of fields laid out at their
+    offsets, filling the gaps between them.
+
+    fields - The fields to encode.
+
+    length - The length the fields are padded to, gaps after the last field
+    are filled up to it.
+
+    source - The expression holding the dict the values are read from.
+
+    count - The expression holding the amount of records, written into a gap
+    after the last field.
+
+    values - Expressions used instead of reading some fields from the dict, by name.
+    """
+
+    values = values or {}
+    parts = []
+    position = 0
+    fields = sorted(fields, key=lambda field: field.start)
+
+    for index, field in enumerate(fields):
+        if field.start > position:
+            following = [field for field in fields[index:] if field.kind == "float"]
+            parts.append(repr(_gap(field.start - position, len(following) if field.kind == "float" else 0)))
+
+        value = values.get(field.name) or f"{source}[{field.name!r}]"
+        parts.append(_encode(field, value))
+        position = field.end
+
+    if length > position:
+        parts.append(f"_count({count}, {length - position})" if count else repr("0" * (length - position)))
+
+    return " + ".join(parts) or "''"
+
+def _encode(field: Field, value: str) -> str:
+    """
+    Generates the expression encoding a single field.
+
+    field - The field to encode.
+
+    value - The expression holding its value.
+    """
+
+    width = field.end - field.start
+
+    if field.kind == "float": return f"_float({value})"
+    if field.kind == "int":   return f"_int({value}, {width})"
+    if field.kind == "hex":   return f"_hex({value}, {width})"
+
+    return f"_text({value}, {width})"
+
+def _gap(width: int, floats: int) -> str:
+    """
+    Returns the text filling characters the parser skips, the amount of
+    floats that follow when the gap leads into them.
+
+    width - The width of the gap.
+
+    floats - The amount of float fields that follow the gap.
+    """
+
+    return f"{floats:0{width}X}" if floats else "0" * width
+
+def _default(field: Field):
+    """
+    Returns the value a header field takes when there are no items to read it from.
+
+    field - The missing field.
+    """
+
+    return "" if field.kind in ("str", "strip") else 0
+
+def _text(value: str, width: int) -> str:
+    """
+    Encodes a text field, padded with spaces to its width.
+
+    value - The text.
+
+    width - The width of the field.
+    """
+
+    if not type(value) == str: raise ValueError(f"Text field value {value!r} must be a string.")
+    if len(value) > width:     raise ValueError(f"Text field value {value!r} is longer than {width} characters.")
+
+    return value.ljust(width)
+
+def _int(value: int, width: int) -> str:
+    """
+    Encodes a decimal field, padded with zeros to its width.
+
+    value - The number.
+
+    width - The width of the field.
+    """
+
+    text = f"{value:0{width}d}"
+    if len(text) > width: raise ValueError(f"Number {value} does not fit in {width} digits.")
+
+    return text
+
+def _hex(value: int, width: int) -> str:
+    """
+    Encodes a hexadecimal field, padded with zeros to its width.
+
+    value - The number.
+
+    width - The width of the field.
+    """
+
+    text = f"{value:0{width}X}"
+    if len(text) > width: raise ValueError(f"Number {value} does not fit in {width} hex digits.")
+
+    return text
+
+def _count(value: int, width: int) -> str:
+    """
+    Encodes the amount of records in a gap the parser skips, capped at the
+    largest number that fits so oversized synthetic reports still encode.
+
+    value - The amount of records.
+
+    width - The width of the gap.
+    """
+
+    return _int(min(value, 10 ** width - 1), width)
+
+def _encode_205(report: dict) -> str:
+    """
+    Encodes a report into the response data of function 205, where only
+    tanks with alarms carry an alarm type.
+
+    report - A report shaped like the dict tls_3xx._parse_205 returns.
+    """
+
+    parts = [_int(report[name], 2) for name in ("year", "month", "day", "hour", "minute")]
+
+    for alarm in report["alarms"]:
+        parts.append(_text(alarm["tank_number"], 2) + _hex(alarm["number_of_alarms"], 2))
+        if alarm["number_of_alarms"] > 0: parts.append(_text(alarm["alarm_type"], 2))
+
+    return "".join(parts)
@@ -1,5 +1,11 @@
 # format.py - A series of utilities used to normalize output from TLS automatic tank gauges.
 
+from struct import Struct, pack
+
+# Every float in a command response is a big-endian IEEE 754 single.
+_FLOAT = Struct(">f")
+_FLOAT_STRUCTS = {1: _FLOAT}
+
 def _get_timestamp(response: str) -> dict:
     """
     Extracts date and time from a automatic tank gauge command output/response.
@@ -34,30 +40,50 @@ def _split_data(data: str, length: int) -> list:
 def _hex_to_float(hex: str) -> float:
     """
     Convert hexadecimal codes generated by the command responses into IEEE 
-    floats.
+    floats, rounded to 5 decimal places.
 
     hex - An 8 character hexidecimal code stored as a string.
     """
 
-    binary = ""
+    return round(_FLOAT.unpack(bytes.fromhex(hex))[0], 5)
+
+def _hex_to_floats(data: str, start: int = 0, count: int = 1) -> list:
+    """
+    Convert several consecutive 8 character hexadecimal codes into IEEE 
+    floats with a single unpack, rounded to 5 decimal places like 
+    _hex_to_float.
+
+    data - The string holding the hexadecimal codes, such as a record.
 
-    for char in hex:
-        hex_int = int(char, 16)
-        hex_bin = format(hex_int, "04b")
-        binary = binary + str(hex_bin)
+    start - The index of the first character of the first code.
 
-    negative_int = int(binary[0], 2)
-    negative = bool(negative_int)
+    count - The amount of consecutive codes to convert.
+    """
 
-    exponent_int = int(binary[1:9], 2)
-    exponent = 2 ** (exponent_int - 127)
+    floats = _float_struct(count).unpack(bytes.fromhex(data[start:start + count * 8]))
 
-    mantissa_int = int(binary[9:], 2)
-    mantissa_field = 2 ** 23
-    mantissa = 1.0 + (mantissa_int / mantissa_field)
+    return [round(value, 5) for value in floats]
 
-    if negative: exponent = -abs(exponent)
+def _float_struct(count: int) -> Struct:
+    """
+    Returns a cached struct for unpacking a run of big-endian floats.
 
-    decimal = round(exponent * mantissa, 5)
+    count - The amount of floats in the run.
+    """
+
+    float_struct = _FLOAT_STRUCTS.get(count)
+
+    if float_struct is None:
+        float_struct = _FLOAT_STRUCTS[count] = Struct(f">{count}f")
+
+    return float_struct
+
+def _float_to_hex(value: float) -> str:
+    """
+    Convert a float into the 8 character IEEE hexadecimal code used by the 
+    command responses, the inverse of _hex_to_float.
+
+    value - The float to convert.
+    """
 
-    return decimal
\ No newline at end of file
+    return pack(">f", value).hex().upper()
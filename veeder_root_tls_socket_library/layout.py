@@ -0,0 +1,323 @@
+# layout.py - Describes TLS computer format responses as data and compiles them into parsers.
+
+from typing import NamedTuple
+import sys
+
+from veeder_root_tls_socket_library.format import _float_struct
+
+# How each kind of field is decoded, "float" fields are decoded separately in runs.
+KINDS = {
+    "str":   "{slice}",
+    "strip": "{slice}.strip()",
+    "int":   "int({slice})",
+    "hex":   "int({slice}, 16)",
+    "float": None
+}
+
+class Field(NamedTuple):
+    """
+    A fixed-width field, start and end are offsets into the response for
+    header fields and offsets into the record for record fields.
+
+    kind - One of "str", "strip", "int", "hex" or "float".
+    """
+
+    name:  str
+    start: int
+    end:   int
+    kind:  str = "str"
+
+class Records(NamedTuple):
+    """
+    A run of fixed-width records filling the rest of the response, stored as
+    a list under key. Incomplete trailing records are ignored.
+    """
+
+    key:    str
+    start:  int
+    length: int
+    fields: tuple
+
+class Groups(NamedTuple):
+    """
+    A run of count-prefixed groups filling the rest of the response, each a
+    header followed by count fixed-width items.
+
+    key - The key the groups are stored under.
+
+    start - The offset of the first group in the response.
+
+    header - The fields of the group header, offsets relative to the group.
+
+    count - The header field holding the amount of items in the group.
+
+    items - The fields of each item, offsets relative to the item.
+
+    item_length - The length of each item.
+
+    keyed_by - When set, groups are stored as a dict mapping this header field
+    to the list of items, otherwise as a list of header dicts.
+
+    items_key - The key the items are stored under in each header dict.
+
+    inherited - The names of header fields copied into every item, ahead of
+    the item fields.
+    """
+
+    key:         str
+    start:       int
+    header:      tuple
+    count:       Field
+    items:       tuple
+    item_length: int
+    keyed_by:    str = None
+    items_key:   str = "items"
+    inherited:   tuple = ()
+
+class Layout(NamedTuple):
+    """
+    The complete layout of the response to a function code, header fields use
+    offsets into the response after the command echo.
+    """
+
+    code:   str
+    header: tuple
+    body:   object = None
+
+# Every response starts with the time the report was generated.
+TIMESTAMP = (
+    Field("year",   0,  2,  "int"),
+    Field("month",  2,  4,  "int"),
+    Field("day",    4,  6,  "int"),
+    Field("hour",   6,  8,  "int"),
+    Field("minute", 8,  10, "int")
+)
+
+def compile_layout(layout: Layout, types: dict = None, intern: bool = False):
+    """
+    Generates and compiles a parser for a layout, which takes the response
+    data and returns a dict shaped like the hand-written parsers always
+    returned. Runs of adjacent float fields are decoded with a single unpack.
+
+    layout - The Layout to compile.
+
+    types - Optional classes to build instead of dicts, taking every field
+    positionally. "report" receives the header fields then the body, 
+    "record" the fields of a record or item and "group" the group header
+    fields then the list of items.
+
+    intern - Whether to intern short string fields such as tank numbers and
+    product codes, so every record shares the same string objects.
+    """
+
+    name = "_parse_" + layout.code
+    namespace = {"fromhex": bytes.fromhex, "intern": sys.intern}
+    types = types or {}
+
+    for role, cls in types.items():
+        namespace["_" + role] = cls
+
+    compiler = _Compiler(namespace, types, intern)
+    lines = [f"def {name}(response):"]
+    body = ()
+
+    if type(layout.body) == Records:
+        lines += compiler.records(layout.body)
+        body = ((layout.body.key, "body"),)
+    elif type(layout.body) == Groups:
+        lines += compiler.groups(layout.body)
+        body = ((layout.body.key, "body"),)
+
+    # The header is built last so the body can be passed to a report type.
+    lines += compiler.fields(layout.header, "", "return {}", "    ", body, "report")
+    source = "\n".join(lines) + "\n"
+
+    exec(compile(source, f"<layout {layout.code}>", "exec"), namespace)
+
+    parser = namespace[name]
+    parser.__doc__ = f"Extracts report info from the response to function {layout.code}.\n"
+    parser.layout = layout
+    parser.source = source
+
+    return parser
+
+class _Compiler:
+    """
+    Generates the source of a parser, one part of the layout at a time.
+    """
+
+    def __init__(self, namespace: dict, types: dict, intern: bool):
+        """
+        namespace - The namespace the parser is compiled in, float structs are
+        added to it.
+
+        types - The classes to build instead of dicts, by role.
+
+        intern - Whether to intern short string fields.
+        """
+
+        self.namespace = namespace
+        self.types = types
+        self.intern = intern
+
+    def records(self, records: Records) -> list:
+        """
+        Generates the loop decoding a run of fixed-width records.
+
+        records - The Records to decode.
+        """
+
+        # Only complete records are decoded, so the loop stops one record short of the end.
+        lines  = ["    body = []"]
+        lines += [f"    for position in range({records.start}, len(response) - {records.length - 1}, {records.length}):"]
+        lines += self.fields(records.fields, "position", "body.append({})", "        ", (), "record")
+
+        return lines
+
+    def groups(self, groups: Groups) -> list:
+        """
+        Generates the loop decoding a run of count-prefixed groups on a position
+        cursor, so the response is never re-sliced.
+
+        groups - The Groups to decode.
+        """
+
+        header_length = max(field.end for field in groups.header + (groups.count,))
+
+        lines = [
+            f"    body = {'{}' if groups.keyed_by else '[]'}",
+            f"    position = {groups.start}",
+            "    end = len(response)",
+            f"    while end - position >= {header_length}:",
+            f"        count = {self.value(groups.count, 'position')}",
+            "        items = []"
+        ]
+
+        if groups.keyed_by:
+            key_field = next(field for field in groups.header if field.name == groups.keyed_by)
+            lines.append(f"        body[{self.value(key_field, 'position')}] = items")
+        else:
+            lines += self.fields(groups.header, "position", "body.append({})", "        ",
+                                 ((groups.items_key, "items"),), "group")
+
+        # Inherited header fields are decoded once per group and shared by its items.
+        inherited = []
+
+        for index, field in enumerate(field for field in groups.header if field.name in groups.inherited):
+            lines.append(f"        inherited_{index} = {self.value(field, 'position')}")
+            inherited.append((field.name, f"inherited_{index}"))
+
+        lines += [
+            f"        position += {header_length}",
+            "        for _ in range(count):",
+            f"            if end - position < {groups.item_length}: break"
+        ]
+        lines += self.fields(groups.items, "position", "items.append({})", "            ", (), "record",
+                             tuple(inherited))
+        lines.append(f"            position += {groups.item_length}")
+
+        return lines
+
+    def fields(self, fields: tuple, base: str, target: str, indent: str,
+               extra: tuple, role: str, leading: tuple = ()) -> list:
+        """
+        Generates the statements decoding a set of fields into a dict literal,
+        or a call to the type for the role when there is one.
+
+        fields - The fields to decode.
+
+        base - The expression holding the offset the field offsets are relative
+        to, empty for offsets into the response.
+
+        target - The statement receiving the value, with {} in its place.
+
+        indent - The indentation of the generated statements.
+
+        extra - Extra (key, expression) entries appended after the fields.
+
+        role - Either "report", "record" or "group".
+
+        leading - Extra (key, expression) entries placed before the fields.
+        """
+
+        lines = []
+        values = {}
+
+        for index, run in enumerate(_float_runs(fields)):
+            struct_name = f"_unpack_{len(run)}"
+            self.namespace[struct_name] = _float_struct(len(run)).unpack
+
+            start = Field("", run[0].start, run[-1].end)
+            lines.append(f"{indent}floats_{index} = {struct_name}(fromhex({_slice(start, base)}))")
+
+            for position, field in enumerate(run):
+                values[field.name] = f"round(floats_{index}[{position}], 5)"
+
+        entries = list(leading)
+        entries += [(field.name, values.get(field.name) or self.value(field, base)) for field in fields]
+        entries += list(extra)
+
+        # Types take every value positionally, dicts are built as literals.
+        if role in self.types:
+            opening, closing = f"_{role}(", ")"
+            entries = [value for _, value in entries]
+        else:
+            opening, closing = "{", "}"
+            entries = [f"{key!r}: {value}" for key, value in entries]
+
+        before, after = target.split("{}")
+        separator = f",\n{indent}    "
+
+        lines.append(f"{indent}{before}{opening}\n{indent}    {separator.join(entries)}\n{indent}{closing}{after}")
+
+        return lines
+
+    def value(self, field: Field, base: str) -> str:
+        """
+        Generates the expression decoding a single non-float field.
+
+        field - The field to decode.
+
+        base - The expression holding the offset the field is relative to.
+        """
+
+        value = KINDS[field.kind].format(slice=_slice(field, base))
+
+        # Short strings are codes repeated on nearly every record.
+        if self.intern and field.kind == "str" and field.end - field.start <= 4:
+            value = f"intern({value})"
+
+        return value
+
+def _float_runs(fields: tuple) -> list:
+    """
+    Groups float fields whose bytes are adjacent into runs decoded together.
+
+    fields - The fields to search for floats.
+    """
+
+    runs = []
+
+    for field in fields:
+        if field.kind != "float": continue
+
+        if runs and runs[-1][-1].end == field.start:
+            runs[-1].append(field)
+        else:
+            runs.append([field])
+
+    return runs
+
+def _slice(field: Field, base: str) -> str:
+    """
+    Generates the slice expression for a field.
+
+    field - The field to slice out of the response.
+
+    base - The expression holding the offset the field is relative to.
+    """
+
+    if not base: return f"response[{field.start}:{field.end}]"
+    if not field.start: return f"response[{base}:{base} + {field.end}]"
+
+    return f"response[{base} + {field.start}:{base} + {field.end}]"
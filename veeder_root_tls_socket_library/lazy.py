@@ -0,0 +1,256 @@
+# lazy.py - Views over TLS responses that only decode the fields a caller reads.
+
+from collections.abc import Mapping
+import re
+
+from veeder_root_tls_socket_library.format import _float_struct, _hex_to_float
+from veeder_root_tls_socket_library.layout import Layout, Records, _float_runs
+
+class LazyView(Mapping):
+    """
+    The base of every generated view. A view holds the response and the
+    offset of its record, and decodes a field the first time it is read and
+    keeps it. Adjacent floats are unpacked together, so reading a few floats
+    costs one unpack. Views can be read as attributes or as a read-only
+    mapping with the same keys as the "dict" mode.
+
+    to_dict() - Decodes every field, returning the dict the "dict" mode would build.
+    """
+
+    __slots__ = ("_response", "_offset")
+
+    # The dict keys of the fields and the attributes holding them.
+    _keys = ()
+    _attributes = {}
+
+    def __getitem__(self, key: str):
+        try:                attribute = self._attributes[key]
+        except KeyError:    raise KeyError(key) from None
+
+        return getattr(self, attribute)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._response[self._offset:self._offset + 20]!r}...)"
+
+    def to_dict(self) -> dict:
+        """
+        Decodes every field, and every record nested in the view, into plain dicts.
+        """
+
+        return {key: _to_dict(self[key]) for key in self._keys}
+
+def compile_lazy(layout: Layout):
+    """
+    Generates the view types for a layout and compiles a parser that returns
+    a view of the report. Records are found up front, which only needs the
+    group headers to be decoded, but none of their fields are decoded until
+    they are read.
+
+    layout - The Layout to compile.
+    """
+
+    code = layout.code
+    body = layout.body
+    report_type = _view_type("Report" + code, layout.header, trailing=() if body is None else (body.key,))
+
+    if type(body) == Records:
+        record_type = _view_type("Record" + code, body.fields)
+    elif body is not None:
+        inherited = tuple(field for field in body.header if field.name in body.inherited)
+        record_type = _view_type("Record" + code, body.items, leading=tuple(field.name for field in inherited))
+        group_type = _view_type("Group" + code, body.header, trailing=(body.items_key,))
+
+        header_length = max(field.end for field in body.header + (body.count,))
+        count_field = body.count
+        key_field = next((field for field in body.header if field.name == body.keyed_by), None)
+
+    def parser(response: str) -> LazyView:
+        report = report_type(response, 0)
+
+        if type(body) == Records:
+            value = [record_type(response, position)
+                     for position in range(body.start, len(response) - body.length + 1, body.length)]
+
+        elif body is not None:
+            value = {} if key_field else []
+            position, end = body.start, len(response)
+
+            # Only the group headers are decoded to find where every item starts.
+            while end - position >= header_length:
+                count = _decode(response[position + count_field.start:position + count_field.end],
+                                count_field.kind)
+                group = group_type(response, position)
+                values = [getattr(group, _attribute(field.name)) for field in inherited]
+
+                position += header_length
+                count = min(count, (end - position) // body.item_length)
+                items = []
+
+                for offset in range(position, position + count * body.item_length, body.item_length):
+                    record = record_type(response, offset)
+
+                    for field, item in zip(inherited, values):
+                        setattr(record, _attribute(field.name), item)
+
+                    items.append(record)
+
+                position += count * body.item_length
+
+                if key_field:
+                    value[getattr(group, _attribute(key_field.name))] = items
+                else:
+                    setattr(group, _attribute(body.items_key), items)
+                    value.append(group)
+
+        if body is not None: setattr(report, _attribute(body.key), value)
+
+        return report
+
+    parser.__name__ = parser.__qualname__ = "_lazy_" + code
+    parser.__doc__ = f"Returns a view of the report info in the response to function {code}.\n"
+    parser.layout = layout
+
+    return parser
+
+def _view_type(name: str, fields: tuple, leading: tuple = (), trailing: tuple = ()) -> type:
+    """
+    Creates a view type with a property for every field. Leading and
+    trailing keys are plain slots without a field to decode, which the
+    parser sets instead.
+
+    name - The name of the type, such as Record201.
+
+    fields - The fields decoded when read.
+
+    leading - Keys of values set by the parser that come before the fields.
+
+    trailing - Keys of values set by the parser that come after the fields.
+    """
+
+    keys = list(leading) + [field.name for field in fields] + list(trailing)
+    runs = _float_runs(fields)
+
+    # Every other field gets a slot holding its value once read, every run of floats
+    # a slot holding its unpacked values.
+    cached = ["_value_" + _attribute(field.name) for field in fields if field.kind != "float"]
+    cached += [f"_run_{index}" for index in range(len(runs))]
+    slots = [_attribute(key) for key in leading + trailing] + cached
+
+    lines  = ["def __init__(self, response, offset):"]
+    lines += ["    self._response = response", "    self._offset = offset"]
+    lines += [f"    self.{slot} = None" for slot in cached]
+
+    namespace = {}
+    exec("\n".join(lines) + "\n", namespace)
+
+    members = {
+        "__slots__":   tuple(slots),
+        "__init__":    namespace["__init__"],
+        "_keys":       tuple(keys),
+        "_attributes": {key: _attribute(key) for key in keys}
+    }
+
+    for field in fields:
+        if field.kind != "float": 
+            members[_attribute(field.name)] = _field_property(field, "_value_" + _attribute(field.name))
+
+    for index, run in enumerate(runs):
+        for position, field in enumerate(run):
+            members[_attribute(field.name)] = _float_property(f"_run_{index}", run, position)
+
+    return type(name, (LazyView,), members)
+
+def _field_property(field, slot: str) -> property:
+    """
+    Returns a property for a non-float field, which is decoded the first
+    time it is read and kept in its slot.
+
+    field - The field to decode.
+
+    slot - The slot caching the decoded value.
+    """
+
+    start, end, kind = field.start, field.end, field.kind
+
+    def getter(self):
+        value = getattr(self, slot)
+
+        if value is None:
+            value = _decode(self._response[self._offset + start:self._offset + end], kind)
+            setattr(self, slot, value)
+
+        return value
+
+    return property(getter)
+
+def _float_property(slot: str, run: list, position: int) -> property:
+    """
+    Returns a property for a float in a run of adjacent floats. The first
+    float read from a run unpacks the whole run into its slot.
+
+    slot - The slot caching the unpacked run.
+
+    run - The float fields in the run.
+
+    position - The position of the field in the run.
+    """
+
+    unpack = _float_struct(len(run)).unpack
+    start, end = run[0].start, run[-1].end
+    fromhex = bytes.fromhex
+
+    def getter(self):
+        values = getattr(self, slot)
+
+        if values is None:
+            values = unpack(fromhex(self._response[self._offset + start:self._offset + end]))
+            setattr(self, slot, values)
+
+        return round(values[position], 5)
+
+    return property(getter)
+
+def _attribute(key: str) -> str:
+    """
+    Returns the attribute name used for a dict key.
+
+    key - The dict key of a field.
+    """
+
+    return re.sub(r"\W", "_", key)
+
+def _decode(text: str, kind: str):
+    """
+    Decodes a single field the way the compiled dict parsers do.
+
+    text - The characters of the field.
+
+    kind - The kind of the field, as in layout.KINDS.
+    """
+
+    if kind == "float": return _hex_to_float(text)
+    if kind == "int":   return int(text)
+    if kind == "hex":   return int(text, 16)
+    if kind == "strip": return text.strip()
+
+    return text
+
+def _to_dict(value):
+    """
+    Converts a field value to plain Python types, recursing into views,
+    lists of views and dicts of lists of views.
+
+    value - The value to convert.
+    """
+
+    if isinstance(value, LazyView): return value.to_dict()
+    if type(value) == list:         return [_to_dict(item) for item in value]
+    if type(value) == dict:         return {key: _to_dict(item) for key, item in value.items()}
+
+    return value
@@ -0,0 +1,224 @@
+# pool.py - Keeps warm connections to TLS automatic tank gauges for reuse.
+
+from contextlib import contextmanager
+from threading import Lock
+
+from veeder_root_tls_socket_library.socket import TlsSocket
+
+class TlsSocketPool:
+    """
+    Keeps one persistent TlsSocket per (ip, port) so repeated commands do not
+    pay for a TCP handshake and a new Lantronix session every time. Each
+    Lantronix serial port only serves one conversation at a time, so callers
+    sharing an endpoint take turns on its connection.
+
+    connection() - Borrow the connection for an endpoint as a context manager.
+
+    execute() - Run a single command, reconnecting once if a pooled
+    connection turns out to have been dropped.
+
+    execute_many() - Run several commands pipelined on one connection, 
+    reconnecting once if a pooled connection turns out to have been dropped.
+
+    release() - Close the pooled connection for a single endpoint.
+
+    close() - Close every pooled connection.
+    """
+
+    def __init__(self, connect_timeout: float = 10, recorder = None, cache = None):
+        self.connect_timeout = connect_timeout
+        self.recorder = recorder
+
+        # An optional registry.TtlCache answering commands whose responses can be reused.
+        self.cache = cache
+
+        self._sockets = {}
+        self._locks   = {}
+        self._lock    = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextmanager
+    def connection(self, ip: str, port: int):
+        """
+        Yields a connected TlsSocket for the endpoint, probing an idle
+        connection before handing it out and replacing it when it is dead.
+        The connection is dropped if the caller raises, so a half-read
+        response can never leak into the next command.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+        """
+
+        key = (ip, port)
+
+        with self._endpoint_lock(key):
+            tls = self._sockets.get(key)
+
+            if tls is not None and not tls.is_alive():
+                self._discard(key)
+                tls = None
+
+            if tls is None:
+                tls = TlsSocket(ip, port, self.connect_timeout, self.recorder)
+                self._sockets[key] = tls
+
+            try:
+                yield tls
+
+            except BaseException:
+                self._discard(key)
+                raise
+
+    def execute(self, ip: str, port: int, command: str, **kwargs) -> str:
+        """
+        Runs a command on the pooled connection for an endpoint. If a pooled
+        connection turns out to have been dropped, the command is retried 
+        once on a new connection. A new connection that fails is not retried, 
+        so an unreachable gauge costs a single connect timeout, and neither 
+        is a timeout, so a slow gauge costs a single deadline.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+
+        command - The function code to execute, passed to TlsSocket.execute().
+
+        kwargs - Any other arguments accepted by TlsSocket.execute().
+        """
+
+        if self.cache is not None:
+            response = self.cache.get((ip, port), command)
+            if response is not None: return response
+
+        pooled = self._is_pooled(ip, port)
+
+        try:
+            with self.connection(ip, port) as tls:
+                response = tls.execute(command, **kwargs)
+
+        except ConnectionError:
+            # Only a dropped connection is worth another try, a timeout would just repeat.
+            if not pooled: raise
+
+            with self.connection(ip, port) as tls:
+                response = tls.execute(command, **kwargs)
+
+        if self.cache is not None: self.cache.put((ip, port), command, response)
+
+        return response
+
+    def execute_many(self, ip: str, port: int, commands: list, **kwargs) -> list:
+        """
+        Runs several commands back to back on the pooled connection for an 
+        endpoint. If a pooled connection turns out to have been dropped, the 
+        commands are retried once on a new connection.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+
+        commands - The function codes to execute, passed to TlsSocket.execute_many().
+
+        kwargs - Any other arguments accepted by TlsSocket.execute_many().
+        """
+
+        responses = {}
+
+        # Only the commands the cache cannot answer are sent.
+        if self.cache is not None:
+            for command in commands:
+                response = self.cache.get((ip, port), command)
+                if response is not None: responses[command] = response
+
+        missing = [command for command in commands if not command in responses]
+
+        if missing:
+            pooled = self._is_pooled(ip, port)
+
+            try:
+                with self.connection(ip, port) as tls:
+                    received = tls.execute_many(missing, **kwargs)
+
+            except ConnectionError:
+                if not pooled: raise
+
+                with self.connection(ip, port) as tls:
+                    received = tls.execute_many(missing, **kwargs)
+
+            for command, response in zip(missing, received):
+                if self.cache is not None: self.cache.put((ip, port), command, response)
+                responses[command] = response
+
+        return [responses[command] for command in commands]
+
+    def release(self, ip: str, port: int):
+        """
+        Closes the pooled connection for an endpoint, freeing the Lantronix 
+        serial port for other clients.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+        """
+
+        key = (ip, port)
+
+        with self._endpoint_lock(key):
+            self._discard(key)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+
+        with self._lock:
+            keys = list(self._sockets)
+
+        for key in keys:
+            with self._endpoint_lock(key):
+                self._discard(key)
+
+    def _is_pooled(self, ip: str, port: int) -> bool:
+        """
+        Returns whether an endpoint already has a connection in the pool, 
+        which may have gone stale since it was last used.
+
+        ip - The IP address of the Lantronix device.
+
+        port - The TCP port of the serial port the gauge is attached to.
+        """
+
+        with self._lock:
+            return (ip, port) in self._sockets
+
+    def _endpoint_lock(self, key: tuple) -> Lock:
+        """
+        Returns the lock serializing access to a single endpoint.
+
+        key - The (ip, port) of the endpoint.
+        """
+
+        with self._lock:
+            return self._locks.setdefault(key, Lock())
+
+    def _discard(self, key: tuple):
+        """
+        Closes and forgets the connection for an endpoint, if there is one.
+
+        key - The (ip, port) of the endpoint.
+        """
+
+        tls = self._sockets.pop(key, None)
+
+        if tls is not None:
+            try:                tls.close()
+            except OSError:     pass
+
+# Shared by every caller in a process that does not need its own pool.
+default_pool = TlsSocketPool()
@@ -0,0 +1,230 @@
+# registry.py - Describes the cost and cacheability of every TLS function implemented in tls_3xx.py.
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.layout import Records
+
+class Command(NamedTuple):
+    """
+    What the rest of the library needs to know about a function code.
+
+    code - The function code, such as "201".
+
+    parser - The dict parser for the response, such as tls_3xx._parse_201.
+
+    function - The tls_3xx function that runs the command.
+
+    volatile - Whether the report changes between polls, volatile reports are
+    never reused.
+
+    ttl - How long a response can be reused for, in seconds.
+
+    records_per_tank - The amount of records a tank typically contributes,
+    used to estimate the size of a response.
+
+    bytes_per_tank - The expected size of the records of one tank.
+
+    overhead - The expected size of the rest of the response, framing included.
+    """
+
+    code:             str
+    parser:           object
+    function:         object
+    volatile:         bool
+    ttl:              float
+    records_per_tank: int
+    bytes_per_tank:   int
+    overhead:         int
+
+    def response_size(self, tanks: int) -> int:
+        """
+        Estimates the size of the response for a number of tanks, in bytes.
+
+        tanks - The amount of tanks the gauge reports.
+        """
+
+        return self.overhead + tanks * self.bytes_per_tank
+
+# Framing around the data of every response, SOH, the command echo, && with the checksum and ETX.
+FRAMING = 1 + 6 + 2 + 4 + 1
+
+# How often each report changes, as (volatile, ttl in seconds, records per tank). Inventory
+# and alarms change all the time, histories when something happens and setup hardly ever.
+_USAGE = {
+    "101": (True,  0,     1),
+    "102": (False, 86400, 1),
+    "111": (True,  0,     1),
+    "112": (True,  0,     1),
+    "113": (False, 300,   1),
+    "114": (False, 300,   1),
+    "115": (False, 300,   1),
+    "116": (False, 3600,  1),
+    "119": (False, 3600,  10),
+    "11A": (False, 3600,  1),
+    "11B": (False, 3600,  1),
+    "201": (True,  0,     1),
+    "202": (False, 300,   10),
+    "203": (False, 3600,  1),
+    "204": (False, 3600,  3),
+    "205": (True,  0,     1),
+    "206": (False, 900,   10),
+    "207": (False, 900,   10),
+    "208": (False, 900,   10),
+    "21A": (True,  0,     1),
+    "21B": (False, 300,   10),
+    "221": (False, 300,   10),
+    "251": (False, 3600,  1)
+}
+
+# The usage assumed for functions without a row, volatile so their responses are never reused.
+_VOLATILE = (True, 0, 1)
+
+def command(code: str) -> Command:
+    """
+    Returns the registry entry for a function code.
+
+    code - The function code, such as "201", or a full command such as "i20100".
+    """
+
+    if len(code) > 3: code = code[1:4]
+
+    try:                return COMMANDS[code.upper()]
+    except KeyError:    raise ValueError(f"Function {code} is not implemented.") from None
+
+def _sizes(code: str, records: int) -> tuple:
+    """
+    Estimates the bytes a tank adds to a response and the bytes around them.
+
+    code - The function code.
+
+    records - The amount of records a tank typically contributes.
+    """
+
+    layout = tls_3xx.LAYOUTS.get(code)
+
+    # Function 205 has no layout, a tank takes four characters and six with an alarm.
+    if layout is None: return 5 * records, FRAMING + 10
+
+    body = layout.body
+
+    if type(body) == Records: return body.length * records, FRAMING + body.start
+
+    header_length = max(field.end for field in body.header + (body.count,))
+
+    return header_length + body.item_length * records, FRAMING + body.start
+
+def _command(code: str, volatile: bool, ttl: float, records: int) -> Command:
+    """
+    Builds the registry entry for a function code.
+
+    code - The function code.
+
+    volatile - Whether the report changes between polls.
+
+    ttl - How long a response can be reused for, in seconds.
+
+    records - The amount of records a tank typically contributes.
+    """
+
+    return Command(code, getattr(tls_3xx, "_parse_" + code), getattr(tls_3xx, "function_" + code),
+                   volatile, ttl, records, *_sizes(code, records))
+
+# Every function code tls_3xx.py implements, by code.
+COMMANDS = {code: _command(code, *_USAGE.get(code, _VOLATILE)) for code in sorted(tls_3xx.PARSERS)}
+
+class TtlCache:
+    """
+    Keeps the responses to commands for as long as the registry says they can
+    be reused, so static reports are not re-issued every poll. Volatile
+    commands are never stored. Expired responses are dropped whenever one is
+    stored, and the least recently used once maxsize is reached, so gauges
+    that stop being polled do not keep theirs forever.
+
+    get() - Return the response stored for a command, if it is still fresh.
+
+    put() - Store the response to a command.
+
+    clear() - Forget every stored response.
+    """
+
+    def __init__(self, clock = monotonic, maxsize: int = 1024):
+        """
+        clock - The function returning the current time in seconds.
+
+        maxsize - The most responses kept, the least recently used is dropped first.
+        """
+
+        if not type(maxsize) == int: raise ValueError("Argument 'maxsize' must be an integer.")
+        if not maxsize > 0:          raise ValueError("Argument 'maxsize' must be greater than zero.")
+
+        self.clock   = clock
+        self.maxsize = maxsize
+
+        self._responses = OrderedDict()
+        self._lock      = Lock()
+
+    def __len__(self):
+        return len(self._responses)
+
+    def get(self, endpoint: tuple, command: str):
+        """
+        Returns the stored response to a command, or None when there is none
+        or it has expired.
+
+        endpoint - Identifies the gauge, such as its (ip, port).
+
+        command - The command that was executed, such as "i10200".
+        """
+
+        with self._lock:
+            entry = self._responses.get((endpoint, command))
+            if entry is None: return None
+
+            expires, response = entry
+
+            if self.clock() < expires:
+                self._responses.move_to_end((endpoint, command))
+                return response
+
+            del self._responses[(endpoint, command)]
+
+        return None
+
+    def put(self, endpoint: tuple, command: str, response: str):
+        """
+        Stores the response to a command until its TTL runs out, dropping
+        every response that has already expired.
+
+        endpoint - Identifies the gauge, such as its (ip, port).
+
+        command - The command that was executed, such as "i10200".
+
+        response - The response to store.
+        """
+
+        # Only computer format responses are reused, display format is for people watching.
+        entry = COMMANDS.get(command[1:4].upper()) if command[:1] == "i" else None
+        if entry is None or entry.volatile or entry.ttl <= 0: return
+
+        with self._lock:
+            now = self.clock()
+
+            for key in [key for key, (expires, _) in self._responses.items() if expires <= now]:
+                del self._responses[key]
+
+            self._responses[(endpoint, command)] = (now + entry.ttl, response)
+            self._responses.move_to_end((endpoint, command))
+
+            if len(self._responses) > self.maxsize: self._responses.popitem(last=False)
+
+    def clear(self):
+        """
+        Forgets every stored response.
+        """
+
+        with self._lock:
+            self._responses.clear()
@@ -1,28 +1,154 @@
 # socket.py - Defines the socket used to connect to TLS automatic tank gauges.
 
-from time import sleep
+from select import select
+from time import monotonic
+import errno
+import os
 import socket
 
-class TlsSocket:
+from veeder_root_tls_socket_library import checksum
+
+class TlsFraming:
+    """
+    Framing, checksum and error handling shared by every transport that talks 
+    to a TLS automatic tank gauge, in accordance with Veeder-Root Serial 
+    Interface Manual 576013-635.
+    """
+
+    def _build_command(self, command: str, etx: bytes) -> tuple:
+        """
+        Validates a command and wraps it for transmission, returning the bytes 
+        to send and whether the command uses Display format.
+
+        command - The function code you would like to execute.
+
+        etx - The end of transmission byte used by the ATG.
+        """
+
+        # Validating function arguments prior to executing any commands.
+        if not command:              raise ValueError("Argument 'command' cannot be empty.")
+        if not type(command) == str: raise ValueError("Argument 'command' must be a string.")
+
+        if not etx:                  raise ValueError("Argument 'etx' cannot be empty.")
+        if not type(etx) == bytes:   raise ValueError("Argument 'etx' must be a bytecode.")
+
+        # Setting up foundational variables.
+        soh = b"\x01"
+        end = b"\r\n" # Fixes an error when executing command i72E.
+
+        byte_command = soh + bytes(command, "utf-8") + end
+        is_display   = command[0].isupper()
+
+        return byte_command, is_display
+
+    def _handle_response(self, byte_response: bytes, 
+                          byte_command: bytes, is_display: bool) -> str:
+        """
+        Handles responses from the TLS system after executing a command.
+
+        byte_response - Response from the TLS system, as bytes, a bytearray or 
+        a memoryview. It is decoded exactly once, without copying it first.
+
+        byte_command - The command that was executed to get the response.
+
+        is_display - Used to determine if the command uses Display format.
+        """
+
+        view = memoryview(byte_response)
+
+        # Validate that the generic error was not returned.
+        if view[:9] == b"\x019999FF1B": 
+            raise ValueError("Unsupported command for this server.")
+
+        # Check checksum position & value if non-Display format command is used.
+        if is_display:
+            # Removes SOH and ETX from being shown in output.
+            response = str(view[1:-1], "utf-8")
+
+            # Checks for and removes newlines at both ends of output.
+            if response[:4]  == "\r\n\r\n": response = response[4:]
+            if response[-4:] == "\r\n\r\n": response = response[:-4]
+        else:
+            checksum_separator = b"&&"
+            checksum_separator_position  = view[-7:-5]
+
+            if checksum_separator != checksum_separator_position:
+                raise ValueError("Checksum missing from command response.")
+
+            if not self._data_integrity_check(view):
+                raise ValueError("Data integrity invalidated due to invalid checksum.")
+            
+            # Removes SOH, command, checksum, and ETX from being shown in output.
+            response = str(view[7:-7], "utf-8")
+
+        return response
+
+    def _check_echo(self, byte_response: bytes, byte_command: bytes):
+        """
+        Raises ValueError unless a response starts with SOH and echoes the 
+        command it answers, so a late response to an earlier command is never 
+        returned as the answer to this one. The generic error is left for 
+        _handle_response to report.
+
+        byte_response - Response from the TLS system.
+
+        byte_command - The command that was executed to get the response.
+        """
+
+        view = memoryview(byte_response)
+        if view[:9] == b"\x019999FF1B": return
+
+        # Computer format echoes the command after SOH, Display format after a blank line.
+        echo = bytes(byte_command[1:-2][:6])
+
+        if view[:1] != b"\x01" or echo not in view[:16].tobytes():
+            raise ValueError("Response does not match its command.")
+
+    def _data_integrity_check(self, byte_response: bytes) -> bool:
+        """
+        Verifies whether or not a command response retains its integrity
+        after transmission by comparing it against the response checksum.
+
+        response - Full command response up the checksum itself. Must include
+        the start of header, command, response data, and the && separator.
+        """
+
+        return checksum.verify(byte_response)
+
+class TlsSocket(TlsFraming):
     """
     Defines a socket for the TLS automatic tank gauges 
     manufactured by Veeder-Root.
 
     execute() - Used to send a command and view the output in accordance with 
     Veeder-Root Serial Interface Manual 576013-635.
+
+    execute_many() - Used to send several commands back to back and view 
+    each of their outputs.
     """
 
-    def __init__(self, ip: str, port: int):
+    def __init__(self, ip: str, port: int, connect_timeout: float = 10, recorder = None):
         self.ip = ip
         self.port = port
+        self.last_used = monotonic()
+
+        # An optional capture.CaptureWriter that every raw response is recorded to.
+        self.recorder = recorder
+
+        # Cleared the first time the gauge mishandles back to back commands.
+        self.pipelining = True
+
+        # The size receive buffers start at, learned from previous responses.
+        self._receive_capacity = 1200
 
         socket_connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
         try:
-            socket_connection.connect((self.ip, self.port))
+            self._connect(socket_connection, connect_timeout)
             self.socket = socket_connection
         
         except Exception as exception:
+            socket_connection.close()
             raise exception
         
     def __str__(self):
@@ -32,8 +158,69 @@ class TlsSocket:
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connect(self, socket_connection: socket.socket, connect_timeout: float):
+        """
+        Connects without blocking so an unreachable Lantronix fails after 
+        connect_timeout seconds rather than the operating system default.
+
+        socket_connection - The unconnected socket to use.
+
+        connect_timeout - The amount of time to wait for the connection.
+        """
+
+        # Keep idle connections alive and send short commands immediately.
+        socket_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+            socket_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+            socket_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+
+        socket_connection.setblocking(False)
+        error = socket_connection.connect_ex((self.ip, self.port))
+
+        if error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            _, writable, _ = select([], [socket_connection], [], connect_timeout)
+            if not writable: 
+                raise TimeoutError(f"Timed out connecting to {self.ip}:{self.port}.")
+
+            error = socket_connection.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+        if error: raise ConnectionError(f"Could not connect to {self.ip}:{self.port} " \
+                                        f"({os.strerror(error)}).")
+
+        socket_connection.setblocking(True)
+
+    def close(self):
+        """
+        Closes the connection to the TLS system.
+        """
+
+        self.socket.close()
+
+    def is_alive(self) -> bool:
+        """
+        Cheaply checks whether an idle connection is still usable without 
+        sending a command. Any unsolicited bytes left on the connection are 
+        discarded so they cannot be mistaken for the next response.
+        """
+
         socket = self.socket
-        socket.close()
+        if socket.fileno() == -1: return False
+
+        try:
+            while True:
+                readable, _, _ = select([socket], [], [], 0)
+                if not readable: return True
+
+                # A readable socket with nothing to read has been closed by the peer.
+                if not socket.recv(1200): return False
+
+        except OSError:
+            return False
 
     def execute(self, 
                 command: str, 
@@ -48,108 +235,228 @@ class TlsSocket:
         command - The function code you would like to execute. 
         Make sure this is in computer format.
 
-        etx - This has a default value (ASCII code 001) and should only be 
+        etx - This has a default value (ASCII code 003) and should only be 
         changed if your ATG is set to use a different end of transmission.
 
-        retries - The amount of times to listen for output before failing.
+        retries - The amount of timeout periods the whole response may take 
+        before failing, the overall deadline is retries * timeout seconds. A 
+        command the gauge never answers raises TimeoutError at the deadline, 
+        30 seconds by default, pass fewer retries to give up sooner.
 
-        timeout - The amount of time to listen per retry.
+        timeout - The length of one of those periods. Pauses in the output 
+        are only limited by the overall deadline.
 
         data_size - The maximum amount of bytes to listen for at any time.
         Set to 1200 by default, as the maximum baud rate (bits per second)
         that a Veeder-Root automatic tank gauge can send is 9600.
         """
 
-        # Validating function arguments prior to executing any commands.
-        if not command:              raise ValueError("Argument 'command' cannot be empty.")
-        if not type(command) == str: raise ValueError("Argument 'command' must be a string.")
-
-        if not etx:                  raise ValueError("Argument 'etx' cannot be empty.")
-        if not type(etx) == bytes:   raise ValueError("Argument 'etx' must be a bytecode.")
-
-        # Setting up foundational variables.
         socket = self.socket
-        soh    = b"\x01"
-        end    = b"\r\n" # Fixes an error when executing command i72E.
+        byte_command, is_display = self._build_command(command, etx)
 
-        byte_command = soh + bytes(command, "utf-8") + end
-        is_display   = command[0].isupper()
-
-        # Send command and repeatedly receive data in chunks until ETX is found.
-        byte_response = b""
+        # Send command, then receive data as soon as it arrives until ETX is found.
+        try:
+            socket.settimeout(timeout)
+            socket.sendall(byte_command)
+            sent_at = monotonic()
 
-        socket.settimeout(timeout)
-        socket.sendall(byte_command)
+            byte_response = self._receive(etx, sent_at + retries * timeout, data_size)
+            self._check_echo(byte_response, byte_command)
 
-        for _ in range(0, retries):
-            sleep(timeout)
+        except (OSError, ValueError):
+            # Whatever is still on its way would be taken for the response to the next command.
+            self.close()
+            raise
 
-            try:                 
-                chunk = socket.recv(data_size)
-                byte_response += chunk
-                if chunk.endswith(etx): break
+        self.last_used = monotonic()
 
-            except TimeoutError: 
-                raise ValueError("Invalid command.")
+        if self.recorder is not None:
+            self.recorder.record(command, byte_response, duration=self.last_used - sent_at)
     
         return self._handle_response(byte_response, byte_command, is_display)
-    
-    def _handle_response(self, byte_response: bytes, 
-                          byte_command: bytes, is_display: bool) -> str:
+
+    def execute_many(self,
+                     commands: list,
+                     etx: bytes = b"\x03",
+                     retries: int = 30,
+                     timeout: int = 1,
+                     data_size: int = 1200) -> list:
         """
-        Handles responses from the TLS system after executing a command.
+        Sends several commands at once and returns their outputs in order, 
+        removing the idle gaps between commands on slow serial links. The 
+        responses are told apart by their SOH, command echo and ETX framing. 
+        If the gauge drops, reorders or rejects any of them, the commands 
+        are run one at a time with execute() instead. If the connection 
+        fails, it is closed and the error is raised.
 
-        byte_response - Response from the TLS system.
+        commands - A list of function codes you would like to execute.
 
-        byte_command - The command that was executed to get the response.
+        etx - The end of transmission byte used by the ATG.
 
-        is_display - Used to determine if the command uses Display format.
+        retries - The amount of timeout periods all of the responses may 
+        take before failing, the overall deadline is retries * timeout seconds.
+
+        timeout - The length of one of those periods, also the quiet time 
+        that ends a drain when pipelining fails.
+
+        data_size - The maximum amount of bytes to listen for at any time.
         """
 
-        # Validate that the generic error was not returned.
-        if b"\x019999FF1B" in byte_response: 
-            raise ValueError("Unsupported command for this server.")
+        if not type(commands) == list: raise ValueError("Argument 'commands' must be a list.")
 
-        # Check checksum position & value if non-Display format command is used.
-        if is_display:
-            # Removes SOH and ETX from being shown in output.
-            response = byte_response.decode("utf-8")[1:][:-1]
+        built = [self._build_command(command, etx) for command in commands]
 
-            # Checks for and removes newlines at both ends of output.
-            if response[:4]  == "\r\n\r\n": response = response[4:]
-            if response[-4:] == "\r\n\r\n": response = response[:-4]
-        else:
-            checksum_separator = b"&&"
-            checksum_separator_position  = byte_response[-7:-5]
+        if self.pipelining and len(commands) > 1:
+            socket = self.socket
 
-            if checksum_separator not in checksum_separator_position:
-                raise ValueError("Checksum missing from command response.")
+            try:
+                socket.settimeout(timeout)
+                socket.sendall(b"".join(byte_command for byte_command, _ in built))
+                sent_at = monotonic()
 
-            if not self._data_integrity_check(byte_response):
-                raise ValueError("Data integrity invalidated due to invalid checksum.")
-            
-            # Removes SOH, command, checksum, and ETX from being shown in output.
-            response = byte_response.decode("utf-8")[7:][:-7]
+                try:
+                    byte_response = self._receive(etx, sent_at + retries * timeout, 
+                                                  data_size, frames=len(commands))
+                except TimeoutError:
+                    byte_response = None
+                    self.pipelining = False
 
-        return response
+                try:
+                    frames = self._split_frames(byte_response, commands, etx) if byte_response else None
+                except ValueError:
+                    frames = None
 
-    def _data_integrity_check(self, byte_response: bytes) -> bool:
+                # Throw away whatever is left of the pipelined responses before retrying.
+                if frames is None: self._drain(timeout)
+
+            except OSError:
+                # A half-sent or half-read pipeline would be taken for the responses to the next commands.
+                self.close()
+                raise
+
+            self.last_used = monotonic()
+
+            if frames is not None:
+                if self.recorder is not None:
+                    for command, frame in zip(commands, frames):
+                        self.recorder.record(command, frame, duration=self.last_used - sent_at)
+
+                return [self._handle_response(frame, byte_command, is_display)
+                        for frame, (byte_command, is_display) in zip(frames, built)]
+
+        return [self.execute(command, etx, retries, timeout, data_size) for command in commands]
+
+    def _split_frames(self, byte_response: bytes, commands: list, etx: bytes) -> list:
         """
-        Verifies whether or not a command response retains its integrity
-        after transmission by comparing it against the response checksum.
+        Splits the output of pipelined commands into one frame per command, 
+        raising ValueError if any frame is missing, out of order or rejected.
 
-        response - Full command response up the checksum itself. Must include
-        the start of header, command, response data, and the && separator.
+        byte_response - The combined output from the TLS system. The frames 
+        returned are memoryviews over it.
+
+        commands - The commands that were sent, in order.
+
+        etx - The end of transmission byte used by the ATG.
+        """
+
+        view   = memoryview(byte_response)
+        frames = []
+        start  = 0
+
+        # Slice each frame out of the shared buffer rather than copying it.
+        while len(frames) <= len(commands):
+            end = byte_response.find(etx, start)
+            if end == -1: break
+
+            frames.append(view[start:end + len(etx)])
+            start = end + len(etx)
+
+        if len(frames) != len(commands): 
+            self.pipelining = False
+            raise ValueError("Pipelined responses are incomplete.")
+
+        for frame, command in zip(frames, commands):
+            # Computer format echoes the command after SOH, Display format after a blank line.
+            echo = bytes(command[:6], "utf-8")
+
+            if frame[:1] != b"\x01" or echo not in frame[:16].tobytes():
+                # A rejected command is not the gauge's fault, anything else means it cannot pipeline.
+                if frame[:9] != b"\x019999FF1B": self.pipelining = False
+
+                raise ValueError("Pipelined response does not match its command.")
+
+        return frames
+
+    def _drain(self, timeout: float):
+        """
+        Reads and discards output until the TLS system has been quiet for 
+        timeout seconds.
+
+        timeout - The amount of quiet time that ends the drain.
+        """
+
+        socket = self.socket
+
+        while select([socket], [], [], timeout)[0]:
+            if not socket.recv(1200): break
+
+    def _receive(self, etx: bytes, deadline: float, 
+                 data_size: int, frames: int = 1) -> bytearray:
         """
+        Receives chunks of a response from the TLS system, returning the 
+        moment the last expected ETX arrives instead of sleeping between reads.
+        Chunks are read straight into one growable buffer and only the newly 
+        read bytes are searched for ETX, so long reports stay linear in size. 
+        Bytes that follow the last expected ETX are discarded. A TimeoutError 
+        is raised if the response is not complete by the deadline.
+
+        etx - The end of transmission byte that terminates a response.
+
+        deadline - A time.monotonic() value the whole response must arrive by.
+
+        data_size - The maximum amount of bytes to read per chunk.
+
+        frames - The amount of ETX terminated responses to wait for.
+        """
+
+        socket = self.socket
+        byte_response = bytearray(max(self._receive_capacity, data_size))
+        length = 0
+        etx_count = 0
+
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0: raise TimeoutError(f"Timed out waiting for a response from {self.ip}:{self.port}.")
+
+            # Wait until the socket is readable rather than for a fixed period.
+            readable, _, _ = select([socket], [], [], remaining)
+            if not readable: continue
+
+            # Double the buffer whenever the next chunk might not fit.
+            if len(byte_response) - length < data_size:
+                byte_response.extend(bytes(len(byte_response)))
+
+            with memoryview(byte_response)[length:] as free_space:
+                received = socket.recv_into(free_space, data_size)
+
+            if not received: raise ConnectionError("Connection closed by the TLS system.")
+
+            end = length
+            length += received
+
+            # A chunk may carry bytes past the last ETX, so look for each ETX in the new bytes.
+            while etx_count < frames:
+                end = byte_response.find(etx, end, length)
+                if end == -1: break
+
+                end += len(etx)
+                etx_count += 1
 
-        response = byte_response.decode()
-        message  = response[:-5]
-        checksum = response[-5:-1]
-        integrity_threshold = "0b10000000000000000"
+            if etx_count >= frames: break
 
-        # Calculate the 16-bit binary count of the message.
-        message_sum = sum(ord(char) for char in message) & 0xFFFF
-        checksum_int = int(checksum, 16)
+        # Drop anything after the last response along with the unused space, 
+        # and remember roughly how much the next response needs.
+        del byte_response[end:]
+        self._receive_capacity = min(max(length, 1200), 65536)
 
-        # Compare sum of checksum and message to expected result.
-        return bin(message_sum + checksum_int) == integrity_threshold
\ No newline at end of file
+        return byte_response
@@ -0,0 +1,296 @@
+# sync.py - Fetches only the history records a TLS system has added since the last poll.
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from hashlib import blake2b
+import json
+import os
+
+# Commits are serialised with fcntl where it exists and msvcrt on Windows.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.socket import TlsSocket
+
+# The history reports that can be synced, with the prefix of the fields holding
+# the time of each record, or None for reports whose records carry no time.
+HISTORIES = {
+    "119": "",
+    "202": "start_",
+    "204": None,
+    "206": "",
+    "207": "",
+    "208": "",
+    "21B": "start_",
+    "221": ""
+}
+
+# The amount of deliveries function 21B is first asked for per tank once a
+# watermark exists, doubled until the report reaches back to the watermark.
+FIRST_DELIVERIES = 2
+
+class HistorySync:
+    """
+    Keeps a watermark per store, report and tank, the time of the newest
+    record already synced, and returns only records newer than it. Function
+    119 is asked for the dates from the watermark on, every other report is
+    filtered locally. Records sharing the watermark's minute are told apart
+    by a stable key, as are the records of reports without times, so a
+    record is never returned twice.
+
+    Watermarks only move when commit() is called, so records that were
+    fetched but never stored are fetched again on the next poll. Several
+    stores, in one process or several, can share a file.
+
+    sync() - Fetch the records of a report added since its watermark.
+
+    commit() - Save the watermarks of every record returned so far.
+    """
+
+    def __init__(self, path: str, store: str):
+        """
+        path - The JSON file the watermarks are kept in, created if missing.
+
+        store - The name of the store the watermarks belong to.
+        """
+
+        if not type(store) == str or not store: raise ValueError("Argument 'store' must be a non-empty string.")
+
+        self.path = path
+        self.store = store
+
+        self._watermarks = _load(path)
+
+        self._pending = {}
+
+    def sync(self, tls: TlsSocket, code: str, tank: str = "00") -> list:
+        """
+        Runs a history report and returns the records added since the
+        watermark of each tank, oldest first. Records of grouped reports
+        gain the tank_number of their group.
+
+        tls - A socket for a TLS device, should be created with the tlsSocket class.
+
+        code - The function code of the report, a key of HISTORIES.
+
+        tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
+        """
+
+        if not code in HISTORIES: raise ValueError(f"Argument 'code' must be one of {', '.join(HISTORIES)}.")
+
+        prefix = HISTORIES[code]
+        marks = self._watermarks.get(self.store, {}).get(code, {})
+        new = []
+
+        for tank_number, records in _fetch(tls, code, tank, marks).items():
+            mark = marks.get(tank_number, {"time": "", "keys": []})
+            seen = set(mark["keys"])
+            latest, latest_keys = mark["time"], set(seen)
+
+            # Reports without times are resent whole, so only their current keys are kept.
+            if prefix is None: latest_keys = set()
+
+            for record in records:
+                time = "" if prefix is None else _time(record, prefix)
+                key = record_key(code, tank_number, record)
+
+                if prefix is None: latest_keys.add(key)
+                if time < mark["time"] or key in seen: continue
+
+                new.append(record)
+
+                # The keys of the newest minute are kept to recognise its records next time.
+                if time > latest: latest, latest_keys = time, set()
+                if time == latest: latest_keys.add(key)
+
+            self._pending.setdefault(code, {})[tank_number] = {"time": latest, "keys": sorted(latest_keys)}
+
+        if prefix is not None: new.sort(key=lambda record: _time(record, prefix))
+
+        return new
+
+    def commit(self):
+        """
+        Saves the watermarks of every record returned by sync() since the
+        last commit. The file is read again and merged under a lock, so the
+        watermarks other stores committed meanwhile are kept, and replaced
+        in one step so a crash cannot leave it half written.
+        """
+
+        with _locked(self.path):
+            self._watermarks = _load(self.path)
+            store = self._watermarks.setdefault(self.store, {})
+
+            for code, marks in self._pending.items():
+                store.setdefault(code, {}).update(marks)
+
+            temporary = self.path + ".tmp"
+
+            with open(temporary, "w") as file:
+                json.dump(self._watermarks, file, indent=4, sort_keys=True)
+
+            os.replace(temporary, self.path)
+
+        self._pending = {}
+
+def record_key(code: str, tank: str, record: dict) -> str:
+    """
+    Returns a key that stays the same every time a TLS system reports the
+    same history record, a digest of the report, tank and every field.
+
+    code - The function code of the report.
+
+    tank - The tank number the record belongs to.
+
+    record - The record, as returned by the tls_3xx parser.
+    """
+
+    text = json.dumps([code, tank, record], sort_keys=True)
+
+    return blake2b(text.encode(), digest_size=12).hexdigest()
+
+def _load(path: str) -> dict:
+    """
+    Returns the watermarks saved in a file, or none if it does not exist yet.
+
+    path - The JSON file the watermarks are kept in.
+    """
+
+    try:
+        with open(path, "r") as file: return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+@contextmanager
+def _locked(path: str):
+    """
+    Holds an exclusive lock on a file beside the watermarks file, which is
+    replaced on every commit and so cannot be locked itself.
+
+    path - The JSON file the watermarks are kept in.
+    """
+
+    with open(path + ".lock", "a+b") as file:
+        file.seek(0)
+
+        if fcntl: fcntl.flock(file, fcntl.LOCK_EX)
+        else:     msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl: fcntl.flock(file, fcntl.LOCK_UN)
+            else:     msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _fetch(tls: TlsSocket, code: str, tank: str, marks: dict) -> dict:
+    """
+    Runs a history report and returns its records grouped by tank number.
+
+    tls - A socket for a TLS device.
+
+    code - The function code of the report.
+
+    tank - The tank number to run the report for.
+
+    marks - The watermarks of the report, by tank number.
+    """
+
+    if code == "119":
+        # The gauge only filters by day, the rest of the watermark's day is filtered locally.
+        mark = marks.get("00", {}).get("time", "")
+        if not mark: return {"00": tls_3xx.function_119(tls)["records"]}
+
+        end_date = (datetime.now() + timedelta(days=1)).strftime("%y%m%d")
+        return {"00": tls_3xx.function_119(tls, mark[:6], max(end_date, mark[:6]))["records"]}
+
+    if code == "204":
+        tanks = {}
+
+        for record in tls_3xx.function_204(tls, tank)["inventory"]:
+            tanks.setdefault(record["tank_number"], []).append(record)
+
+        return tanks
+
+    if code == "202":
+        tanks = {}
+
+        for group in tls_3xx.function_202(tls, tank)["tanks"]:
+            tanks.setdefault(group["tank_number"], []).extend(
+                {**delivery, "tank_number": group["tank_number"]} for delivery in group["deliveries"])
+
+        return tanks
+
+    if code == "21B": return _fetch_deliveries(tls, tank, marks)
+
+    if code == "221": report = tls_3xx.function_221(tls, tank, True)
+    else:             report = getattr(tls_3xx, "function_" + code)(tls, tank)
+
+    return _by_tank(report)
+
+def _fetch_deliveries(tls: TlsSocket, tank: str, marks: dict) -> dict:
+    """
+    Runs function 21B for as few of the latest deliveries per tank as reach
+    back to the watermarks, so each poll transfers little more than the new
+    deliveries. The count starts at FIRST_DELIVERIES and doubles until every
+    tank returns a delivery at or before its watermark, or fewer deliveries
+    than were asked for. Without watermarks all 99 are fetched at once.
+
+    tls - A socket for a TLS device.
+
+    tank - The tank number to run the report for.
+
+    marks - The watermarks of the report, by tank number.
+    """
+
+    deliveries = FIRST_DELIVERIES if marks else 99
+
+    while True:
+        tanks = _by_tank(tls_3xx.function_21B(tls, tank, deliveries))
+
+        if deliveries == 99 or all(_reaches(records, marks.get(tank_number, {}).get("time", ""), deliveries)
+                                   for tank_number, records in tanks.items()):
+            return tanks
+
+        deliveries = min(deliveries * 2, 99)
+
+def _reaches(records: list, mark: str, deliveries: int) -> bool:
+    """
+    Returns whether the latest deliveries of a tank hold every delivery
+    newer than its watermark.
+
+    records - The deliveries returned for the tank.
+
+    mark - The time of the tank's watermark, empty if it has none.
+
+    deliveries - The amount of deliveries that were asked for.
+    """
+
+    if len(records) < deliveries: return True
+
+    return bool(mark) and min(_time(record, "start_") for record in records) <= mark
+
+def _by_tank(report: dict) -> dict:
+    """
+    Returns the records of a grouped report by tank number, each tagged
+    with the tank_number of its group.
+
+    report - The report, as returned by the tls_3xx function.
+    """
+
+    return {tank_number: [{**record, "tank_number": tank_number} for record in records]
+            for tank_number, records in report["tanks"].items()}
+
+def _time(record: dict, prefix: str) -> str:
+    """
+    Returns the time of a record as yymmddhhmm, which sorts in time order.
+
+    record - The record holding the time.
+
+    prefix - The prefix of its time fields, such as "start_".
+    """
+
+    return "".join(f"{record[prefix + name]:02}" for name in ("year", "month", "day", "hour", "minute"))
@@ -1,1085 +1,613 @@
 # tls_3xx.py - A series of functions used to extract data from TLS system outputs.
 
-from veeder_root_tls_socket_library.format import _get_timestamp, _split_data, _hex_to_float
+from functools import partial
+import inspect
+
+from veeder_root_tls_socket_library.columnar import compile_columnar
+from veeder_root_tls_socket_library.compact import compile_compact
+from veeder_root_tls_socket_library.format import _get_timestamp
+from veeder_root_tls_socket_library.lazy import compile_lazy
+from veeder_root_tls_socket_library.layout import Field, Groups, Layout, Records, TIMESTAMP, compile_layout
 from veeder_root_tls_socket_library.socket import TlsSocket
 
-def function_101(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 101 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+# The layout of every response parsed by a compiled parser, by function code.
+LAYOUTS = {}
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+# The dict parser of every function, by function code. Filled in from LAYOUTS at the
+# end of this file, functions without a layout add their hand-written parser here.
+PARSERS = {}
 
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
+# Compiles the parser for each result mode other than "dict" from a layout.
+MODES = {
+    "columnar": compile_columnar,
+    "compact":  compile_compact,
+    "lazy":     compile_lazy
+}
 
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
+# Parsers compiled for the other result modes, by function code and mode.
+_DECODERS = {}
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i101" + tank)    
-    data = _get_timestamp(response)
-    
-    data["alarms"] = []
+# When set to a cache.ResponseCache, "dict" mode reports are cached by response
+# so repeated polls of unchanged reports are not parsed again.
+response_cache = None
 
-    # Get values from the remaining data, split up alarms.
-    response = response[10:]
-    data_length = 6
+# The four station header lines that follow the timestamp in several reports.
+STATION_HEADERS = (
+    Field("station_header_1", 10, 30, "strip"),
+    Field("station_header_2", 30, 50, "strip"),
+    Field("station_header_3", 50, 70, "strip"),
+    Field("station_header_4", 70, 90, "strip")
+)
 
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category": int(value[0:2]),
-                "alarm_type":     int(value[2:4]),
-                "tank_number":    value[4:6]
-            })
-
-    return data
-        
-def function_102(tls: TlsSocket) -> dict:
+def _check_tank(tank: str):
     """
-    Runs function 102 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    Validates a tank number argument before it is used in a command.
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
     """
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i10200")    
-    data = _get_timestamp(response)
-    
-    data["slots"] = []
-
-    # Get values from the remaining data, split up slots.
-    response = response[12:]
-    data_length = 20
-
-    # Get values from each slot.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["slots"].append({
-                "slot_number":        int(value[0:2], 16),
-                "type_of_module":     value[2:4],
-                "power_on_reset":     _hex_to_float(value[4:12]),
-                "current_io_reading": _hex_to_float(value[12:19])
-            })
-
-    return data
-
-def function_111(tls: TlsSocket) -> dict:
-    """
-    Runs function 111 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
+    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
+    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+def _tank_command(code: str, tank: str) -> str:
     """
+    Validates the arguments for a function that reports on tanks and builds
+    its command.
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11100")    
-    data = _get_timestamp(response)
-    
-    data["alarms"] = []
+    code - The function code.
 
-    # Get values from the remaining data, split up alarms.
-    response = response[10:]
-    data_length = 20
-
-    # Get values from each alarm.
-    if len(response) >= data_length:
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category":  int(value[0:2]),
-                "sensor_category": int(value[2:4]),
-                "alarm_type":      int(value[4:6]),
-                "tank_number":     value[6:8],
-                "alarm_state":     int(value[8:10]),
-                "year":            int(value[10:12]),
-                "month":           int(value[12:14]),
-                "day":             int(value[14:16]),
-                "hour":            int(value[16:18]),
-                "minute":          int(value[18:20])
-            })
-        
-    return data
-
-def function_112(tls: TlsSocket) -> dict:
-    """
-    Runs function 112 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
     """
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11200")    
-    data = _get_timestamp(response)
-    
-    data["alarms"] = []
-
-    # Get values from the remaining data, split up alarms.
-    response = response[10:]
-    data_length = 20
+    _check_tank(tank)
 
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category":  int(value[0:2]),
-                "sensor_category": int(value[2:4]),
-                "alarm_type":      int(value[4:6]),
-                "tank_number":     value[6:8],
-                "alarm_state":     int(value[8:10]),
-                "year":            int(value[10:12]),
-                "month":           int(value[12:14]),
-                "day":             int(value[14:16]),
-                "hour":            int(value[16:18]),
-                "minute":          int(value[18:20])
-            })
-    
-    return data
+    return "i" + code + tank
 
-def function_113(tls: TlsSocket) -> dict:
+def _system_command(code: str) -> str:
     """
-    Runs function 113 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    Builds the command for a function that reports on the whole system.
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    code - The function code.
     """
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11300")
-    data = _get_timestamp(response)
+    return "i" + code + "00"
 
-    # Store extra non-repeated info from this response.
-    data["station_header_1"] = response[10:30].strip()
-    data["station_header_2"] = response[30:50].strip()
-    data["station_header_3"] = response[50:70].strip()
-    data["station_header_4"] = response[70:90].strip()
-    
-    data["alarms"] = []
-
-    # Get values from the remaining data, split up alarms.
-    response = response[90:]
-    data_length = 18
-
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category":  int(value[0:2]),
-                "sensor_category": int(value[2:4]),
-                "alarm_type":      int(value[4:6]),
-                "tank_number":     value[6:8],
-                "year":            int(value[8:10]),
-                "month":           int(value[10:12]),
-                "day":             int(value[12:14]),
-                "hour":            int(value[14:16]),
-                "minute":          int(value[16:18])
-            })    
-
-    return data
-
-def function_114(tls: TlsSocket) -> dict:
+def _decoder(parser, mode: str):
     """
-    Runs function 114 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    Returns the function that decodes a response in the requested result mode,
+    compiling it from the layout of the dict parser on first use.
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-    """
+    parser - The dict parser for the function, such as _parse_201.
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11400")    
-    data = _get_timestamp(response)
+    mode - The result mode, "dict" or a key of MODES.
+    """
 
-    # Store extra non-repeated info from this response.
-    data["station_header_1"] = response[10:30].strip()
-    data["station_header_2"] = response[30:50].strip()
-    data["station_header_3"] = response[50:70].strip()
-    data["station_header_4"] = response[70:90].strip()
-    
-    data["alarms"] = []
+    if mode == "dict": return parser if response_cache is None else partial(response_cache.parse, parser)
 
-    # Get values from the remaining data, split up alarms.
-    response = response[90:]
-    data_length = 20
+    if not mode in MODES:                 raise ValueError("Argument 'mode' must be 'dict' or one of " \
+                                                           f"{', '.join(map(repr, MODES))}.")
+    if not hasattr(parser, "layout"):     raise ValueError("Argument 'mode' must be 'dict' for this " \
+                                                           "function.")
 
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category":  int(value[0:2]),
-                "sensor_category": int(value[2:4]),
-                "alarm_type":      int(value[4:6]),
-                "tank_number":     value[6:8],
-                "alarm_state":     int(value[8:10]),
-                "year":            int(value[10:12]),
-                "month":           int(value[12:14]),
-                "day":             int(value[14:16]),
-                "hour":            int(value[16:18]),
-                "minute":          int(value[18:20])
-            })
+    key = (parser.layout.code, mode)
 
-    return data
+    if not key in _DECODERS:
+        _DECODERS[key] = MODES[mode](parser.layout)
 
-def function_115(tls: TlsSocket) -> dict:
-    """
-    Runs function 115 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    return _DECODERS[key]
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+def compile_function(code: str, socket_type: type = TlsSocket, awaitable: bool = False):
     """
+    Generates and compiles the function that runs a function code on a socket
+    and returns a dict with report info. It takes the arguments of the code's 
+    command builder followed by a result mode, and its docstring is put 
+    together from the builder's.
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11500")    
-    data = _get_timestamp(response)
+    code - The function code, which must have a parser in PARSERS.
 
-    # Store extra non-repeated info from this response.
-    data["station_header_1"] = response[10:30].strip()
-    data["station_header_2"] = response[30:50].strip()
-    data["station_header_3"] = response[50:70].strip()
-    data["station_header_4"] = response[70:90].strip()
+    socket_type - The socket class the function is annotated with.
 
-    data["alarms"] = []
-
-    # Get values from the remaining data, split up alarms.
-    response = response[90:]
-    data_length = 18
-
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["alarms"].append({
-                "alarm_category":  int(value[0:2]),
-                "sensor_category": int(value[2:4]),
-                "alarm_type":      int(value[4:6]),
-                "tank_number":     value[6:8],
-                "year":            int(value[8:10]),
-                "month":           int(value[10:12]),
-                "day":             int(value[12:14]),
-                "hour":            int(value[14:16]),
-                "minute":          int(value[16:18])
-            })
-
-    return data
-
-def function_116(tls: TlsSocket) -> dict:
+    awaitable - Whether to generate a coroutine function, for sockets whose
+    execute() must be awaited.
     """
-    Runs function 116 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-    """
+    if not code in PARSERS: raise ValueError(f"Function {code} has no parser.")
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11600")    
-    data = _get_timestamp(response)
+    builder = BUILDERS.get(code, _tank_command)
+    parameters = list(inspect.signature(builder).parameters.values())[1:]
 
-    # Store extra non-repeated info from this response.
-    data["station_header_1"] =  response[10:30].strip()
-    data["station_header_2"] =  response[30:50].strip()
-    data["station_header_3"] =  response[50:70].strip()
-    data["station_header_4"] =  response[70:90].strip()
-    data["number_of_records"] = int(response[90:92])
-
-    data["reports"] = []
-
-    # Get values from the remaining data, split up reports.
-    response = response[90:]
-    data_length = 25
-    
-    # Get values from each report.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["reports"].append({
-                "year":         int(value[0:2]),
-                "month":        int(value[2:4]),
-                "day":          int(value[4:6]),
-                "hour":         int(value[6:8]),
-                "minute":       int(value[8:10]),
-                "service_id":   value[10:20].strip(),
-                "service_code": value[20:25].strip()
-            })
-            
-    return data
+    # The builder's docstring describes each of its arguments in a paragraph of its own.
+    paragraphs = inspect.getdoc(builder).split("\n\n")
+    described = [next(paragraph for paragraph in paragraphs if paragraph.startswith(parameter.name + " - "))
+                 for parameter in parameters]
 
-def function_119(tls: TlsSocket, start_date: str = "", end_date: str = "") -> dict:
-    """
-    Runs function 119 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    arguments = ", ".join(parameter.name for parameter in parameters)
+    signature = "".join(f", {parameter.name}: {parameter.annotation.__name__}" + 
+                        ("" if parameter.default is parameter.empty else f" = {parameter.default!r}")
+                        for parameter in parameters)
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    name = "function_" + code
+    namespace = {"__name__": __name__, "_decoder": _decoder, "parser": PARSERS[code],
+                 "builder": builder, socket_type.__name__: socket_type}
 
-    start_date - The beginning of the range of time to look through with this 
-    command (yymmdd format).
+    source = (f"{'async ' if awaitable else ''}def {name}(tls: {socket_type.__name__}{signature}, "
+              f"mode: str = \"dict\") -> dict:\n"
+              f"    command = builder({code!r}{', ' if arguments else ''}{arguments})\n"
+              f"    return _decoder(parser, mode)({'await ' if awaitable else ''}tls.execute(command))\n")
 
-    end_date - The end of the range of time to look through with this command 
-    (yymmdd format).
+    exec(compile(source, f"<function {code}>", "exec"), namespace)
+
+    if awaitable:
+        summary = f"Runs function {code} on a given Veeder-Root TLS device without blocking the \n" \
+                  "event loop and returns a dict with report info."
+        tls = "tls - A socket for a TLS device, should be created with AsyncTlsSocket.connect()."
+    else:
+        summary = f"Runs function {code} on a given Veeder-Root TLS device and returns a dict with \n" \
+                  "report info."
+        tls = "tls - A socket for a TLS device, should be created with the tlsSocket class."
+
+    mode = "mode - How records are returned, \"dict\" for dicts, \"compact\" for records\n" \
+           "with to_dict() that use less memory, \"lazy\" for views that only decode\n" \
+           "the fields that are read or \"columnar\" for NumPy column arrays."
+
+    function = namespace[name]
+    function.__doc__ = "\n\n".join([summary, tls] + described + [mode]) + "\n"
+    function.source = source
+
+    return function
+
+LAYOUTS["101"] = Layout("101", TIMESTAMP, Records("alarms", 10, 6, (
+    Field("alarm_category", 0, 2, "int"),
+    Field("alarm_type",     2, 4, "int"),
+    Field("tank_number",    4, 6)
+)))
+
+LAYOUTS["102"] = Layout("102", TIMESTAMP, Records("slots", 12, 20, (
+    Field("slot_number",        0,  2,  "hex"),
+    Field("type_of_module",     2,  4),
+    Field("power_on_reset",     4,  12, "float"),
+    Field("current_io_reading", 12, 20, "float")
+)))
+
+LAYOUTS["111"] = Layout("111", TIMESTAMP, Records("alarms", 10, 20, (
+    Field("alarm_category",  0,  2,  "int"),
+    Field("sensor_category", 2,  4,  "int"),
+    Field("alarm_type",      4,  6,  "int"),
+    Field("tank_number",     6,  8),
+    Field("alarm_state",     8,  10, "int"),
+    Field("year",            10, 12, "int"),
+    Field("month",           12, 14, "int"),
+    Field("day",             14, 16, "int"),
+    Field("hour",            16, 18, "int"),
+    Field("minute",          18, 20, "int")
+)))
+
+LAYOUTS["112"] = Layout("112", TIMESTAMP, Records("alarms", 10, 20, (
+    Field("alarm_category",  0,  2,  "int"),
+    Field("sensor_category", 2,  4,  "int"),
+    Field("alarm_type",      4,  6,  "int"),
+    Field("tank_number",     6,  8),
+    Field("alarm_state",     8,  10, "int"),
+    Field("year",            10, 12, "int"),
+    Field("month",           12, 14, "int"),
+    Field("day",             14, 16, "int"),
+    Field("hour",            16, 18, "int"),
+    Field("minute",          18, 20, "int")
+)))
+
+LAYOUTS["113"] = Layout("113", TIMESTAMP + STATION_HEADERS, Records("alarms", 90, 18, (
+    Field("alarm_category",  0,  2,  "int"),
+    Field("sensor_category", 2,  4,  "int"),
+    Field("alarm_type",      4,  6,  "int"),
+    Field("tank_number",     6,  8),
+    Field("year",            8,  10, "int"),
+    Field("month",           10, 12, "int"),
+    Field("day",             12, 14, "int"),
+    Field("hour",            14, 16, "int"),
+    Field("minute",          16, 18, "int")
+)))
+
+LAYOUTS["114"] = Layout("114", TIMESTAMP + STATION_HEADERS, Records("alarms", 90, 20, (
+    Field("alarm_category",  0,  2,  "int"),
+    Field("sensor_category", 2,  4,  "int"),
+    Field("alarm_type",      4,  6,  "int"),
+    Field("tank_number",     6,  8),
+    Field("alarm_state",     8,  10, "int"),
+    Field("year",            10, 12, "int"),
+    Field("month",           12, 14, "int"),
+    Field("day",             14, 16, "int"),
+    Field("hour",            16, 18, "int"),
+    Field("minute",          18, 20, "int")
+)))
+
+LAYOUTS["115"] = Layout("115", TIMESTAMP + STATION_HEADERS, Records("alarms", 90, 18, (
+    Field("alarm_category",  0,  2,  "int"),
+    Field("sensor_category", 2,  4,  "int"),
+    Field("alarm_type",      4,  6,  "int"),
+    Field("tank_number",     6,  8),
+    Field("year",            8,  10, "int"),
+    Field("month",           10, 12, "int"),
+    Field("day",             12, 14, "int"),
+    Field("hour",            14, 16, "int"),
+    Field("minute",          16, 18, "int")
+)))
+
+LAYOUTS["116"] = Layout("116", TIMESTAMP + STATION_HEADERS + (
+    Field("number_of_records", 90, 92, "int"),
+), Records("reports", 92, 25, (
+    Field("year",         0,  2,  "int"),
+    Field("month",        2,  4,  "int"),
+    Field("day",          4,  6,  "int"),
+    Field("hour",         6,  8,  "int"),
+    Field("minute",       8,  10, "int"),
+    Field("service_id",   10, 20, "strip"),
+    Field("service_code", 20, 25, "strip")
+)))
+
+def _command_119(code: str, start_date: str = "", end_date: str = "") -> str:
+    """
+    Validates the arguments for function 119 and builds its command.
+
+    code - The function code.
+
+    start_date - The beginning of the range of time to look through (yymmdd format).
+
+    end_date - The end of the range of time to look through (yymmdd format).
     """
 
-    # Execute the command and extract common values from it immediately.
     if len(start_date) == 6 and len(end_date) == 6:
         if start_date.isdigit() and end_date.isdigit():
-            response = tls.execute("i11900" + start_date + end_date) 
+            return "i" + code + "00" + start_date + end_date
         else:
             raise ValueError("The 'start_date' and 'end_date' arguments must be in the format 'YYMMDD'.")
     elif len(start_date) == 0 and len(end_date) == 0: 
-        response = tls.execute("i11900")
+        return "i" + code + "00"
     else:
         raise ValueError("Both 'start_date' and 'end_date' must either be six digits long or empty.")
 
-    data = _get_timestamp(response)
-
-    # Store extra non-repeated info from this response.
-    data["number_of_records"] = int(response[10:14])
-    data["records"] = []
-
-    # Get values from the remaining data, split up records.
-    response = response[14:]
-    data_length = 18
-
-    # Get values from each record.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["records"].append({
-                "year":        int(value[0:2]),
-                "month":       int(value[2:4]),
-                "day":         int(value[4:6]),
-                "hour":        int(value[6:8]),
-                "minute":      int(value[8:10]),
-                "record_type": value[10:12],
-                "data_field":  value[12:18]
-            })
-
-    return data
-
-def function_11A(tls: TlsSocket) -> dict:
-    """
-    Runs function 11A on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-    """
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11A00")    
-    data = _get_timestamp(response)
-
-    # Store extra non-repeated info from this response.
-    data["number_of_records"] = int(response[10:12])
-    data["reports"] = []
-
-    # Get values from the remaining data, split up reports.
-    response = response[12:]
-    data_length = 20
-
-    # Get values from each tank report.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["reports"].append({
-                "year":         int(value[0:2]),
-                "month":        int(value[2:4]),
-                "day":          int(value[4:6]),
-                "hour":         int(value[6:8]),
-                "minute":       int(value[8:10]),
-                "service_id":   value[10:16].strip(),
-                "service_code": value[16:20].strip()
-            })
-        
-    return data
-
-def function_11B(tls: TlsSocket) -> dict:
+LAYOUTS["119"] = Layout("119", TIMESTAMP + (
+    Field("number_of_records", 10, 14, "int"),
+), Records("records", 14, 18, (
+    Field("year",        0,  2,  "int"),
+    Field("month",       2,  4,  "int"),
+    Field("day",         4,  6,  "int"),
+    Field("hour",        6,  8,  "int"),
+    Field("minute",      8,  10, "int"),
+    Field("record_type", 10, 12),
+    Field("data_field",  12, 18)
+)))
+
+LAYOUTS["11A"] = Layout("11A", TIMESTAMP + (
+    Field("number_of_records", 10, 12, "int"),
+), Records("reports", 12, 20, (
+    Field("year",         0,  2,  "int"),
+    Field("month",        2,  4,  "int"),
+    Field("day",          4,  6,  "int"),
+    Field("hour",         6,  8,  "int"),
+    Field("minute",       8,  10, "int"),
+    Field("service_id",   10, 16, "strip"),
+    Field("service_code", 16, 20, "strip")
+)))
+
+LAYOUTS["11B"] = Layout("11B", TIMESTAMP + (
+    Field("service_notice_session", 10, 11, "int"),
+    Field("start_year",             11, 13, "int"),
+    Field("start_month",            13, 15, "int"),
+    Field("start_day",              15, 17, "int"),
+    Field("start_hour",             17, 19, "int"),
+    Field("start_minute",           19, 21, "int"),
+    Field("number_of_records",      21, 23, "hex")
+), Records("reports", 23, 20, (
+    Field("start_year",   0,  2,  "int"),
+    Field("start_month",  2,  4,  "int"),
+    Field("start_day",    4,  6,  "int"),
+    Field("start_hour",   6,  8,  "int"),
+    Field("start_minute", 8,  10, "int"),
+    Field("end_year",     10, 12, "int"),
+    Field("end_month",    12, 14, "int"),
+    Field("end_day",      14, 16, "int"),
+    Field("end_hour",     16, 18, "int"),
+    Field("end_minute",   18, 20, "int")
+)))
+
+LAYOUTS["201"] = Layout("201", TIMESTAMP, Records("tanks", 10, 65, (
+    Field("tank_number",      0,  2),
+    Field("product_code",     2,  3),
+    Field("tank_status_bits", 3,  7,  "hex"),
+    Field("volume",           9,  17, "float"),
+    Field("tc_volume",        17, 25, "float"),
+    Field("ullage",           25, 33, "float"),
+    Field("height",           33, 41, "float"),
+    Field("water",            41, 49, "float"),
+    Field("temperature",      49, 57, "float"),
+    Field("water_volume",     57, 65, "float")
+)))
+
+LAYOUTS["202"] = Layout("202", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number",  0, 2),
+    Field("product_code", 2, 3)
+), Field("delivery_count", 3, 5, "int"), (
+    Field("start_year",         0,  2,   "int"),
+    Field("start_month",        2,  4,   "int"),
+    Field("start_day",          4,  6,   "int"),
+    Field("start_hour",         6,  8,   "int"),
+    Field("start_minute",       8,  10,  "int"),
+    Field("end_year",           10, 12,  "int"),
+    Field("end_month",          12, 14,  "int"),
+    Field("end_day",            14, 16,  "int"),
+    Field("end_hour",           16, 18,  "int"),
+    Field("end_minute",         18, 20,  "int"),
+    Field("starting_volume",    22, 30,  "float"),
+    Field("starting_tc_volume", 30, 38,  "float"),
+    Field("starting_water",     38, 46,  "float"),
+    Field("starting_temp",      46, 54,  "float"),
+    Field("ending_volume",      54, 62,  "float"),
+    Field("ending_tc_volume",   62, 70,  "float"),
+    Field("ending_water",       70, 78,  "float"),
+    Field("ending_temp",        78, 86,  "float"),
+    Field("starting_height",    86, 94,  "float"),
+    Field("ending_height",      94, 102, "float")
+), 102, items_key="deliveries"))
+
+LAYOUTS["203"] = Layout("203", TIMESTAMP, Records("tanks", 10, 57, (
+    Field("tank_number",     0,  2),
+    Field("product_code",    2,  3),
+    Field("start_year",      3,  5,  "int"),
+    Field("start_month",     5,  7,  "int"),
+    Field("start_day",       7,  9,  "int"),
+    Field("start_hour",      9,  11, "int"),
+    Field("start_minute",    11, 13, "int"),
+    Field("test_duration",   13, 15, "int"),
+    Field("starting_temp",   17, 25, "float"),
+    Field("ending_temp",     25, 33, "float"),
+    Field("starting_volume", 33, 41, "float"),
+    Field("ending_rate",     41, 49, "float"),
+    Field("hourly_changes",  49, 57, "float")
+)))
+
+LAYOUTS["204"] = Layout("204", TIMESTAMP, Records("inventory", 10, 111, (
+    Field("tank_number",       0,   2),
+    Field("product_code",      2,   3),
+    Field("shift_number",      3,   5),
+    Field("start_volume",      7,   15,  "float"),
+    Field("start_ullage",      15,  23,  "float"),
+    Field("start_tc_volume",   23,  31,  "float"),
+    Field("start_height",      31,  39,  "float"),
+    Field("start_water",       39,  47,  "float"),
+    Field("start_temperature", 47,  55,  "float"),
+    Field("end_volume",        55,  63,  "float"),
+    Field("end_ullage",        63,  71,  "float"),
+    Field("end_tc_volume",     71,  79,  "float"),
+    Field("end_height",        79,  87,  "float"),
+    Field("end_water",         87,  95,  "float"),
+    Field("end_temperature",   95,  103, "float"),
+    Field("total_value",       103, 111, "float")
+)))
+
+def _parse_205(response: str) -> dict:
+    """
+    Extracts report info from the response to function 205. Tanks only carry
+    an alarm type when they have alarms, so records are not fixed-width and
+    are walked with a position cursor.
+
+    response - Output from the Veeder-Root TLS system.
     """
-    Runs function 11B on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-    """
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i11B00")    
-    data = _get_timestamp(response)
-
-    # Store extra non-repeated info from this response.
-    data["service_notice_session"] = int(response[10:11])
-    data["start_year"] =             int(response[11:13])
-    data["start_month"] =            int(response[13:15])
-    data["start_day"] =              int(response[15:17])
-    data["start_hour"] =             int(response[17:19])
-    data["start_minute"] =           int(response[19:21])
-    data["number_of_records"] =      int(response[21:23], 16)
-
-    data["reports"] = []
-
-    # Get values from the remaining data, split up reports.
-    response = response[23:]
-    data_length = 20
-
-    # Get values from each tank report.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["reports"].append({
-                "start_year":   int(value[0:2]),
-                "start_month":  int(value[2:4]),
-                "start_day":    int(value[4:6]),
-                "start_hour":   int(value[6:8]),
-                "start_minute": int(value[8:10]),
-                "end_year":     int(value[10:12]),
-                "end_month":    int(value[12:14]),
-                "end_day":      int(value[14:16]),
-                "end_hour":     int(value[16:18]),
-                "end_minute":   int(value[18:20])
-            })
-
-    return data
-
-def function_201(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 201 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i201" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = []
-
-    # Get values from the remaining data, split up tank reports.
-    response = response[10:]
-    data_length = 65
-
-    # Get values from each tank report.
-    if len(response) >= data_length:
-        for value in _split_data(response, data_length):
-            data["tanks"].append({
-                "tank_number":      value[0:2],
-                "product_code":     value[2:3],
-                "tank_status_bits": int(value[3:7], 16),
-                "volume":           _hex_to_float(value[9:17]),
-                "tc_volume":        _hex_to_float(value[17:25]),
-                "ullage":           _hex_to_float(value[25:33]),
-                "height":           _hex_to_float(value[33:41]),
-                "water":            _hex_to_float(value[41:49]),
-                "temperature":      _hex_to_float(value[49:57]),
-                "water_volume":     _hex_to_float(value[57:65])
-            })
-    
-    return data
-
-def function_202(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 202 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i202" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = []
-
-    # Get values from the remaining data, split up tank reports.
-    response = response[10:]
-
-    # Get values from each tank report.
-    while response:
-        if len(response) < 107: break
-
-        # Collecting all necessary non-repeated values.
-        delivery_count = int(response[3:5])
-
-        tank = {
-            "tank_number":  response[0:2],
-            "product_code": response[2:3],
-            "deliveries":   []
-        }
-
-        # Slicing off the previously collected values, now getting all deliveries.
-        response = response[5:]
-
-        for _ in range(0, delivery_count):
-            if len(response) < 100: break
-
-            tank["deliveries"].append({
-                "start_year":           int(response[0:2]),
-                "start_month":          int(response[2:4]),
-                "start_day":            int(response[4:6]),
-                "start_hour":           int(response[6:8]),
-                "start_minute":         int(response[8:10]),
-                "end_year":             int(response[10:12]),
-                "end_month":            int(response[12:14]),
-                "end_day":              int(response[14:16]),
-                "end_hour":             int(response[16:18]),
-                "end_minute":           int(response[18:20]),
-                "starting_volume":      _hex_to_float(response[22:30]),
-                "starting_tc_volume":   _hex_to_float(response[30:38]),
-                "starting_water":       _hex_to_float(response[38:46]),
-                "starting_temp":        _hex_to_float(response[46:54]),
-                "ending_volume":        _hex_to_float(response[54:62]),
-                "ending_tc_volume":     _hex_to_float(response[62:70]),
-                "ending_water":         _hex_to_float(response[70:78]),
-                "ending_temp":          _hex_to_float(response[78:86]),
-                "starting_height":      _hex_to_float(response[86:94]),
-                "ending_height":        _hex_to_float(response[94:102])
-            })
-
-            response = response[102:]
-        
-        data["tanks"].append(tank)
-
-    return data
-
-def function_203(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 203 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i203" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = []
-
-    # Get values from the remaining data, split up tank reports.
-    response = response[10:]
-    data_length = 57
-
-    # Get values from each tank report.
-    if len(response) >= data_length:
-        for value in _split_data(response, data_length):
-            data["tanks"].append({
-                "tank_number":     value[0:2],
-                "product_code":    value[2:3],
-                "start_year":      int(value[3:5]),
-                "start_month":     int(value[5:7]),
-                "start_day":       int(value[7:9]),
-                "start_hour":      int(value[9:11]),
-                "start_minute":    int(value[11:13]),
-                "test_duration":   int(value[13:15]),
-                "starting_temp":   _hex_to_float(value[17:25]),
-                "ending_temp":     _hex_to_float(value[25:33]),
-                "starting_volume": _hex_to_float(value[33:41]),
-                "ending_rate":     _hex_to_float(value[41:49]),
-                "hourly_changes":  _hex_to_float(value[49:57])
-            })
-
-    return data
-
-def function_204(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 204 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i204" + tank)    
-    data = _get_timestamp(response)
-
-    data["inventory"] = []
-
-    # Get values from the remaining data, split up the inventory.
-    response = response[10:]
-    data_length = 111
-
-    # Get values from each inventory log.
-    if len(response) >= data_length:
-        for value in _split_data(response, data_length):
-            data["inventory"].append({
-                "tank_number":       value[0:2],
-                "product_code":      value[2:3],
-                "shift_number":      value[3:5],
-                "start_volume":      _hex_to_float(value[7:15]),
-                "start_ullage":      _hex_to_float(value[15:23]),
-                "start_tc_volume":   _hex_to_float(value[23:31]),
-                "start_height":      _hex_to_float(value[31:39]),
-                "start_water":       _hex_to_float(value[39:47]),
-                "start_temperature": _hex_to_float(value[47:55]),
-                "end_volume":        _hex_to_float(value[55:63]),
-                "end_ullage":        _hex_to_float(value[63:71]),
-                "end_tc_volume":     _hex_to_float(value[71:79]),
-                "end_height":        _hex_to_float(value[79:87]),
-                "end_water":         _hex_to_float(value[87:95]),
-                "end_temperature":   _hex_to_float(value[95:103]),
-                "total_value":       _hex_to_float(value[103:111])
-            })
-
-    return data
-
-def function_205(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 205 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i205" + tank)    
     data = _get_timestamp(response)
 
     data["alarms"] = []
 
-    # Get values from the remaining data, split up alarms.
-    response = response[10:]
+    # Get values from the remaining data, one tank at a time.
+    position = 10
+    end = len(response)
 
-    while len(response) > 0:
-        number_of_alarms = int(response[2:4], 16)
+    while end - position >= 4:
+        tank_number = response[position:position + 2]
+        number_of_alarms = int(response[position + 2:position + 4], 16)
 
         if number_of_alarms > 0:
             data["alarms"].append({
-                "tank_number":      response[0:2],
+                "tank_number":      tank_number,
                 "number_of_alarms": number_of_alarms,
-                "alarm_type":       response[4:6]
+                "alarm_type":       response[position + 4:position + 6]
             })
 
-            response = response[6:]
+            position += 6
         else:
             data["alarms"].append({
-                "tank_number":      response[0:2],
+                "tank_number":      tank_number,
                 "number_of_alarms": number_of_alarms
             })
 
-            response = response[4:]
+            position += 4
 
     return data
 
-def function_206(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 206 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i206" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = {}
-
-    # Get the list of alarms for each tank after finding how many alarms each tank has.
-    response = response[10:]
-
-    while response:
-        if len(response) < 18: break
-
-        # Collect tank number and alarm count, then slice them out of the current data.
-        tank_number = response[0:2]
-        alarm_count = int(response[2:4])
-
-        response = response[4:]
-
-        # Create a dictionary for the tank and add the alarms into an associated list.
-        data["tanks"][tank_number] = []
-    
-        for _ in range(0, alarm_count):
-            if len(response) < 14: break
-            
-            data["tanks"][tank_number].append({
-                "year":       int(response[0:2]),
-                "month":      int(response[2:4]),
-                "day":        int(response[4:6]),
-                "hour":       int(response[6:8]),
-                "minute":     int(response[8:10]),
-                "alarm_type": response[10:14]
-            })
-
-            # Slice off values that have already been added.
-            response = response[14:]
-
-    return data
-
-def function_207(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 207 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i207" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = {}
-
-    # Get the list of tests for each tank after finding how many tests each tank has.
-    response = response[10:]
-
-    while response:
-        if len(response) < 44: break
-
-        # Collect tank number and test count, then slice them out of the current data.
-        tank_number = response[0:2]
-        test_count = int(response[2:4], 16)
-
-        response = response[4:]
-
-        # Create a dictionary for the tank and add the tests into an associated list.
-        data["tanks"][tank_number] = []
-    
-        for _ in range(0, test_count):
-            if len(response) < 40: break
-            
-            data["tanks"][tank_number].append({
-                "report_type":         response[0:2],
-                "leak_history_number": response[2:4],
-                "test_type":           response[4:6],
-                "year":                int(response[6:8]),
-                "month":               int(response[8:10]),
-                "day":                 int(response[10:12]),
-                "hour":                int(response[12:14]),
-                "minute":              int(response[14:16]),
-                "duration":            _hex_to_float(response[16:24]),
-                "volume":              _hex_to_float(response[24:32]),
-                "volume_percentage":   _hex_to_float(response[32:40])
-            })
-
-            # Slice off values that have already been added.
-            response = response[40:]
-
-    return data
-
-def function_208(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 208 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i208" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = {}
-
-    # Get the list of tests for each tank after finding how many tests each tank has.
-    response = response[10:]
-
-    while response:
-        if len(response) < 44: break
-
-        # Collect tank number and test count, then slice them out of the current data.
-        tank_number = response[0:2]
-        test_count = int(response[2:4], 16)
-
-        response = response[4:]
-
-        # Create a dictionary for the tank and add the tests into an associated list.
-        data["tanks"][tank_number] = []
-    
-        for _ in range(0, test_count):
-            if len(response) < 40: break
-            
-            data["tanks"][tank_number].append({
-                "test_result_type":     response[0:2],
-                "test_manifold_status": response[2:4],
-                "year":                 int(response[4:6]),
-                "month":                int(response[6:8]),
-                "day":                  int(response[8:10]),
-                "hour":                 int(response[10:12]),
-                "minute":               int(response[12:14]),
-                "test_result":          response[14:16],
-                "test_rate":            _hex_to_float(response[16:24]),
-                "duration":             _hex_to_float(response[24:32]),
-                "volume":               _hex_to_float(response[32:40])
-            })
-
-            # Slice off values that have already been added.
-            response = response[40:]
-
-    return data
+PARSERS["205"] = _parse_205
+
+LAYOUTS["206"] = Layout("206", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number", 0, 2),
+), Field("count", 2, 4, "int"), (
+    Field("year",       0,  2,  "int"),
+    Field("month",      2,  4,  "int"),
+    Field("day",        4,  6,  "int"),
+    Field("hour",       6,  8,  "int"),
+    Field("minute",     8,  10, "int"),
+    Field("alarm_type", 10, 14)
+), 14, keyed_by="tank_number"))
+
+LAYOUTS["207"] = Layout("207", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number", 0, 2),
+), Field("count", 2, 4, "hex"), (
+    Field("report_type",         0,  2),
+    Field("leak_history_number", 2,  4),
+    Field("test_type",           4,  6),
+    Field("year",                6,  8,  "int"),
+    Field("month",               8,  10, "int"),
+    Field("day",                 10, 12, "int"),
+    Field("hour",                12, 14, "int"),
+    Field("minute",              14, 16, "int"),
+    Field("duration",            16, 24, "float"),
+    Field("volume",              24, 32, "float"),
+    Field("volume_percentage",   32, 40, "float")
+), 40, keyed_by="tank_number"))
+
+LAYOUTS["208"] = Layout("208", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number", 0, 2),
+), Field("count", 2, 4, "hex"), (
+    Field("test_result_type",     0,  2),
+    Field("test_manifold_status", 2,  4),
+    Field("year",                 4,  6,  "int"),
+    Field("month",                6,  8,  "int"),
+    Field("day",                  8,  10, "int"),
+    Field("hour",                 10, 12, "int"),
+    Field("minute",               12, 14, "int"),
+    Field("test_result",          14, 16),
+    Field("test_rate",            16, 24, "float"),
+    Field("duration",             24, 32, "float"),
+    Field("volume",               32, 40, "float")
+), 40, keyed_by="tank_number"))
 
 # Functions 20A through 219 need to be added.
 
-def function_21A(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 21A on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i21A" + tank)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = []
-
-    # Get values from the remaining data, split up tank reports.
-    response = response[10:]
-    data_length = 65
-
-    # Get values from each tank report.
-    if len(response) >= data_length:
-        for value in _split_data(response, data_length):
-            data["tanks"].append({
-                "tank_number":      value[0:2],
-                "product_code":     value[2:3],
-                "tank_status_bits": int(value[3:7], 16),
-                "volume":           _hex_to_float(value[9:17]),
-                "tc_volume":        _hex_to_float(value[17:25]),
-                "ullage":           _hex_to_float(value[25:33]),
-                "height":           _hex_to_float(value[33:41]),
-                "water":            _hex_to_float(value[41:49]),
-                "temperature":      _hex_to_float(value[49:57]),
-                "water_volume":     _hex_to_float(value[57:65])
-            })
-    
-    return data
+LAYOUTS["21A"] = Layout("21A", TIMESTAMP, Records("tanks", 10, 65, (
+    Field("tank_number",      0,  2),
+    Field("product_code",     2,  3),
+    Field("tank_status_bits", 3,  7,  "hex"),
+    Field("volume",           9,  17, "float"),
+    Field("tc_volume",        17, 25, "float"),
+    Field("ullage",           25, 33, "float"),
+    Field("height",           33, 41, "float"),
+    Field("water",            41, 49, "float"),
+    Field("temperature",      49, 57, "float"),
+    Field("water_volume",     57, 65, "float")
+)))
 
 # The TLS system I am using does not support this function. This is untested.
-def function_21B(tls: TlsSocket, tank: str, deliveries: int) -> dict:
+def _command_21B(code: str, tank: str, deliveries: int) -> str:
     """
-    Runs function 21B on a given Veeder-Root TLS device and returns a dict with 
-    report info.
+    Validates the arguments for function 21B and builds its command.
 
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    code - The function code.
 
     tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
 
     deliveries - The amount of deliveries to show for each tank.
     """
 
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
+    _check_tank(tank)
 
     if not type(deliveries) == int:       raise ValueError("Argument 'deliveries' must be an integer.")
     if deliveries < 1 or deliveries > 99: raise ValueError("Argument 'deliveries' must be two digits long.")
 
     # When passed into the command, deliveries must be two digits long.
-    deliveries = str(deliveries).zfill(2)
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i21B" + tank + deliveries)    
-    data = _get_timestamp(response)
-
-    data["tanks"] = {}
-
-    # Get the list of deliveries for each tank.
-    response = response[10:]
-
-    while response:
-        if len(response) < 194: break
-
-        # Collect tank number and delivery count, then slice them out of the current data.
-        tank_number = response[0:2]
-        delivery_count = int(response[2:4])
-
-        response = response[4:]
-
-        # Create a dictionary for the tank and add the deliveries into an associated list.
-        data["tanks"][tank_number] = []
-    
-        for _ in range(0, delivery_count):
-            if len(response) < 190: break
-            
-            data["tanks"][tank_number].append({
-                "start_year":                                       int(response[0:2]),
-                "start_month":                                      int(response[2:4]),
-                "start_day":                                        int(response[4:6]),
-                "start_hour":                                       int(response[6:8]),
-                "start_minute":                                     int(response[8:10]),
-                "end_year":                                         int(response[10:12]),
-                "end_month":                                        int(response[12:14]),
-                "end_day":                                          int(response[14:16]),
-                "end_hour":                                         int(response[16:18]),
-                "end_minute":                                       int(response[18:20]),
-                "start_volume":                                     _hex_to_float(response[22:30]),
-                "end_volume":                                       _hex_to_float(response[30:38]),
-                "adjusted_delivery_volume":                         _hex_to_float(response[38:46]),
-                "adjusted_temperature_compensated_delivery_volume": _hex_to_float(response[46:54]),
-                "start_fuel_height":                                _hex_to_float(response[54:62]),
-                "start_fuel_temperature_1":                         _hex_to_float(response[62:70]),
-                "start_fuel_temperature_2":                         _hex_to_float(response[70:78]),
-                "start_fuel_temperature_3":                         _hex_to_float(response[78:86]),
-                "start_fuel_temperature_4":                         _hex_to_float(response[86:94]),
-                "start_fuel_temperature_5":                         _hex_to_float(response[94:102]),
-                "start_fuel_temperature_6":                         _hex_to_float(response[102:110]),
-                "end_fuel_height":                                  _hex_to_float(response[110:118]),
-                "end_fuel_temperature_1":                           _hex_to_float(response[118:126]),
-                "end_fuel_temperature_2":                           _hex_to_float(response[126:134]),
-                "end_fuel_temperature_3":                           _hex_to_float(response[134:142]),
-                "end_fuel_temperature_4":                           _hex_to_float(response[142:150]),
-                "end_fuel_temperature_5":                           _hex_to_float(response[150:158]),
-                "end_fuel_temperature_6":                           _hex_to_float(response[158:166]),
-                "total_dispensed":                                  _hex_to_float(response[166:174]),
-                "start_fuel_temperature_average":                   _hex_to_float(response[174:182]),
-                "end_fuel_temperature average":                     _hex_to_float(response[182:190])
-            })
-
-            # Slice off values that have already been added.
-            response = response[190:]
-
-    return data
-
-def function_221(tls: TlsSocket, tank: str, current_report: bool) -> dict:
-    """
-    Runs function 221 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
+    return "i" + code + tank + str(deliveries).zfill(2)
+
+LAYOUTS["21B"] = Layout("21B", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number", 0, 2),
+), Field("count", 2, 4, "int"), (
+    Field("start_year",                                       0,   2,   "int"),
+    Field("start_month",                                      2,   4,   "int"),
+    Field("start_day",                                        4,   6,   "int"),
+    Field("start_hour",                                       6,   8,   "int"),
+    Field("start_minute",                                     8,   10,  "int"),
+    Field("end_year",                                         10,  12,  "int"),
+    Field("end_month",                                        12,  14,  "int"),
+    Field("end_day",                                          14,  16,  "int"),
+    Field("end_hour",                                         16,  18,  "int"),
+    Field("end_minute",                                       18,  20,  "int"),
+    Field("start_volume",                                     22,  30,  "float"),
+    Field("end_volume",                                       30,  38,  "float"),
+    Field("adjusted_delivery_volume",                         38,  46,  "float"),
+    Field("adjusted_temperature_compensated_delivery_volume", 46,  54,  "float"),
+    Field("start_fuel_height",                                54,  62,  "float"),
+    Field("start_fuel_temperature_1",                         62,  70,  "float"),
+    Field("start_fuel_temperature_2",                         70,  78,  "float"),
+    Field("start_fuel_temperature_3",                         78,  86,  "float"),
+    Field("start_fuel_temperature_4",                         86,  94,  "float"),
+    Field("start_fuel_temperature_5",                         94,  102, "float"),
+    Field("start_fuel_temperature_6",                         102, 110, "float"),
+    Field("end_fuel_height",                                  110, 118, "float"),
+    Field("end_fuel_temperature_1",                           118, 126, "float"),
+    Field("end_fuel_temperature_2",                           126, 134, "float"),
+    Field("end_fuel_temperature_3",                           134, 142, "float"),
+    Field("end_fuel_temperature_4",                           142, 150, "float"),
+    Field("end_fuel_temperature_5",                           150, 158, "float"),
+    Field("end_fuel_temperature_6",                           158, 166, "float"),
+    Field("total_dispensed",                                  166, 174, "float"),
+    Field("start_fuel_temperature_average",                   174, 182, "float"),
+    Field("end_fuel_temperature average",                     182, 190, "float")
+), 190, keyed_by="tank_number"))
+
+def _command_221(code: str, tank: str, current_report: bool) -> str:
+    """
+    Validates the arguments for function 221 and builds its command.
+
+    code - The function code.
 
     tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
 
-    current_report - Boolean indicating whether current report or previous report should be shown.
+    current_report - Whether the current report or previous report should be shown.
     """
 
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
+    _check_tank(tank)
 
     if not type(current_report) == bool: raise ValueError("Argument 'current_report' must be " \
                                                           "a bool.")
     report_type = "01" if current_report else "02"
 
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i221" + tank + report_type)
-    data = _get_timestamp(response)
-
-    data["reports"] = []
-
-    # Get values from the remaining data, split up reports.
-    response = response[10:]
-
-    while response:
-        if len(response) < 68: break
-
-        # Collect tank number and alarm count, then slice them out of the current data.
-        tank_number    = response[0:2]
-        product_code   = response[2:3]
-        probe_type     = response[3:5]
-        delivery_count = int(response[5:8])
-
-        response = response[8:]
-
-        # Create a dictionary for the tank and add the alarms into an associated list.
-        data["reports"][tank_number] = []
-    
-        for _ in range(0, delivery_count):
-            if len(response) < 60: break
-            
-            data["tanks"][tank_number].append({
-                "product_code":                   product_code,
-                "probe_type":                     probe_type,
-                "year":                           int(response[0:2]),
-                "month":                          int(response[2:4]),
-                "day":                            int(response[4:6]),
-                "hour":                           int(response[6:8]),
-                "minute":                         int(response[8:10]),
-                "ticket_volume":                  _hex_to_float(response[12:20]),
-                "gauged_volume":                  _hex_to_float(response[20:28]),
-                "delivery_variance":              _hex_to_float(response[28:36]),
-                "start_fuel_temperature":         _hex_to_float(response[36:44]),
-                "end_fuel_temperature":           _hex_to_float(response[44:52]),
-                "estimated_delivery_temperature": _hex_to_float(response[52:60])
-            })
-
-            # Slice off values that have already been added.
-            response = response[60:]
-
-    return data
-
-
-# Functions 222 through 227 need to be added.
-
-def function_251(tls: TlsSocket, tank: str) -> dict:
-    """
-    Runs function 251 on a given Veeder-Root TLS device and returns a dict with 
-    report info.
-
-    tls - A socket for a TLS device, should be created with the tlsSocket class.
-
-    tank - The tank number (ex. 00 for all tanks, 01 for tank one, etc).
-    """
-
-    if not type(tank) == str: raise ValueError("Argument 'tank' must be a string.")
-    if not len(tank) == 2:    raise ValueError("Argument 'tank' must be two digits long.")
-    if not tank.isdigit():    raise ValueError("Argument 'tank' must only contain numbers.")
-
-    # Execute the command and extract common values from it immediately.
-    response = tls.execute("i251" + tank)    
-    data = _get_timestamp(response)
-    
-    data["reports"] = []
-
-    # Get values from the remaining data, split up reports.
-    response = response[10:]
-    data_length = 4
-
-    # Get values from each alarm.
-    if len(response) >= data_length: 
-        for value in _split_data(response, data_length):
-            data["reports"].append({
-                "tank_number":  value[0:2],
-                "csld_results": value[2:4] 
-            })
-
-    return data
\ No newline at end of file
+    return "i" + code + tank + report_type
+
+LAYOUTS["221"] = Layout("221", TIMESTAMP, Groups("tanks", 10, (
+    Field("tank_number",  0, 2),
+    Field("product_code", 2, 3),
+    Field("probe_type",   3, 5)
+), Field("count", 5, 8, "int"), (
+    Field("year",                           0,  2,  "int"),
+    Field("month",                          2,  4,  "int"),
+    Field("day",                            4,  6,  "int"),
+    Field("hour",                           6,  8,  "int"),
+    Field("minute",                         8,  10, "int"),
+    Field("ticket_volume",                  12, 20, "float"),
+    Field("gauged_volume",                  20, 28, "float"),
+    Field("delivery_variance",              28, 36, "float"),
+    Field("start_fuel_temperature",         36, 44, "float"),
+    Field("end_fuel_temperature",           44, 52, "float"),
+    Field("estimated_delivery_temperature", 52, 60, "float")
+), 60, keyed_by="tank_number", inherited=("product_code", "probe_type")))
+
+# Functions 222 through 227 need to be added. Each only needs a LAYOUTS entry, and a
+# BUILDERS entry if its command takes anything other than a tank number.
+
+LAYOUTS["251"] = Layout("251", TIMESTAMP, Records("reports", 10, 4, (
+    Field("tank_number",  0, 2),
+    Field("csld_results", 2, 4)
+)))
+
+# The functions whose command is not the function code followed by a tank number, with
+# the builder that validates their arguments and builds their command. A builder takes
+# the function code followed by the arguments of the function.
+BUILDERS = {
+    "102": _system_command,
+    "111": _system_command,
+    "112": _system_command,
+    "113": _system_command,
+    "114": _system_command,
+    "115": _system_command,
+    "116": _system_command,
+    "119": _command_119,
+    "11A": _system_command,
+    "11B": _system_command,
+    "21B": _command_21B,
+    "221": _command_221
+}
+
+# Compiles a parser for every layout, then a function for every parser, as _parse_XXX
+# and function_XXX.
+for code, layout in LAYOUTS.items():
+    PARSERS[code] = compile_layout(layout)
+
+for code in sorted(PARSERS):
+    globals()["_parse_" + code] = PARSERS[code]
+    globals()["function_" + code] = compile_function(code)
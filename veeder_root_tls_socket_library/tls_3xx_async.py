@@ -0,0 +1,12 @@
+# tls_3xx_async.py - Awaitable versions of the tls_3xx functions for use with AsyncTlsSocket.
+
+from veeder_root_tls_socket_library import tls_3xx
+from veeder_root_tls_socket_library.async_socket import AsyncTlsSocket
+
+# Generates a coroutine function_XXX for every function in tls_3xx, from the same parser 
+# and command builder as its synchronous version.
+for code in sorted(tls_3xx.PARSERS):
+    function = tls_3xx.compile_function(code, AsyncTlsSocket, awaitable=True)
+    function.__module__ = __name__
+
+    globals()["function_" + code] = function